@@ -13,17 +13,17 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
+from pathlib import Path
 import numpy as np
 
-# Machine LearningLibrary
-try:
-    from sklearn.tree import DecisionTreeClassifier
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.preprocessing import LabelEncoder
-    import joblib
-    ML_AVAILABLE = True
-except ImportError:
-    ML_AVAILABLE = False
+from lazy_loader import lazy_import, module_available
+
+# Machine LearningLibrary (延迟导入，Training或加载决策Model时才需要)
+tree = lazy_import('sklearn.tree')
+preprocessing = lazy_import('sklearn.preprocessing')
+joblib = lazy_import('joblib')
+ML_AVAILABLE = module_available('sklearn') and module_available('joblib')
+if not ML_AVAILABLE:
     logging.warning("ML libraries not available")
 
 # Configure logging
@@ -109,7 +109,7 @@ class DecisionEngine:
     def __init__(self, model_path: str = "models/decision_model.joblib"):
         self.model_path = model_path
         self.decision_tree = None
-        self.label_encoder = LabelEncoder()
+        self._label_encoder = None
         self.is_trained = False
         
         # 决策Rules权重
@@ -122,6 +122,12 @@ class DecisionEngine:
         
         self.load_model()
     
+    @property
+    def label_encoder(self):
+        if self._label_encoder is None:
+            self._label_encoder = preprocessing.LabelEncoder()
+        return self._label_encoder
+    
     def extract_features(self, threat_event: ThreatEvent) -> np.ndarray:
         """提取威胁事件Feature"""
         features = []
@@ -266,7 +272,7 @@ class DecisionEngine:
             X = np.array(X)
             y = np.array(y)
             
-            self.decision_tree = DecisionTreeClassifier(random_state=42)
+            self.decision_tree = tree.DecisionTreeClassifier(random_state=42)
             self.decision_tree.fit(X, y)
             
             self.is_trained = True
@@ -297,6 +303,10 @@ class DecisionEngine:
     
     def load_model(self):
         """LoadModel"""
+        if not Path(self.model_path).exists():
+            logger.info("No pre-trained model found, using rule-based decisions")
+            return
+        
         try:
             if ML_AVAILABLE:
                 self.decision_tree = joblib.load(self.model_path)
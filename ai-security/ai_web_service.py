@@ -7,6 +7,7 @@ AISecurityServiceWebInterface
 import asyncio
 import json
 import logging
+import os
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from pathlib import Path
@@ -22,27 +23,88 @@ except ImportError:
     logging.warning("aiohttp not available, web service disabled")
 
 # AIModule
+from analysis_executor import AnalysisRejected
+from file_walker import DEFAULT_KINDS, TreeScanProgress
 from intelligent_threat_detector import IntelligentThreatDetector
-from nlp_security_analyzer import SecurityLogAnalyzer, SecurityReportGenerator
+from lazy_loader import loaded_modules, warm_up
+from model_updater import ModelUpdateJob
+from nlp_security_analyzer import SecurityLogAnalyzer, SecurityReportGenerator, ThreatIntelligenceProcessor
 from ai_response_system import AIResponseSystem, ThreatEvent, ThreatLevel
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 启动后在后台预加载Model (默认按需加载)
+WARM_UP_ENV = 'HUNTERMATRIX_WARM_UP'
+
+# readiness中报告的重量级依赖
+HEAVY_MODULES = ('pandas', 'sklearn', 'xgboost', 'torch', 'transformers', 'spacy', 'sentence_transformers')
+
+
+class InvalidParameter(ValueError):
+    """Request参数不合法 (返回400)"""
+
+
+async def json_object(request) -> Dict[str, Any]:
+    """Read JSON对象形式的Request体"""
+    try:
+        data = await request.json()
+    except ValueError:
+        raise InvalidParameter('Request body must be valid JSON')
+    if not isinstance(data, dict):
+        raise InvalidParameter('Request body must be a JSON object')
+    return data
+
+
+def int_param(data: Dict[str, Any], name: str, default: Optional[int], minimum: int = 1) -> Optional[int]:
+    """Read整数参数 (default为None时允许省略或为null)"""
+    value = data.get(name, default)
+    if value is None and default is None:
+        return None
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        value = int(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise InvalidParameter(f'{name} must be an integer >= {minimum}')
+    return value
+
+
+def str_list_param(data: Dict[str, Any], name: str) -> Optional[List[str]]:
+    """Read字符串列Table参数 (可省略)"""
+    value = data.get(name)
+    if value is None:
+        return None
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise InvalidParameter(f'{name} must be a list of strings')
+    return value
+
 class AIWebService:
     """AISecurityServiceWebInterface"""
     
-    def __init__(self, host='localhost', port=8082):
+    def __init__(self, host='localhost', port=8082, warm_up: Optional[bool] = None):
         self.host = host
         self.port = port
         self.app = None
         
+        if warm_up is None:
+            warm_up = os.environ.get(WARM_UP_ENV, '').lower() in ('1', 'true', 'yes')
+        self.warm_up_enabled = warm_up
+        self.warm_up_thread = None
+        
         # AIGroup件
         self.threat_detector = IntelligentThreatDetector()
         self.log_analyzer = SecurityLogAnalyzer()
+        self.intel_processor = ThreatIntelligenceProcessor()
         self.report_generator = SecurityReportGenerator()
         self.response_system = AIResponseSystem()
+        
+        # 后台增量Training (设置HUNTERMATRIX_FEATURE_SHARDS时启用)，发布新Version后立即切换
+        ml_detector = self.threat_detector.ml_detector
+        self.model_update_job = ModelUpdateJob.from_env(
+            str(ml_detector.model_dir), on_publish=lambda version: ml_detector.reload_if_changed(force=True)
+        )
 
         # Report生成器
         from ai_report_generator import AIReportGenerator
@@ -117,11 +179,14 @@ class AIWebService:
         """Settings路由"""
         # API路由
         self.app.router.add_get('/api/status', self.get_status)
+        self.app.router.add_get('/api/ready', self.get_readiness)
         self.app.router.add_post('/api/chat', self.handle_chat)
         self.app.router.add_post('/api/analyze-file', self.analyze_file)
+        self.app.router.add_post('/api/analyze-directory', self.analyze_directory)
         self.app.router.add_post('/api/analyze-logs', self.analyze_logs)
         self.app.router.add_get('/api/threat-report', self.get_threat_report)
         self.app.router.add_post('/api/process-threat', self.process_threat)
+        self.app.router.add_post('/api/threat-intel', self.load_threat_intel)
 
         # Report相关API
         self.app.router.add_post('/api/generate-report', self.generate_report)
@@ -158,12 +223,65 @@ class AIWebService:
             },
             'models': {
                 'ml_detector': self.threat_detector.ml_detector.is_trained,
-                'nlp_analyzer': bool(self.log_analyzer.nlp),
+                'ml_model_version': self.threat_detector.ml_detector.model_version,
+                'nlp_analyzer': self.log_analyzer.model_loaders['nlp'].loaded,
                 'response_system': True
-            }
+            },
+            'yara_rules': self.threat_detector.feature_extractor.yara_manager.status(),
+            'similarity_index': self.threat_detector.feature_extractor.similarity_index.status(),
+            'model_update': self.model_update_job.status() if self.model_update_job is not None else None,
+            'analysis_executor': self.threat_detector.executor.stats(),
+            'detection_cascade': self.threat_detector.cascade.stats(),
+            'inference_schedulers': self.log_analyzer.scheduler_stats(),
+            'log_templates': self.log_analyzer.template_stats(),
+            'indicator_store': self.log_analyzer.indicator_store.stats(),
+            'analysis_cache': (
+                self.threat_detector.cache.stats() if self.threat_detector.cache is not None else None
+            )
         }
         return web.json_response(status)
     
+    def start_warm_up(self):
+        """在后台线程中预加载检测Model和NLPModel"""
+        if self.warm_up_thread is None:
+            self.warm_up_thread = warm_up([
+                self.threat_detector.ml_detector.ensure_models_loaded,
+                self.log_analyzer.warm_up
+            ])
+    
+    def readiness(self) -> Dict[str, Any]:
+        """各Group件的加载Status"""
+        ml_detector = self.threat_detector.ml_detector
+        nlp_models = self.log_analyzer.model_status()
+        
+        if not self.warm_up_enabled:
+            warm_up_state = 'disabled'
+        elif self.warm_up_thread is None:
+            warm_up_state = 'pending'
+        else:
+            warm_up_state = 'running' if self.warm_up_thread.is_alive() else 'complete'
+        
+        # 未开启预热时按需加载，Service启动即就绪
+        return {
+            'ready': warm_up_state in ('disabled', 'complete'),
+            'warm_up': warm_up_state,
+            'components': {
+                'threat_detector': {
+                    'state': 'loaded' if ml_detector.is_trained else 'pending',
+                    'compiled': ml_detector.compiled_models is not None,
+                    'model_version': ml_detector.model_version
+                },
+                'nlp_models': nlp_models
+            },
+            'modules': loaded_modules(HEAVY_MODULES),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    async def get_readiness(self, request):
+        """就绪Check: 预热完成前返回503"""
+        readiness = self.readiness()
+        return web.json_response(readiness, status=200 if readiness['ready'] else 503)
+    
     async def handle_chat(self, request):
         """Process聊天Request"""
         try:
@@ -292,31 +410,135 @@ SystemRun状况良好，所HasSecurityGroup件正常工作。"""
     async def analyze_file(self, request):
         """AnalysisFile威胁"""
         try:
-            data = await request.json()
+            data = await json_object(request)
             file_path = data.get('file_path')
+            file_paths = data.get('file_paths')
+            
+            # 批量模式: 一次提交多个FilePath，按Input顺序返回Result
+            if file_paths is not None:
+                if not isinstance(file_paths, list) or not all(isinstance(p, str) for p in file_paths):
+                    return web.json_response({'error': 'file_paths must be a list of strings'}, status=400)
+                
+                batch_size = int_param(data, 'batch_size', 64)
+                analyses = await self.threat_detector.analyze_files(file_paths, batch_size=batch_size)
+                return web.json_response({
+                    'results': [self.serialize_analysis(analysis) for analysis in analyses]
+                })
             
-            if not file_path:
+            if not file_path or not isinstance(file_path, str):
                 return web.json_response({'error': 'File path is required'}, status=400)
             
             # 使用AI威胁Detection器AnalysisFile
             analysis = await self.threat_detector.analyze_file(file_path)
+
+            return web.json_response(self.serialize_analysis(analysis))
+
+        except InvalidParameter as e:
+            return web.json_response({'error': str(e)}, status=400)
+
+        except AnalysisRejected as e:
+            # 分析队列已满: 客户端稍后重试
+            logger.warning(f"File analysis rejected: {e}")
+            return web.json_response({
+                'error': 'overloaded',
+                'message': str(e),
+                'executor': e.status
+            }, status=503, headers={'Retry-After': '1'})
+
+        except Exception as e:
+            logger.error(f"File analysis error: {e}")
+            return web.json_response({'error': str(e)}, status=500)
+
+    async def analyze_directory(self, request):
+        """AnalysisDirectory树，以NDJSON流式返回每个File的Result，最后一行是进度统计"""
+        try:
+            data = await json_object(request)
+            root = data.get('root')
+            if not isinstance(root, str) or not root or not os.path.isdir(root):
+                return web.json_response({'error': 'root must be an existing directory'}, status=400)
             
-            result = {
-                'file_path': analysis.file_path,
-                'threat_score': analysis.threat_score,
-                'confidence': analysis.confidence,
-                'threat_type': analysis.threat_type,
-                'threat_category': analysis.threat_category,
-                'recommendations': analysis.recommendations,
-                'analysis_time': analysis.analysis_time.isoformat() if analysis.analysis_time else None
-            }
-            
-            return web.json_response(result)
+            # kinds省略时只分析默认类型，'all'或null时不按类型过滤
+            if 'kinds' not in data:
+                kinds = sorted(DEFAULT_KINDS)
+            elif data['kinds'] == 'all':
+                kinds = None
+            else:
+                kinds = str_list_param(data, 'kinds')
+            include = str_list_param(data, 'include')
+            exclude = str_list_param(data, 'exclude')
+            max_size = int_param(data, 'max_size', None, minimum=0)
+            batch_size = int_param(data, 'batch_size', 64)
             
+            progress = TreeScanProgress(root=root)
+            results = self.threat_detector.analyze_tree(
+                root,
+                include=include,
+                exclude=exclude,
+                max_size=max_size,
+                kinds=kinds,
+                batch_size=batch_size,
+                progress=progress
+            )
+            # 第一个Result之前的高水位Check在这里抛出，仍可返回普通的503Response
+            first = await results.__anext__()
+        except InvalidParameter as e:
+            return web.json_response({'error': str(e)}, status=400)
+        except StopAsyncIteration:
+            first = None
+        except AnalysisRejected as e:
+            logger.warning(f"Directory analysis rejected: {e}")
+            return web.json_response({
+                'error': 'overloaded',
+                'message': str(e),
+                'executor': e.status
+            }, status=503, headers={'Retry-After': '1'})
         except Exception as e:
-            logger.error(f"File analysis error: {e}")
+            logger.error(f"Directory analysis error: {e}")
             return web.json_response({'error': str(e)}, status=500)
+        
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        try:
+            if first is not None:
+                await response.write(self.ndjson_line({'result': self.serialize_analysis(first)}))
+                async for analysis in results:
+                    await response.write(self.ndjson_line({'result': self.serialize_analysis(analysis)}))
+            await response.write(self.ndjson_line({'progress': progress.to_dict()}))
+        except Exception as e:
+            logger.error(f"Directory analysis error: {e}")
+            await response.write(self.ndjson_line({'error': str(e), 'progress': progress.to_dict()}))
+        finally:
+            await results.aclose()
+        await response.write_eof()
+        return response
     
+    @staticmethod
+    def ndjson_line(record: Dict[str, Any]) -> bytes:
+        return (json.dumps(record, default=str) + '\n').encode()
+
+    def serialize_analysis(self, analysis) -> Dict[str, Any]:
+        """将ThreatAnalysis转换为APIResponse"""
+        features = analysis.features or {}
+        return {
+            'file_path': analysis.file_path,
+            'threat_score': analysis.threat_score,
+            'confidence': analysis.confidence,
+            'threat_type': analysis.threat_type,
+            'threat_category': analysis.threat_category,
+            'verdict_stage': analysis.verdict_stage,
+            'recommendations': analysis.recommendations,
+            'analysis_time': analysis.analysis_time.isoformat() if analysis.analysis_time else None,
+            # 与评分共用的Feature记录 (只返回可JSON序列化的摘要)
+            'features': {
+                key: features[key] for key in (
+                    'file_size', 'file_type', 'md5', 'sha1', 'sha256', 'entropy',
+                    'string_count', 'suspicious_string_count', 'yara_matches', 'verdict_reason',
+                    'ssdeep', 'tlsh', 'similar_family', 'similarity_score', 'file_kind',
+                    'sampled_bytes', 'approximate_features', 'hash_mode'
+                ) if key in features
+            }
+        }
+
     async def analyze_logs(self, request):
         """AnalysisSecurityLog"""
         try:
@@ -326,9 +548,13 @@ SystemRun状况良好，所HasSecurityGroup件正常工作。"""
             if not log_entries:
                 return web.json_response({'error': 'Log entries are required'}, status=400)
             
+            async def entries():
+                for log_entry in log_entries:
+                    yield log_entry
+            
+            # 微批次流式Analysis (Result顺序与输入一致)
             results = []
-            for log_entry in log_entries:
-                analysis = await self.log_analyzer.analyze_log_entry(log_entry)
+            async for analysis in self.log_analyzer.analyze_log_stream(entries()):
                 results.append({
                     'original_text': analysis.original_text,
                     'threat_level': analysis.threat_level,
@@ -337,7 +563,8 @@ SystemRun状况良好，所HasSecurityGroup件正常工作。"""
                     'iocs': analysis.iocs,
                     'anomaly_score': analysis.anomaly_score,
                     'keywords': analysis.keywords,
-                    'classification': analysis.classification
+                    'classification': analysis.classification,
+                    'intel_hits': analysis.intel_hits
                 })
             
             return web.json_response({'results': results})
@@ -426,6 +653,30 @@ SystemRun状况良好，所HasSecurityGroup件正常工作。"""
             logger.error(f"Threat processing error: {e}")
             return web.json_response({'error': str(e)}, status=500)
 
+    async def load_threat_intel(self, request):
+        """加载威胁情报: feeds为情报源Text (JSON或纯Text)，indicators为JSON情报记录列Table"""
+        try:
+            data = await request.json()
+            intel_records = []
+            for feed in data.get('feeds', []):
+                intel_records.extend(await self.intel_processor.process_threat_feed(feed))
+            for indicator in data.get('indicators', []):
+                intel_records.append(self.intel_processor.parse_json_threat(indicator))
+            
+            if not intel_records:
+                return web.json_response({'error': 'Threat intelligence feeds or indicators are required'}, status=400)
+            
+            loaded = self.log_analyzer.load_threat_intelligence(intel_records)
+            return web.json_response({
+                'loaded': loaded,
+                'rejected': len(intel_records) - loaded,
+                'store': self.log_analyzer.indicator_store.stats()
+            })
+            
+        except Exception as e:
+            logger.error(f"Threat intelligence loading error: {e}")
+            return web.json_response({'error': str(e)}, status=500)
+
     async def generate_report(self, request):
         """生成SecurityReport"""
         try:
@@ -762,14 +1013,22 @@ SystemRun状况良好，所HasSecurityGroup件正常工作。"""
         site = web.TCPSite(runner, self.host, self.port)
         await site.start()
         
+        if self.warm_up_enabled:
+            self.start_warm_up()
+        if self.model_update_job is not None:
+            self.model_update_job.start()
+        
         logger.info(f"🤖 AI Security Service started at http://{self.host}:{self.port}")
         logger.info("Available endpoints:")
         logger.info("  GET  /api/status - Service status")
+        logger.info("  GET  /api/ready - Component readiness")
         logger.info("  POST /api/chat - Chat with AI assistant")
         logger.info("  POST /api/analyze-file - Analyze file threats")
+        logger.info("  POST /api/analyze-directory - Analyze a directory tree (NDJSON stream)")
         logger.info("  POST /api/analyze-logs - Analyze security logs")
         logger.info("  GET  /api/threat-report - Get threat report")
         logger.info("  POST /api/process-threat - Process threat events")
+        logger.info("  POST /api/threat-intel - Load threat intelligence indicators")
         logger.info("  WS   /ws - WebSocket connection")
 
 async def main():
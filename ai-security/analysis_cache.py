@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+AnalysisResultCache
+基于Content寻址的威胁AnalysisCache: (inode, size, mtime) -> sha256 -> (sha256, ModelVersion) -> Result
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+StatKey = Tuple[int, int, int, int]
+
+
+def stat_key(stat: os.stat_result) -> StatKey:
+    """由File元Data生成廉价的Cache键"""
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _json_default(value: Any) -> Any:
+    """序列化numpy标量等非标准Type"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class LRUCache:
+    """简单的线程Security LRUCache"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class AnalysisCache:
+    """两级Cache: Memory LRU + 持久化SQLite
+
+    - digest层: File元Data -> sha256，避免对未变化的File重新哈希
+    - verdict层: (sha256, model_version) -> AnalysisResult和Feature
+    Model变化时调用 invalidate()，旧Version的Result不会再被命中。
+    """
+
+    def __init__(self, db_path: Optional[str] = "cache/analysis_cache.db",
+                 max_memory_entries: int = 10000):
+        self.db_path = db_path
+        self.digests = LRUCache(max_memory_entries)
+        self.verdicts = LRUCache(max_memory_entries)
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'digest_hits': 0,
+            'digest_misses': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'invalidations': 0
+        }
+
+        if db_path:
+            self.open_db(db_path)
+
+    def open_db(self, db_path: str):
+        """Open持久化层"""
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS digests ("
+                " dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,"
+                " sha256 TEXT NOT NULL, PRIMARY KEY (dev, ino))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                " sha256 TEXT, model_version TEXT, record TEXT NOT NULL,"
+                " PRIMARY KEY (sha256, model_version))"
+            )
+            self._db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to open analysis cache {db_path}: {e}")
+            self._db = None
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def lookup_digest(self, key: StatKey) -> Optional[str]:
+        """根据File元Data查找sha256"""
+        digest = self.digests.get(key)
+        if digest is None and self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT sha256 FROM digests WHERE dev=? AND ino=? AND size=? AND mtime_ns=?",
+                    key
+                ).fetchone()
+            if row:
+                digest = row[0]
+                self.digests.put(key, digest)
+
+        self._count('digest_hits' if digest else 'digest_misses')
+        return digest
+
+    def store_digest(self, key: StatKey, sha256: str):
+        """记录File元Data到sha256的映射"""
+        self.digests.put(key, sha256)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO digests (dev, ino, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?)",
+                    (*key, sha256)
+                )
+                self._db.commit()
+
+    def get(self, sha256: str, model_version: str) -> Optional[Dict[str, Any]]:
+        """查找Cache的AnalysisResult"""
+        record = self.verdicts.get((sha256, model_version))
+        if record is not None:
+            self._count('memory_hits')
+            return record
+
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT record FROM verdicts WHERE sha256=? AND model_version=?",
+                    (sha256, model_version)
+                ).fetchone()
+            if row:
+                record = json.loads(row[0])
+                self.verdicts.put((sha256, model_version), record)
+                self._count('disk_hits')
+                return record
+
+        self._count('misses')
+        return None
+
+    def put(self, sha256: str, model_version: str, record: Dict[str, Any]):
+        """SaveAnalysisResult"""
+        # 经过一次JSON往返，保证Memory层和持久层返回的Content一致
+        encoded = json.dumps(record, default=_json_default)
+        self.verdicts.put((sha256, model_version), json.loads(encoded))
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO verdicts (sha256, model_version, record) VALUES (?, ?, ?)",
+                    (sha256, model_version, encoded)
+                )
+                self._db.commit()
+        self._count('stores')
+
+    def invalidate(self, model_version: Optional[str] = None):
+        """使Verdict失效，保留当前ModelVersion的Result (若指定)"""
+        self.verdicts.clear()
+        if self._db is not None:
+            with self._db_lock:
+                if model_version is None:
+                    self._db.execute("DELETE FROM verdicts")
+                else:
+                    self._db.execute("DELETE FROM verdicts WHERE model_version != ?", (model_version,))
+                self._db.commit()
+        self._count('invalidations')
+        logger.info(f"Analysis cache invalidated (model version: {model_version})")
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache命中Statistics"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        stats['memory_entries'] = len(self.verdicts)
+        stats['persistent'] = self.persistent
+        return stats
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Analysis执行层
+把File分析的CPU工作放到Thread池或Process池中运行，避免阻塞asyncio事件循环；
+用信号量限制同时运行的Analysis数，超过高水位时拒绝新Request
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 环境变量配置 (构造参数优先)
+MODE_ENV = 'HUNTERMATRIX_ANALYSIS_MODE'
+WORKERS_ENV = 'HUNTERMATRIX_ANALYSIS_WORKERS'
+MAX_IN_FLIGHT_ENV = 'HUNTERMATRIX_ANALYSIS_MAX_IN_FLIGHT'
+HIGH_WATER_MARK_ENV = 'HUNTERMATRIX_ANALYSIS_HIGH_WATER_MARK'
+
+EXECUTION_MODES = ('thread', 'process')
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={value!r}")
+        return None
+
+
+class AnalysisRejected(Exception):
+    """Analysis队列超过高水位，Request被拒绝"""
+
+    def __init__(self, status: Dict[str, Any]):
+        super().__init__(
+            f"Analysis queue is full ({status['pending']} pending, "
+            f"high water mark {status['high_water_mark']})"
+        )
+        self.status = status
+
+
+class AnalysisExecutor:
+    """有界并发的Analysis执行器
+
+    - max_in_flight: 同时在池中运行的Analysis数 (信号量)
+    - high_water_mark: 运行中 + 排队中的Analysis上限，超过时抛出 AnalysisRejected
+    Thread模式适合共享同一个检测器 (缓存、Model)；Process模式下调用的函数必须可pickle，
+    Worker通过initializer (只在Process模式下使用) 构建自己的检测器。
+    """
+
+    def __init__(self, mode: Optional[str] = None, max_workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, high_water_mark: Optional[int] = None,
+                 initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        self.mode = (mode or os.environ.get(MODE_ENV) or 'thread').lower()
+        if self.mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode {self.mode!r}, expected one of {EXECUTION_MODES}")
+
+        self.max_workers = max_workers or _env_int(WORKERS_ENV) or min(4, os.cpu_count() or 1)
+        self.max_in_flight = max_in_flight or _env_int(MAX_IN_FLIGHT_ENV) or self.max_workers
+        self.high_water_mark = high_water_mark or _env_int(HIGH_WATER_MARK_ENV) or self.max_in_flight * 8
+        self.initializer = initializer
+        self.initargs = initargs
+
+        self._pool: Optional[Executor] = None
+        self._pool_lock = threading.Lock()
+        # 信号量绑定到创建它的事件循环，因此按循环创建；以循环对象为弱引用键，
+        # 循环被回收后条目自动移除 (id可能被新循环复用)
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+        self._in_flight = 0
+        self._stats = {
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'peak_pending': 0,
+            'total_seconds': 0.0
+        }
+
+    @property
+    def pool(self) -> Executor:
+        """延迟Create池 (Process池的fork发生在第一次使用时)"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if self.mode == 'process':
+                        self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                         initializer=self.initializer,
+                                                         initargs=self.initargs)
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='analysis')
+        return self._pool
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_in_flight)
+        return semaphore
+
+    def _reject_if_full_locked(self):
+        if self._pending >= self.high_water_mark:
+            self._stats['rejected'] += 1
+            raise AnalysisRejected(self._status_locked())
+
+    def check_capacity(self):
+        """超过高水位时抛出 AnalysisRejected (不登记任务)"""
+        with self._stats_lock:
+            self._reject_if_full_locked()
+
+    def admit(self, reject: bool = True):
+        """登记一个待执行的Analysis，超过高水位时拒绝"""
+        with self._stats_lock:
+            if reject:
+                self._reject_if_full_locked()
+            self._pending += 1
+            self._stats['peak_pending'] = max(self._stats['peak_pending'], self._pending)
+
+    async def run(self, fn: Callable, *args, reject: bool = True) -> Any:
+        """在池中执行 fn(*args)
+
+        reject=False时超过高水位也只排队不拒绝 (用于批量Analysis内部的子任务)。
+        """
+        self.admit(reject)
+        start = time.perf_counter()
+        failed = False
+        try:
+            async with self._semaphore():
+                with self._stats_lock:
+                    self._in_flight += 1
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+                finally:
+                    with self._stats_lock:
+                        self._in_flight -= 1
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._stats_lock:
+                self._pending -= 1
+                self._stats['failed' if failed else 'completed'] += 1
+                self._stats['total_seconds'] += time.perf_counter() - start
+
+    def _status_locked(self) -> Dict[str, Any]:
+        finished = self._stats['completed'] + self._stats['failed']
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_in_flight': self.max_in_flight,
+            'high_water_mark': self.high_water_mark,
+            'pending': self._pending,
+            'in_flight': self._in_flight,
+            'queued': self._pending - self._in_flight,
+            'completed': self._stats['completed'],
+            'failed': self._stats['failed'],
+            'rejected': self._stats['rejected'],
+            'peak_pending': self._stats['peak_pending'],
+            'avg_seconds': self._stats['total_seconds'] / finished if finished else 0.0
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """执行器Status"""
+        with self._stats_lock:
+            return self._status_locked()
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
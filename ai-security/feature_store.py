@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+TrainingFeature存储
+按列保存Feature矩阵 (npz)，使不同超参数的重复Training无需重新提取Feature；
+FeatureShardStore把持续到达的新标注Sample按分片追加，供增量Training使用
+"""
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FEATURE_STORE_FORMAT = 1
+
+# 列名前缀
+COLUMN_PREFIX = 'feature__'
+
+# FeatureShardStore中分片File名前缀
+SHARD_PREFIX = 'shard-'
+
+
+@dataclass
+class FeatureSet:
+    """Feature矩阵、Tag和来源"""
+    X: np.ndarray
+    y: np.ndarray
+    paths: List[str]
+    feature_names: List[str]
+    failures: List[Tuple[str, str]] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.y)
+
+
+def save_feature_set(path: str, feature_set: FeatureSet) -> Path:
+    """按列保存Feature集"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    columns = {
+        f"{COLUMN_PREFIX}{name}": feature_set.X[:, index]
+        for index, name in enumerate(feature_set.feature_names)
+    }
+    failed_paths = [p for p, _ in feature_set.failures]
+    failed_errors = [e for _, e in feature_set.failures]
+
+    # 先写临时File再替换，避免中断时留下损坏的存储
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f,
+            format_version=np.array(FEATURE_STORE_FORMAT),
+            feature_names=np.array(feature_set.feature_names, dtype=str),
+            labels=feature_set.y,
+            paths=np.array(feature_set.paths, dtype=str),
+            failed_paths=np.array(failed_paths, dtype=str),
+            failed_errors=np.array(failed_errors, dtype=str),
+            **columns
+        )
+    tmp_path.replace(path)
+
+    logger.info(f"Saved {len(feature_set)} feature rows to {path}")
+    return path
+
+
+def load_feature_set(path: str, feature_names: List[str] = None) -> FeatureSet:
+    """Load特征集，可按指定列顺序重新Group装矩阵"""
+    with np.load(path, allow_pickle=False) as data:
+        if int(data['format_version']) != FEATURE_STORE_FORMAT:
+            raise ValueError(f"Unsupported feature store format: {int(data['format_version'])}")
+
+        stored_names = [str(name) for name in data['feature_names']]
+        names = list(feature_names) if feature_names is not None else stored_names
+        missing = [name for name in names if name not in stored_names]
+        if missing:
+            raise ValueError(f"Feature store {path} lacks columns {missing}; re-extract features")
+
+        labels = data['labels']
+        if names:
+            X = np.column_stack([data[f"{COLUMN_PREFIX}{name}"] for name in names])
+        else:
+            X = np.empty((len(labels), 0))
+
+        return FeatureSet(
+            X=X,
+            y=labels,
+            paths=[str(p) for p in data['paths']],
+            feature_names=names,
+            failures=list(zip([str(p) for p in data['failed_paths']],
+                              [str(e) for e in data['failed_errors']]))
+        )
+
+
+class FeatureShardStore:
+    """追加式Feature分片存储
+
+    每批新标注Sample写成一个分片 (格式同save_feature_set，File名按时间排序)，
+    分片写入后不再修改；哪些分片已经Training过由Model清单记录。
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def append(self, feature_set: FeatureSet) -> Path:
+        """追加一个分片"""
+        name = f"{SHARD_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.npz"
+        return save_feature_set(self.root / name, feature_set)
+
+    def shard_names(self) -> List[str]:
+        """所Has分片 (按写入时间排序)"""
+        if not self.root.is_dir():
+            return []
+        return sorted(path.name for path in self.root.glob(f"{SHARD_PREFIX}*.npz"))
+
+    def pending(self, consumed: Iterable[str]) -> List[str]:
+        """尚未Training过的分片"""
+        consumed = set(consumed)
+        return [name for name in self.shard_names() if name not in consumed]
+
+    def iter_shards(self, names: Iterable[str], feature_names: List[str] = None) -> Iterator[FeatureSet]:
+        """逐个LoadFeature分片，不一次性读入全部Data"""
+        for name in names:
+            yield load_feature_set(str(self.root / name), feature_names)
+
+    def load(self, names: Optional[Iterable[str]] = None, feature_names: List[str] = None) -> FeatureSet:
+        """把多个分片合并为一个Feature集 (names为None时Load全部分片)"""
+        names = self.shard_names() if names is None else list(names)
+        shards = list(self.iter_shards(names, feature_names))
+        if not shards:
+            columns = list(feature_names or [])
+            return FeatureSet(X=np.empty((0, len(columns))), y=np.empty(0), paths=[], feature_names=columns)
+
+        return FeatureSet(
+            X=np.vstack([shard.X for shard in shards]),
+            y=np.concatenate([shard.y for shard in shards]),
+            paths=[p for shard in shards for p in shard.paths],
+            feature_names=shards[0].feature_names,
+            failures=[failure for shard in shards for failure in shard.failures]
+        )
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+大File采样
+超过字节预算的File只ReadFile头、File尾和中间等距的若干块，Character串和熵值Feature
+在这些样本上计算 (延迟与File大小无关)；样本按熵值窗口对齐，窗口不会跨越样本边界
+"""
+
+import os
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from entropy_profile import DEFAULT_WINDOW
+
+# 采样预算和哈希模式环境变量
+SAMPLE_BUDGET_ENV = 'HUNTERMATRIX_SAMPLE_BUDGET'
+HASH_MODE_ENV = 'HUNTERMATRIX_HASH_MODE'
+
+# full: 完整哈希 (和采样Feature一起同步计算)；background: 后台Thread计算；off: 不计算
+HASH_MODES = ('full', 'background', 'off')
+
+# 中间部分每个样本块的大小上限
+MIDDLE_CHUNK_SIZE = 1024 * 1024
+
+# 在样本上计算的Feature (Character串总数按File大小外推)
+APPROXIMATE_FEATURES = (
+    'entropy', 'entropy_window_max', 'entropy_window_variance', 'high_entropy_ratio',
+    'string_count', 'avg_string_length', 'max_string_length', 'suspicious_string_count'
+)
+
+
+def env_sample_budget() -> Optional[int]:
+    value = os.environ.get(SAMPLE_BUDGET_ENV)
+    return int(value) if value else None
+
+
+def env_hash_mode() -> str:
+    return (os.environ.get(HASH_MODE_ENV) or 'full').lower()
+
+
+def _align_down(value: int, alignment: int = DEFAULT_WINDOW) -> int:
+    return value // alignment * alignment
+
+
+def sample_ranges(file_size: int, budget: Optional[int],
+                  middle_chunk_size: int = MIDDLE_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """返回要Read的 [start, end) 区间
+
+    File头和File尾各占预算的1/4，其余预算分成若干块均匀分布在中间；
+    File不超过预算时返回整个File。
+    """
+    if budget is None or file_size <= budget:
+        return [(0, file_size)]
+
+    edge = max(DEFAULT_WINDOW, _align_down(budget // 4))
+    middle_budget = max(0, budget - 2 * edge)
+    chunk = max(DEFAULT_WINDOW, _align_down(min(middle_chunk_size, middle_budget)))
+    count = middle_budget // chunk
+
+    ranges = [(0, edge)]
+    middle_start, middle_end = edge, file_size - edge
+    if count and middle_end - middle_start > chunk:
+        stride = (middle_end - middle_start) / count
+        for index in range(count):
+            start = _align_down(int(middle_start + index * stride + (stride - chunk) / 2))
+            start = min(max(start, ranges[-1][1]), middle_end - chunk)
+            if start >= ranges[-1][1]:
+                ranges.append((start, start + chunk))
+    ranges.append((max(file_size - edge, ranges[-1][1]), file_size))
+    return ranges
+
+
+def iter_range_chunks(f: BinaryIO, start: int, end: int, buffer: bytearray) -> Iterator[memoryview]:
+    """按buffer大小逐块Read [start, end) (返回的视图在下一次迭代时被覆盖)"""
+    view = memoryview(buffer)
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        size = f.readinto(view[:min(len(buffer), remaining)])
+        if not size:
+            break
+        remaining -= size
+        yield view[:size]
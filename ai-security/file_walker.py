@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Directory遍历和File类型嗅探
+用os.scandir遍历Directory树 (复用目录项中的stat信息)，按File头的魔数识别可执行File、
+脚本和文档，只把值得分析的File交给检测器，不对每个File运行libmagic
+"""
+
+import fnmatch
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 嗅探File类型时Read的File头大小
+SNIFF_BYTES = 4096
+
+# 魔数 -> File类型 (按顺序Match)
+FILE_SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b'MZ', 'pe'),
+    (b'\x7fELF', 'elf'),
+    (b'\xfe\xed\xfa\xce', 'macho'),
+    (b'\xfe\xed\xfa\xcf', 'macho'),
+    (b'\xce\xfa\xed\xfe', 'macho'),
+    (b'\xcf\xfa\xed\xfe', 'macho'),
+    (b'\xca\xfe\xba\xbe', 'macho'),
+    (b'#!', 'script'),
+    (b'%PDF', 'pdf'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole'),
+    (b'PK\x03\x04', 'zip'),
+    (b'Rar!\x1a\x07', 'rar'),
+    (b'7z\xbc\xaf\x27\x1c', '7z'),
+    (b'\x1f\x8b', 'gzip'),
+    (b'{\\rtf', 'rtf'),
+    (b'dex\n', 'dex'),
+)
+
+# 文本File中识别为脚本的标记 (在File头中查找，不区分大小写)
+SCRIPT_MARKERS = (
+    b'<script', b'powershell', b'wscript.', b'createobject(', b'<?php',
+    b'@echo off', b'invoke-expression', b'frombase64string'
+)
+
+# Default分析的File类型
+DEFAULT_KINDS = frozenset({'pe', 'elf', 'macho', 'script', 'pdf', 'ole', 'zip', 'rar', '7z', 'rtf', 'dex'})
+
+
+def sniff_file_kind(head: bytes) -> Optional[str]:
+    """根据File头识别File类型，无法识别时返回None"""
+    for signature, kind in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    lowered = head.lower()
+    if any(marker in lowered for marker in SCRIPT_MARKERS):
+        return 'script'
+    return None
+
+
+def read_head(path: str, size: int = SNIFF_BYTES) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read(size)
+
+
+@dataclass
+class TreeScanProgress:
+    """Directory树分析进度"""
+    root: str = ''
+    discovered: int = 0
+    skipped_pattern: int = 0
+    skipped_size: int = 0
+    skipped_type: int = 0
+    errors: int = 0
+    queued: int = 0
+    analyzed: int = 0
+    bytes_analyzed: int = 0
+    walk_complete: bool = False
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        progress = asdict(self)
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        progress['elapsed_seconds'] = elapsed
+        progress['files_per_second'] = self.analyzed / elapsed if elapsed > 0 else 0.0
+        return progress
+
+
+def _matches(rel_path: str, name: str, patterns: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def walk_files(root: str, include: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None,
+               max_size: Optional[int] = None, kinds: Optional[Iterable[str]] = DEFAULT_KINDS,
+               progress: Optional[TreeScanProgress] = None,
+               follow_symlinks: bool = False) -> Iterator[Tuple[str, int, Optional[str]]]:
+    """遍历Directory树，返回 (path, size, kind)
+
+    include/exclude是glob模式，同时Match相对路径和File名 (exclude也用于剪枝Directory)；
+    kinds为None时不做类型过滤，否则只返回File头Match这些类型的File。
+    """
+    include = list(include or [])
+    exclude = list(exclude or [])
+    kinds = frozenset(kinds) if kinds is not None else None
+    progress = progress if progress is not None else TreeScanProgress(root=root)
+
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                entries = list(entries)
+        except OSError as e:
+            logger.warning(f"Cannot scan directory {directory}: {e}")
+            progress.errors += 1
+            continue
+
+        for entry in entries:
+            rel_path = os.path.relpath(entry.path, root)
+            try:
+                if entry.is_dir(follow_symlinks=follow_symlinks):
+                    if not _matches(rel_path, entry.name, exclude):
+                        stack.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=follow_symlinks):
+                    continue
+
+                progress.discovered += 1
+                if (include and not _matches(rel_path, entry.name, include)) or _matches(rel_path, entry.name, exclude):
+                    progress.skipped_pattern += 1
+                    continue
+
+                size = entry.stat(follow_symlinks=follow_symlinks).st_size
+                if max_size is not None and size > max_size:
+                    progress.skipped_size += 1
+                    continue
+
+                kind = None
+                if kinds is not None:
+                    kind = sniff_file_kind(read_head(entry.path)) if size else None
+                    if kind not in kinds:
+                        progress.skipped_type += 1
+                        continue
+            except OSError as e:
+                logger.debug(f"Skipping {entry.path}: {e}")
+                progress.errors += 1
+                continue
+
+            yield entry.path, size, kind
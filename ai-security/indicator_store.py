@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+威胁情报指标Library
+把ThreatIntelligence记录按IOCType建立索引，查询代价只与IOC长度有关、与情报条数无关:
+- IP和CIDR: 路径压缩的二进制基数树 (IPv4/IPv6各一棵)，返回所有包含该地址的网段
+- 域名: 按反转标签组织的前缀树，情报中的域名同时覆盖其所Has子域名
+- 文件哈希: 小写哈希值 -> 情报的字典
+- 其他Type (URL、邮箱、File路径等): 按小写值精确匹配
+"""
+
+import ipaddress
+import logging
+import re
+import socket
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ioc_scanner import IOC_PATTERNS
+
+logger = logging.getLogger(__name__)
+
+# 情报源中的ioc_type -> 索引种类 (未列出的Type按值推断)
+INDICATOR_KINDS = {
+    'ip_address': 'ip', 'ip': 'ip', 'ipv4': 'ip', 'ipv6': 'ip', 'cidr': 'ip', 'ip_range': 'ip',
+    'domain': 'domain', 'hostname': 'domain', 'fqdn': 'domain',
+    'md5': 'hash', 'sha1': 'hash', 'sha256': 'hash', 'hash': 'hash', 'file_hash': 'hash',
+}
+
+HASH_LENGTHS = (32, 40, 64)
+
+_domain_regex = re.compile(IOC_PATTERNS['domain'], re.IGNORECASE)
+
+
+def parse_network(value: str) -> Optional[Tuple[int, int, int]]:
+    """IP或CIDR -> (地址位宽, 按前缀截断的网络地址整数, 前缀长度)，无法解析时返回None"""
+    address, _, prefix = value.partition('/')
+    for family, width in ((socket.AF_INET, 32), (socket.AF_INET6, 128)):
+        try:
+            key = int.from_bytes(socket.inet_pton(family, address), 'big')
+        except OSError:
+            continue
+        if not prefix:
+            return width, key, width
+        if prefix.isdigit() and int(prefix) <= width:
+            length = int(prefix)
+            return width, key >> (width - length) << (width - length), length
+        break
+    
+    # 掩码写法等少见Format
+    try:
+        network = ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return None
+    return network.max_prefixlen, int(network.network_address), network.prefixlen
+
+
+def indicator_kind(ioc_type: str, ioc_value: str) -> str:
+    """ip / domain / hash / exact"""
+    kind = INDICATOR_KINDS.get(ioc_type.lower())
+    if kind is not None:
+        return kind
+    # unknown等Type: 按值的形式推断
+    if parse_network(ioc_value) is not None:
+        return 'ip'
+    if len(ioc_value) in HASH_LENGTHS and all(char in '0123456789abcdefABCDEF' for char in ioc_value):
+        return 'hash'
+    if _domain_regex.fullmatch(ioc_value):
+        return 'domain'
+    return 'exact'
+
+
+class _RadixNode:
+    __slots__ = ('key', 'length', 'zero', 'one', 'values')
+
+    def __init__(self, key: int, length: int, values: Optional[List[Any]] = None):
+        self.key = key
+        self.length = length
+        self.zero = None
+        self.one = None
+        self.values = values
+
+
+class RadixTree:
+    """路径压缩的二进制基数树 (Patricia树)，键为 (网络地址整数, 前缀长度)
+
+    每个节点保存从根开始的完整前缀，子节点按前缀之后的第一位分支；
+    查找沿一条路径向下，最多访问width个节点。
+    """
+
+    def __init__(self, width: int):
+        self.width = width
+        self.root = _RadixNode(0, 0)
+        self.prefixes = 0
+
+    def _bit(self, key: int, position: int) -> int:
+        return (key >> (self.width - 1 - position)) & 1
+
+    def _set_child(self, node: _RadixNode, child: _RadixNode):
+        if self._bit(child.key, node.length):
+            node.one = child
+        else:
+            node.zero = child
+
+    def insert(self, key: int, length: int, value: Any):
+        """key必须已按length截断 (网络地址)"""
+        width = self.width
+        node = self.root
+        while node.length < length:
+            child = node.one if (key >> (width - 1 - node.length)) & 1 else node.zero
+            if child is None:
+                self._set_child(node, _RadixNode(key, length, [value]))
+                self.prefixes += 1
+                return
+
+            # child的前缀与key从最高位起相同的位数
+            limit = child.length if child.length < length else length
+            diff = (child.key ^ key) >> (width - limit)
+            if not diff and limit == child.length:
+                node = child
+                continue
+            common = limit - diff.bit_length()
+
+            # 在node和child之间插入新节点: 新前缀本身，或两者的公共前缀
+            if common == length:
+                middle = _RadixNode(key, length, [value])
+                self.prefixes += 1
+            else:
+                middle = _RadixNode(key >> (self.width - common) << (self.width - common), common)
+                self._set_child(middle, _RadixNode(key, length, [value]))
+                self.prefixes += 1
+            self._set_child(middle, child)
+            self._set_child(node, middle)
+            return
+
+        if node.values is None:
+            node.values = []
+            self.prefixes += 1
+        node.values.append(value)
+
+    def lookup(self, address: int) -> List[Any]:
+        """包含address的所Has前缀上的值，最长前缀在前"""
+        width = self.width
+        found = []
+        node = self.root
+        while node is not None:
+            length = node.length
+            if length and (node.key ^ address) >> (width - length):
+                break
+            if node.values:
+                found.append(node.values)
+            if length == width:
+                break
+            node = node.one if (address >> (width - 1 - length)) & 1 else node.zero
+        return [value for values in reversed(found) for value in values]
+
+
+class _TrieNode:
+    __slots__ = ('children', 'values')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.values: Optional[List[Any]] = None
+
+
+class DomainTrie:
+    """按反转标签 (com -> evil -> c2) 组织的域名前缀树"""
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.domains = 0
+
+    @staticmethod
+    def labels(domain: str) -> List[str]:
+        domain = domain.strip().lower().rstrip('.')
+        if domain.startswith('*.'):
+            domain = domain[2:]
+        return domain.split('.')[::-1] if domain else []
+
+    def insert(self, domain: str, value: Any) -> bool:
+        labels = self.labels(domain)
+        if not labels or not all(labels):
+            return False
+        node = self.root
+        for label in labels:
+            child = node.children.get(label)
+            if child is None:
+                child = node.children[label] = _TrieNode()
+            node = child
+        if node.values is None:
+            node.values = []
+            self.domains += 1
+        node.values.append(value)
+        return True
+
+    def lookup(self, domain: str) -> List[Any]:
+        """该域名及其各级父域名上的值，最具体的在前"""
+        found = []
+        node = self.root
+        for label in self.labels(domain):
+            node = node.children.get(label)
+            if node is None:
+                break
+            if node.values:
+                found.append(node.values)
+        return [value for values in reversed(found) for value in values]
+
+
+class IndicatorStore:
+    """威胁情报指标Library
+
+    bulk_load一次加载整个情报源 (ThreatIntelligence记录)；match_iocs为IOCExtractor的
+    提取结果逐个查询命中的情报。写入加锁，查询不加锁。
+    """
+
+    def __init__(self):
+        self.ipv4 = RadixTree(32)
+        self.ipv6 = RadixTree(128)
+        self.domains = DomainTrie()
+        self.hashes: Dict[str, List[Any]] = {}
+        self.exact: Dict[str, List[Any]] = {}
+        self.indicators = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def add(self, intel) -> bool:
+        """加载单条情报，无法解析的值返回False"""
+        with self._lock:
+            return self._add_locked(intel)
+
+    def bulk_load(self, intel_records: Iterable) -> int:
+        """加载多条情报，返回成功加载的条数"""
+        loaded = 0
+        with self._lock:
+            for intel in intel_records:
+                loaded += self._add_locked(intel)
+        logger.info(f"Loaded {loaded} threat intelligence indicators ({self.indicators} total)")
+        return loaded
+
+    def _add_locked(self, intel) -> bool:
+        value = (intel.ioc_value or '').strip()
+        added = False
+        if value:
+            kind = indicator_kind(intel.ioc_type, value)
+            if kind == 'ip':
+                network = parse_network(value)
+                if network is not None:
+                    width, key, length = network
+                    (self.ipv4 if width == 32 else self.ipv6).insert(key, length, intel)
+                    added = True
+            elif kind == 'domain':
+                added = self.domains.insert(value, intel)
+            else:
+                table = self.hashes if kind == 'hash' else self.exact
+                table.setdefault(value.lower(), []).append(intel)
+                added = True
+
+        if added:
+            self.indicators += 1
+        else:
+            self.rejected += 1
+            logger.debug(f"Rejected threat intelligence indicator {intel.ioc_type}={intel.ioc_value!r}")
+        return added
+
+    def lookup(self, ioc_type: str, ioc_value: str) -> List[Any]:
+        """命中该IOC的所Has情报 (IP按最长网段、域名按最具体的域名在前)"""
+        kind = INDICATOR_KINDS.get(ioc_type, 'exact')
+        if kind == 'ip':
+            network = parse_network(ioc_value)
+            if network is None:
+                return []
+            width, address, length = network
+            if length != width:
+                # 日志中的IOC是单个地址，不查网段
+                return []
+            return (self.ipv4 if width == 32 else self.ipv6).lookup(address)
+        if kind == 'domain':
+            return self.domains.lookup(ioc_value)
+        table = self.hashes if kind == 'hash' else self.exact
+        return list(table.get(ioc_value.lower(), ()))
+
+    def match_iocs(self, iocs: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        """为提取出的IOC ({Type: [值]}) 标注命中的情报"""
+        if not self.indicators:
+            return []
+        hits = []
+        for ioc_type, values in iocs.items():
+            for value in values:
+                for intel in self.lookup(ioc_type, value):
+                    hits.append({
+                        'ioc': value,
+                        'ioc_type': ioc_type,
+                        'indicator': intel.ioc_value,
+                        'threat_type': intel.threat_type,
+                        'severity': intel.severity,
+                        'confidence': intel.confidence,
+                        'source': intel.source
+                    })
+        return hits
+
+    def stats(self) -> Dict[str, Any]:
+        """各索引的条目数"""
+        return {
+            'indicators': self.indicators,
+            'rejected': self.rejected,
+            'ipv4_prefixes': self.ipv4.prefixes,
+            'ipv6_prefixes': self.ipv6.prefixes,
+            'domains': self.domains.domains,
+            'hashes': len(self.hashes),
+            'exact': len(self.exact)
+        }
+
+    def __len__(self):
+        return self.indicators
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+动态批处理Inference调度器
+多个协程/Thread各自提交单条输入，调度器把同时到达的Request合并成批次 (最多max_batch_size条，
+或最早一条等待超过max_wait_ms)，在Worker线程上对整个批次调用一次Model，再把结果分发回
+各调用方的Future
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 5.0
+
+
+class InferenceScheduler:
+    """把单条推理Request合并成批次的调度器
+
+    - model_fn: 接收输入列Table、返回等长结果列Table的批量推理函数
+    - max_batch_size: 每次调用model_fn的条数上限
+    - max_wait_ms: 队列中最早的Request最多等待多久就提交 (不满一批也提交)
+    Worker线程在第一次提交时启动；model_fn抛出的Exception传给该批次的所HasFuture。
+    """
+
+    def __init__(self, name: str, model_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self.name = name
+        self.model_fn = model_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        # (输入, Future, 入队时间)
+        self._pending: Deque[Tuple[Any, Future, float]] = deque()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stopped = False
+
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'batches': 0,
+            'max_queue_depth': 0,
+            'wait_seconds': 0.0,
+            'inference_seconds': 0.0
+        }
+        self._batch_sizes: Dict[int, int] = {}
+
+    def submit(self, item: Any) -> Future:
+        """提交单条输入 (线程安全)，返回结果的Future"""
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items: Sequence[Any]) -> List[Future]:
+        """一次提交多条输入，每条一个Future (可能被拆到多个批次)"""
+        futures = [Future() for _ in items]
+        now = time.monotonic()
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError(f"Inference scheduler {self.name} is stopped")
+            self._pending.extend((item, future, now) for item, future in zip(items, futures))
+            self._stats['submitted'] += len(futures)
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], len(self._pending))
+            self._ensure_worker()
+            self._condition.notify()
+        return futures
+
+    def run(self, items: Sequence[Any], timeout: Optional[float] = None) -> List[Any]:
+        """阻塞等待一组输入的结果 (在Worker或执行器线程中使用)"""
+        return [future.result(timeout) for future in self.submit_many(items)]
+
+    async def infer(self, item: Any) -> Any:
+        """在协程中等待单条输入的结果，不阻塞事件循环"""
+        return await asyncio.wrap_future(self.submit(item))
+
+    async def infer_many(self, items: Sequence[Any]) -> List[Any]:
+        return list(await asyncio.gather(*(asyncio.wrap_future(future) for future in self.submit_many(items))))
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name=f"inference-{self.name}", daemon=True
+            )
+            self._worker.start()
+
+    def _next_batch(self) -> Optional[List[Tuple[Any, Future, float]]]:
+        """等待凑满一批或最早的Request到期；停止且队列为空时返回None"""
+        with self._condition:
+            while not self._pending:
+                if self._stopped:
+                    return None
+                self._condition.wait()
+
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            size = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            # 跳过已被调用方取消的Request
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch: List[Tuple[Any, Future, float]]):
+        started = time.monotonic()
+        try:
+            results = self.model_fn([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"{self.name} returned {len(results)} results for a batch of {len(batch)}"
+                )
+            error = None
+        except Exception as e:
+            logger.warning(f"Batched inference failed for {self.name} ({len(batch)} items): {e}")
+            error = e
+        finished = time.monotonic()
+
+        with self._condition:
+            self._stats['batches'] += 1
+            self._stats['completed' if error is None else 'failed'] += len(batch)
+            self._stats['wait_seconds'] += sum(started - queued_at for _, _, queued_at in batch)
+            self._stats['inference_seconds'] += finished - started
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+
+        for index, (_, future, _) in enumerate(batch):
+            if error is None:
+                future.set_result(results[index])
+            else:
+                future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        """队列深度和批次大小Statistics"""
+        with self._condition:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._pending)
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+
+        batches = stats['batches']
+        items = stats['completed'] + stats['failed']
+        stats.update({
+            'name': self.name,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'avg_batch_size': items / batches if batches else 0.0,
+            'largest_batch': max(batch_sizes, default=0),
+            'batch_sizes': batch_sizes,
+            'avg_wait_ms': stats.pop('wait_seconds') * 1000 / items if items else 0.0,
+            'avg_inference_ms': stats.pop('inference_seconds') * 1000 / batches if batches else 0.0
+        })
+        return stats
+
+    def stop(self, wait: bool = True):
+        """停止接收新Request；已排队的Request处理完后Worker退出"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            worker = self._worker
+        if wait and worker is not None:
+            worker.join()
@@ -5,37 +5,54 @@ Smart威胁Detection引擎
 """
 
 import asyncio
+import copy
 import numpy as np
-import pandas as pd
-import joblib
 import hashlib
 import magic
 import pefile
 import yara
 import os
 import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, asdict
 from pathlib import Path
 
-# Machine LearningLibrary
-from sklearn.ensemble import RandomForestClassifier, IsolationForest
-from sklearn.svm import OneClassSVM
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix
-import xgboost as xgb
+from analysis_cache import AnalysisCache, StatKey, stat_key
+from analysis_executor import AnalysisExecutor
+from detection_cascade import CascadeContext, DetectionCascade, StageVerdict
+from entropy_profile import HIGH_ENTROPY_THRESHOLD, EntropyProfile, entropy_profile
+from feature_store import FeatureSet, FeatureShardStore, load_feature_set, save_feature_set
+from file_sampling import (APPROXIMATE_FEATURES, HASH_MODES, env_hash_mode, env_sample_budget,
+                           iter_range_chunks, sample_ranges)
+from file_walker import DEFAULT_KINDS, SNIFF_BYTES, TreeScanProgress, sniff_file_kind, walk_files
+from lazy_loader import lazy_import, module_available
+from model_registry import ModelRegistry, new_version_id
+from pattern_matcher import MultiPatternMatcher
+from similarity_index import FuzzyHashAccumulator, env_fuzzy_hash_features, fuzzy_hashes, get_similarity_index
+from string_scanner import StringScanAccumulator, scan_printable_strings
+from tree_inference import compile_models, load_compiled_models, save_compiled_models
+from yara_rules import get_ruleset_manager
+
+# Machine LearningLibrary (延迟导入: 只在Training或加载未编译的Model时才需要)
+pd = lazy_import('pandas')
+joblib = lazy_import('joblib')
+ensemble = lazy_import('sklearn.ensemble')
+preprocessing = lazy_import('sklearn.preprocessing')
+model_selection = lazy_import('sklearn.model_selection')
+xgb = lazy_import('xgboost')
 
 # Depth学习Library
-try:
-    import torch
-    import torch.nn as nn
-    import torch.nn.functional as F
-    from transformers import AutoTokenizer, AutoModel
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
+torch = lazy_import('torch')
+nn = lazy_import('torch.nn')
+F = lazy_import('torch.nn.functional')
+transformers = lazy_import('transformers')
+TORCH_AVAILABLE = module_available('torch') and module_available('transformers')
+if not TORCH_AVAILABLE:
     logging.warning("PyTorch not available, deep learning features disabled")
 
 # Configure logging
@@ -55,39 +72,301 @@ class ThreatAnalysis:
     features: Dict[str, Any] = None
     recommendations: List[str] = None
     analysis_time: datetime = None
+    verdict_stage: str = 'ml'
+
+def analysis_to_record(analysis: ThreatAnalysis) -> Dict[str, Any]:
+    """将AnalysisResult转换为可Cache的记录"""
+    record = asdict(analysis)
+    record['analysis_time'] = analysis.analysis_time.isoformat() if analysis.analysis_time else None
+    return record
+
+def analysis_from_record(record: Dict[str, Any], file_path: str,
+                         analysis_time: Optional[datetime] = None) -> ThreatAnalysis:
+    """从Cache记录还原AnalysisResult"""
+    record = dict(record)
+    record['file_path'] = file_path
+    record['analysis_time'] = analysis_time or (
+        datetime.fromisoformat(record['analysis_time']) if record.get('analysis_time') else None
+    )
+    return ThreatAnalysis(**record)
+
+# 可疑API模式
+SUSPICIOUS_API_PATTERNS = [
+    'CreateRemoteThread', 'VirtualAllocEx', 'WriteProcessMemory',
+    'SetWindowsHookEx', 'GetProcAddress', 'LoadLibrary',
+    'RegSetValueEx', 'CreateFile', 'InternetOpen'
+]
+
+# PEFeature需要解析的Data目录 (资源、重定位、调试Information等目录跳过)
+PE_FEATURE_DIRECTORIES = [
+    pefile.DIRECTORY_ENTRY['IMAGE_DIRECTORY_ENTRY_IMPORT'],
+    pefile.DIRECTORY_ENTRY['IMAGE_DIRECTORY_ENTRY_EXPORT']
+]
 
 class FileFeatureExtractor:
     """FileFeature提取器"""
     
-    def __init__(self):
-        self.magic = magic.Magic()
-        self.yara_rules = self.load_yara_rules()
+    def __init__(self, string_scan_budget: Optional[int] = None,
+                 suspicious_patterns: Optional[List[str]] = None,
+                 stream_threshold: Optional[int] = 64 * 1024 * 1024,
+                 chunk_size: int = 1024 * 1024,
+                 yara_rules_path: Optional[str] = None,
+                 similarity_index_path: Optional[str] = None,
+                 pe_name_lists: bool = False,
+                 sample_budget: Optional[int] = None,
+                 hash_mode: Optional[str] = None,
+                 fuzzy_hash_features: Optional[bool] = None):
+        # libmagic句柄不是线程Security的，每个Thread持HasOwn的句柄
+        self._local = threading.local()
+        
+        # 进程内共享的YARARules集 (同一路径只编译一次，Rules变化时原子替换)
+        self.yara_manager = get_ruleset_manager(yara_rules_path)
+        
+        # 进程内共享的Already知恶意Sample模糊哈希Index
+        self.similarity_index = get_similarity_index(similarity_index_path)
+        
+        # 可疑Character串Match器 (构建一次，单次扫描统计)
+        self.suspicious_matcher = MultiPatternMatcher({
+            'suspicious_api': suspicious_patterns or SUSPICIOUS_API_PATTERNS
+        })
+        
+        # Character串扫描的字节预算 (None表示扫描整个File)
+        self.string_scan_budget = string_scan_budget
+        
+        # 超过阈值的File按块流式Process，Memory占用与File大小无关 (None表示从不流式)
+        self.stream_threshold = stream_threshold
+        self.chunk_size = chunk_size
+        
+        # 是否在Feature中保留导入/导出名称列Table (评分只需要计数和imphash)
+        self.pe_name_lists = pe_name_lists
+        
+        # 是否总是输出ssdeep/TLSH摘要；否则只在相似度索引非Null时计算查询用的ssdeep
+        self.fuzzy_hash_features = (fuzzy_hash_features if fuzzy_hash_features is not None
+                                    else env_fuzzy_hash_features())
+        
+        # 超过采样预算的File只Read头、尾和中间的样本 (None表示总是Read整个File)；
+        # 这类File的完整哈希按hash_mode同步计算、在后台计算或不计算
+        self.sample_budget = sample_budget if sample_budget is not None else env_sample_budget()
+        self.hash_mode = (hash_mode or env_hash_mode()).lower()
+        if self.hash_mode not in HASH_MODES:
+            raise ValueError(f"Unknown hash mode {self.hash_mode!r}, expected one of {HASH_MODES}")
+        self.hash_listeners: List[Callable[[str, os.stat_result, Dict[str, str]], None]] = []
+        self._hash_executor: Optional[ThreadPoolExecutor] = None
+        self._hash_executor_lock = threading.Lock()
+    
+    @property
+    def magic(self) -> magic.Magic:
+        """当前Thread的libmagic句柄"""
+        handle = getattr(self._local, 'magic', None)
+        if handle is None:
+            handle = self._local.magic = magic.Magic()
+        return handle
+    
+    @property
+    def yara_rules(self) -> Optional[yara.Rules]:
+        """当前YARARules集"""
+        return self.yara_manager.rules
+    
+    def read_file(self, file_path: str) -> bytes:
+        """ReadFileContent (每个File只Read一次)"""
+        with open(file_path, 'rb') as f:
+            return f.read()
+    
+    def should_stream(self, file_size: int) -> bool:
+        """是否对该大小的File使用流式Process"""
+        return self.stream_threshold is not None and file_size > self.stream_threshold
+    
+    def should_sample(self, file_size: int) -> bool:
+        """是否只ReadFile的样本 (超过采样预算)"""
+        return self.sample_budget is not None and file_size > self.sample_budget
+    
+    def is_large_file(self, file_size: int) -> bool:
+        """不整体读入Memory的File (流式或采样Process)"""
+        return self.should_stream(file_size) or self.should_sample(file_size)
     
-    def load_yara_rules(self) -> Optional[yara.Rules]:
-        """LoadYARARules"""
+    def add_hash_listener(self, listener: Callable[[str, os.stat_result, Dict[str, str]], None]):
+        """注册后台哈希完成回调 (file_path, 计算哈希前的stat, 哈希)"""
+        self.hash_listeners.append(listener)
+    
+    def fuzzy_hash_kinds(self) -> Tuple[bool, bool]:
+        """需要计算的模糊哈希 (ssdeep, TLSH)"""
+        return self.fuzzy_hash_features or self.similarity_index.available, self.fuzzy_hash_features
+    
+    def hash_file(self, file_path: str) -> Dict[str, str]:
+        """流式计算完整File的md5/sha1/sha256和模糊哈希"""
+        hashes = {'md5': hashlib.md5(), 'sha1': hashlib.sha1(), 'sha256': hashlib.sha256()}
+        fuzzy = FuzzyHashAccumulator(*self.fuzzy_hash_kinds())
+        buffer = bytearray(self.chunk_size)
+        with open(file_path, 'rb') as f:
+            for chunk in iter_range_chunks(f, 0, os.fstat(f.fileno()).st_size, buffer):
+                for digest in hashes.values():
+                    digest.update(chunk)
+                if fuzzy.active:
+                    fuzzy.update(bytes(chunk))
+        digests = {name: digest.hexdigest() for name, digest in hashes.items()}
+        digests.update(fuzzy.digests())
+        return digests
+    
+    def hash_in_background(self, file_path: str, stat: os.stat_result) -> Future:
+        """在后台Thread计算完整哈希，完成后通知hash_listeners"""
+        with self._hash_executor_lock:
+            if self._hash_executor is None:
+                self._hash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='file-hash')
+        
+        def run() -> Dict[str, str]:
+            digests = self.hash_file(file_path)
+            for listener in self.hash_listeners:
+                try:
+                    listener(file_path, stat, digests)
+                except Exception as e:
+                    logger.warning(f"Hash listener failed: {e}")
+            return digests
+        
+        future = self._hash_executor.submit(run)
+        future.add_done_callback(
+            lambda done: done.exception() and logger.warning(f"Background hashing of {file_path} failed: {done.exception()}")
+        )
+        return future
+    
+    def extract_sampled_features(self, file_path: str) -> Dict[str, Any]:
+        """按采样预算提取基础Feature
+
+        熵值和Character串统计在File头、File尾和中间等距样本上计算，Character串总数按
+        File大小外推 (可疑Character串集中在头部的导入表和Resource中，只统计样本内的)；
+        这些Feature记录在approximate_features中。完整哈希按hash_mode处理。
+        """
+        features = {}
+        
         try:
-            # 这里应该Load实际的YARARulesFile
-            # 为了Demo，我们Create一个简单的Rules
-            rule_text = '''
-            rule SuspiciousStrings {
-                strings:
-                    $s1 = "CreateRemoteThread"
-                    $s2 = "VirtualAllocEx"
-                    $s3 = "WriteProcessMemory"
-                    $s4 = "SetWindowsHookEx"
-                meta:
-                    description = "Suspicious API calls"
-                condition:
-                    any of them
-            }
-            '''
-            return yara.compile(source=rule_text)
+            stat = os.stat(file_path)
+            size = stat.st_size
+            features['file_size'] = size
+            features['creation_time'] = stat.st_ctime
+            features['modification_time'] = stat.st_mtime
+            features['file_extension'] = Path(file_path).suffix.lower()
+            
+            profile = EntropyProfile()
+            byte_counts = np.zeros(256, dtype=np.int64)
+            string_count = 0
+            string_length = 0
+            max_string_length = 0
+            suspicious_count = 0
+            sampled = 0
+            
+            buffer = bytearray(self.chunk_size)
+            with open(file_path, 'rb') as f:
+                features['file_type'] = self.magic.from_buffer(f.read(SNIFF_BYTES))
+                f.seek(0)
+                features['file_kind'] = sniff_file_kind(f.read(SNIFF_BYTES))
+                
+                for start, end in sample_ranges(size, self.sample_budget):
+                    # 每个样本单独扫描Character串，不把不相邻的样本拼接成一个Character串
+                    strings = StringScanAccumulator()
+                    for chunk in iter_range_chunks(f, start, end, buffer):
+                        sampled += len(chunk)
+                        byte_counts += np.bincount(np.frombuffer(chunk, dtype=np.uint8), minlength=256)
+                        profile.feed(chunk)
+                        suspicious_count += self.count_suspicious_strings(strings.feed(chunk))
+                    suspicious_count += self.count_suspicious_strings(strings.finish())
+                    string_count += strings.count
+                    string_length += strings.total_length
+                    max_string_length = max(max_string_length, strings.max_length)
+            
+            scale = size / sampled if sampled else 1.0
+            features['entropy'] = self.entropy_from_counts(byte_counts, sampled)
+            features.update(profile.finish())
+            features['entropy_window_count'] = -(-size // profile.window)
+            features['string_count'] = int(round(string_count * scale))
+            features['avg_string_length'] = string_length / string_count if string_count else 0
+            features['max_string_length'] = max_string_length
+            features['suspicious_string_count'] = suspicious_count
+            features['sampled_bytes'] = sampled
+            
+            approximate = list(APPROXIMATE_FEATURES)
+            features['hash_mode'] = self.hash_mode
+            if self.hash_mode == 'full':
+                features.update(self.hash_file(file_path))
+            else:
+                # 没有模糊哈希时相似度Feature为0
+                approximate.append('similarity_score')
+                if self.hash_mode == 'background':
+                    self.hash_in_background(file_path, stat)
+            features['approximate_features'] = approximate
+            
         except Exception as e:
-            logger.warning(f"Failed to load YARA rules: {e}")
-            return None
+            logger.error(f"Error extracting sampled features from {file_path}: {e}")
+        
+        return features
+    
+    def extract_streaming_features(self, file_path: str) -> Dict[str, Any]:
+        """流式提取基础Feature
+
+        按块Read，单次遍历同时Update三个哈希对象、字节直方图和Character串统计，
+        熵值由累计的直方图计算。
+        """
+        features = {}
+        
+        try:
+            stat = os.stat(file_path)
+            features['file_size'] = stat.st_size
+            features['creation_time'] = stat.st_ctime
+            features['modification_time'] = stat.st_mtime
+            features['file_extension'] = Path(file_path).suffix.lower()
+            
+            hashes = {'md5': hashlib.md5(), 'sha1': hashlib.sha1(), 'sha256': hashlib.sha256()}
+            fuzzy = FuzzyHashAccumulator(*self.fuzzy_hash_kinds())
+            profile = EntropyProfile()
+            byte_counts = np.zeros(256, dtype=np.int64)
+            strings = StringScanAccumulator(max_bytes=self.string_scan_budget)
+            suspicious_count = 0
+            total = 0
+            
+            buffer = bytearray(self.chunk_size)
+            view = memoryview(buffer)
+            with open(file_path, 'rb') as f:
+                while True:
+                    size = f.readinto(buffer)
+                    if not size:
+                        break
+                    chunk = view[:size]
+                    
+                    if total == 0:
+                        # FileType只需要File头
+                        features['file_type'] = self.magic.from_buffer(bytes(chunk))
+                        features['file_kind'] = sniff_file_kind(bytes(chunk[:SNIFF_BYTES]))
+                    total += size
+                    
+                    for digest in hashes.values():
+                        digest.update(chunk)
+                    if fuzzy.active:
+                        fuzzy.update(bytes(chunk))
+                    byte_counts += np.bincount(np.frombuffer(chunk, dtype=np.uint8), minlength=256)
+                    profile.feed(chunk)
+                    suspicious_count += self.count_suspicious_strings(strings.feed(chunk))
+            
+            suspicious_count += self.count_suspicious_strings(strings.finish())
+            
+            for name, digest in hashes.items():
+                features[name] = digest.hexdigest()
+            features.update(fuzzy.digests())
+            features['entropy'] = self.entropy_from_counts(byte_counts, total)
+            features.update(profile.finish())
+            
+            features['string_count'] = strings.count
+            features['avg_string_length'] = strings.mean_length
+            features['max_string_length'] = strings.max_length
+            features['suspicious_string_count'] = suspicious_count
+            if strings.truncated:
+                features['string_scan_truncated'] = True
+            
+        except Exception as e:
+            logger.error(f"Error extracting streaming features from {file_path}: {e}")
+        
+        return features
     
-    def extract_basic_features(self, file_path: str) -> Dict[str, Any]:
-        """提取基础FileFeature"""
+    def extract_basic_features(self, file_path: str, content: Optional[bytes] = None,
+                               sha256: Optional[str] = None) -> Dict[str, Any]:
+        """提取基础FileFeature (sha256Already计算时直接复用)"""
         features = {}
         
         try:
@@ -97,21 +376,24 @@ class FileFeatureExtractor:
             features['creation_time'] = stat.st_ctime
             features['modification_time'] = stat.st_mtime
             
-            # FileType
-            features['file_type'] = self.magic.from_file(file_path)
+            if content is None:
+                content = self.read_file(file_path)
+            
+            # FileType (libmagic描述和魔数识别的类型)
+            features['file_type'] = self.magic.from_buffer(content)
+            features['file_kind'] = sniff_file_kind(content[:SNIFF_BYTES])
             
             # File扩展名
             features['file_extension'] = Path(file_path).suffix.lower()
             
             # File哈希
-            with open(file_path, 'rb') as f:
-                content = f.read()
-                features['md5'] = hashlib.md5(content).hexdigest()
-                features['sha1'] = hashlib.sha1(content).hexdigest()
-                features['sha256'] = hashlib.sha256(content).hexdigest()
+            features['md5'] = hashlib.md5(content).hexdigest()
+            features['sha1'] = hashlib.sha1(content).hexdigest()
+            features['sha256'] = sha256 or hashlib.sha256(content).hexdigest()
             
-            # File熵值 (随机性度量)
+            # File熵值 (随机性度量)，以及窗口熵剖面 (局部的加壳/加密Data)
             features['entropy'] = self.calculate_entropy(content)
+            features.update(entropy_profile(content))
             
             # Character串Feature
             features.update(self.extract_string_features(content))
@@ -121,12 +403,20 @@ class FileFeatureExtractor:
             
         return features
     
-    def extract_pe_features(self, file_path: str) -> Dict[str, Any]:
-        """提取PEFileFeature"""
+    def extract_pe_features(self, file_path: str, content: Optional[bytes] = None) -> Dict[str, Any]:
+        """提取PEFileFeature
+
+        复用AlreadyRead的Content (大File时由pefile直接映射File)，fast_load只解析头和节表，
+        之后只解析Feature需要的导入/导出目录。
+        """
         features = {}
         
         try:
-            pe = pefile.PE(file_path)
+            if content is not None:
+                pe = pefile.PE(data=content, fast_load=True)
+            else:
+                pe = pefile.PE(file_path, fast_load=True)
+            pe.parse_data_directories(directories=PE_FEATURE_DIRECTORIES)
             
             # PE头Information
             features['pe_machine'] = pe.FILE_HEADER.Machine
@@ -139,27 +429,41 @@ class FileFeatureExtractor:
             features['pe_size_of_code'] = pe.OPTIONAL_HEADER.SizeOfCode
             features['pe_size_of_initialized_data'] = pe.OPTIONAL_HEADER.SizeOfInitializedData
             
-            # ImportTable
+            # 各节熵值 (加壳的节在整体熵值正常的File中也很突出)
+            section_entropy = {}
+            for section in pe.sections:
+                name = section.Name.rstrip(b'\x00').decode('utf-8', errors='ignore')
+                section_entropy[name] = self.calculate_entropy(section.get_data())
+            features['pe_section_entropy'] = section_entropy
+            features['pe_max_section_entropy'] = max(section_entropy.values(), default=0.0)
+            features['pe_high_entropy_sections'] = sum(
+                1 for value in section_entropy.values() if value > HIGH_ENTROPY_THRESHOLD
+            )
+            
+            # ImportTable (计数 = DLL数 + 按名称导入的函数数)
             if hasattr(pe, 'DIRECTORY_ENTRY_IMPORT'):
-                imports = []
-                for entry in pe.DIRECTORY_ENTRY_IMPORT:
-                    dll_name = entry.dll.decode('utf-8', errors='ignore')
-                    imports.append(dll_name)
-                    for imp in entry.imports:
-                        if imp.name:
-                            imports.append(imp.name.decode('utf-8', errors='ignore'))
+                entries = pe.DIRECTORY_ENTRY_IMPORT
+                named_imports = sum(1 for entry in entries for imp in entry.imports if imp.name)
+                features['pe_import_dll_count'] = len(entries)
+                features['pe_import_count'] = len(entries) + named_imports
+                features['pe_imphash'] = pe.get_imphash()
                 
-                features['pe_imports'] = imports
-                features['pe_import_count'] = len(imports)
+                if self.pe_name_lists:
+                    imports = []
+                    for entry in entries:
+                        imports.append(entry.dll.decode('utf-8', errors='ignore'))
+                        imports.extend(imp.name.decode('utf-8', errors='ignore')
+                                       for imp in entry.imports if imp.name)
+                    features['pe_imports'] = imports
             
             # ExportTable
             if hasattr(pe, 'DIRECTORY_ENTRY_EXPORT'):
-                exports = []
-                for exp in pe.DIRECTORY_ENTRY_EXPORT.symbols:
-                    if exp.name:
-                        exports.append(exp.name.decode('utf-8', errors='ignore'))
-                features['pe_exports'] = exports
-                features['pe_export_count'] = len(exports)
+                symbols = pe.DIRECTORY_ENTRY_EXPORT.symbols
+                features['pe_export_count'] = sum(1 for exp in symbols if exp.name)
+                
+                if self.pe_name_lists:
+                    features['pe_exports'] = [exp.name.decode('utf-8', errors='ignore')
+                                              for exp in symbols if exp.name]
             
             pe.close()
             
@@ -168,74 +472,92 @@ class FileFeatureExtractor:
             
         return features
     
-    def extract_yara_features(self, file_path: str) -> Dict[str, Any]:
+    def extract_yara_features(self, file_path: str, content: Optional[bytes] = None) -> Dict[str, Any]:
         """提取YARAMatchFeature"""
         features = {}
         
         if self.yara_rules:
             try:
-                matches = self.yara_rules.match(file_path)
+                if content is not None:
+                    matches = self.yara_rules.match(data=content)
+                else:
+                    matches = self.yara_rules.match(file_path)
                 features['yara_matches'] = [match.rule for match in matches]
                 features['yara_match_count'] = len(matches)
+                # Rules元Data (verdict等) 供检测级联使用
+                features['yara_meta'] = {match.rule: dict(match.meta) for match in matches}
             except Exception as e:
                 logger.warning(f"YARA matching failed for {file_path}: {e}")
                 features['yara_matches'] = []
                 features['yara_match_count'] = 0
+                features['yara_meta'] = {}
         else:
             features['yara_matches'] = []
             features['yara_match_count'] = 0
+            features['yara_meta'] = {}
             
         return features
     
+    def extract_similarity_features(self, content: Optional[bytes] = None,
+                                    digests: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """模糊哈希 (ssdeep/TLSH) 和最相似的Already知恶意Sample家族
+
+        相似度索引为Null且未要求摘要Feature时不计算模糊哈希。
+        """
+        if digests is not None:
+            features = dict(digests)
+        else:
+            use_ssdeep, use_tlsh = self.fuzzy_hash_kinds()
+            features = fuzzy_hashes(content, use_ssdeep, use_tlsh) if use_ssdeep or use_tlsh else {}
+        
+        matches = self.similarity_index.query(features['ssdeep']) if 'ssdeep' in features else []
+        features['similar_families'] = [asdict(match) for match in matches]
+        features['similarity_score'] = matches[0].score / 100 if matches else 0.0
+        features['similar_family'] = matches[0].family if matches else None
+        
+        return features
+    
     def calculate_entropy(self, data: bytes) -> float:
         """CalculateData熵值"""
         if not data:
             return 0.0
         
         # Calculate字节频率
-        byte_counts = np.bincount(data, minlength=256)
-        probabilities = byte_counts / len(data)
+        byte_counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+        return self.entropy_from_counts(byte_counts, len(data))
+    
+    def entropy_from_counts(self, byte_counts: np.ndarray, total: int) -> float:
+        """由字节直方图Calculate熵"""
+        if not total:
+            return 0.0
         
-        # Calculate熵
+        probabilities = byte_counts / total
         entropy = -np.sum(probabilities * np.log2(probabilities + 1e-10))
         return entropy
     
+    def count_suspicious_strings(self, strings: List[str]) -> int:
+        """统计Character串中出现的可疑模式 (每个Character串中不同模式数之和)"""
+        if not strings:
+            return 0
+        return self.suspicious_matcher.count_segment_matches(strings)['suspicious_api']
+    
     def extract_string_features(self, content: bytes) -> Dict[str, Any]:
         """提取Character串Feature"""
         features = {}
         
         try:
-            # 可打印Character串
-            printable_strings = []
-            current_string = ""
+            # 可打印Character串 (向量化游程扫描)
+            scan = scan_printable_strings(content, max_bytes=self.string_scan_budget)
+            printable_strings = scan.strings(content)
             
-            for byte in content:
-                if 32 <= byte <= 126:  # 可打印ASCIICharacter
-                    current_string += chr(byte)
-                else:
-                    if len(current_string) >= 4:  # 最小Character串Length
-                        printable_strings.append(current_string)
-                    current_string = ""
-            
-            if len(current_string) >= 4:
-                printable_strings.append(current_string)
-            
-            features['string_count'] = len(printable_strings)
-            features['avg_string_length'] = np.mean([len(s) for s in printable_strings]) if printable_strings else 0
-            features['max_string_length'] = max([len(s) for s in printable_strings]) if printable_strings else 0
-            
-            # 可疑Character串模式
-            suspicious_patterns = [
-                'CreateRemoteThread', 'VirtualAllocEx', 'WriteProcessMemory',
-                'SetWindowsHookEx', 'GetProcAddress', 'LoadLibrary',
-                'RegSetValueEx', 'CreateFile', 'InternetOpen'
-            ]
+            features['string_count'] = scan.count
+            features['avg_string_length'] = scan.mean_length
+            features['max_string_length'] = scan.max_length
+            if scan.truncated:
+                features['string_scan_truncated'] = True
             
-            features['suspicious_string_count'] = sum(
-                1 for pattern in suspicious_patterns 
-                for string in printable_strings 
-                if pattern.lower() in string.lower()
-            )
+            # 可疑Character串模式 (每个Character串中出现的不同模式数之和)
+            features['suspicious_string_count'] = self.count_suspicious_strings(printable_strings)
             
         except Exception as e:
             logger.warning(f"String feature extraction failed: {e}")
@@ -248,101 +570,398 @@ class FileFeatureExtractor:
         
         return features
     
-    def extract_all_features(self, file_path: str) -> Dict[str, Any]:
-        """提取所HasFeature"""
+    def extract_all_features(self, file_path: str, content: Optional[bytes] = None,
+                             known: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """提取所HasFeature
+
+        File只Read一次，哈希、libmagic、Character串和YARA都共用同一份Content；
+        返回的Feature记录由评分、威胁Type判断和APIResponse共享。
+        大File (超过stream_threshold) 不整体读入Memory，而是按块流式Process。
+        known是检测级联Already计算的Feature (sha256、YARA)，不再重复计算。
+        """
         features = {}
+        known = known or {}
+        
+        try:
+            if content is None:
+                if self.is_large_file(os.path.getsize(file_path)):
+                    return self.extract_large_file_features(file_path)
+                content = self.read_file(file_path)
+        except Exception as e:
+            logger.error(f"Error reading {file_path}: {e}")
+            return features
         
         # 基础Feature
-        features.update(self.extract_basic_features(file_path))
+        features.update(self.extract_basic_features(file_path, content, known.get('sha256')))
         
-        # PEFeature (如果是PEFile)
-        if features.get('file_extension') in ['.exe', '.dll', '.sys']:
-            features.update(self.extract_pe_features(file_path))
+        # PEFeature (按File头判断，不依赖扩展名)
+        if features.get('file_kind') == 'pe':
+            features.update(self.extract_pe_features(file_path, content))
         
         # YARAFeature
+        if 'yara_matches' not in known:
+            features.update(self.extract_yara_features(file_path, content))
+        
+        # 模糊哈希相似度Feature
+        if 'similar_families' not in known:
+            features.update(self.extract_similarity_features(content))
+        
+        features.update(known)
+        return features
+    
+    def extract_large_file_features(self, file_path: str) -> Dict[str, Any]:
+        """大File的Feature提取: 采样或流式基础Feature，PE和YARA直接基于File (不整体读入)"""
+        if self.should_sample(os.path.getsize(file_path)):
+            features = self.extract_sampled_features(file_path)
+        else:
+            features = self.extract_streaming_features(file_path)
+        
+        if features.get('file_kind') == 'pe':
+            features.update(self.extract_pe_features(file_path))
+        
         features.update(self.extract_yara_features(file_path))
         
+        features.update(self.extract_similarity_features(
+            digests={name: features[name] for name in ('ssdeep', 'tlsh') if name in features}
+        ))
+        
         return features
 
+# Machine LearningFeature (数值Feature + PEFeature)，顺序即Feature向量的列顺序
+FEATURE_NAMES = [
+    'file_size', 'entropy', 'string_count', 'avg_string_length',
+    'max_string_length', 'suspicious_string_count', 'yara_match_count',
+    'pe_machine', 'pe_characteristics', 'pe_subsystem',
+    'pe_dll_characteristics', 'pe_number_of_sections',
+    'pe_size_of_code', 'pe_size_of_initialized_data',
+    'pe_import_count', 'pe_export_count', 'similarity_score',
+    'entropy_window_max', 'entropy_window_variance', 'high_entropy_ratio',
+    'pe_max_section_entropy', 'pe_high_entropy_sections'
+]
+
+def feature_row(features_dict: Dict[str, Any]) -> List[float]:
+    """将Feature记录转换为数值行"""
+    row = []
+    for feature_name in FEATURE_NAMES:
+        value = features_dict.get(feature_name, 0)
+        if isinstance(value, (int, float)):
+            row.append(value)
+        else:
+            row.append(0)  # Default值
+    return row
+
+def threat_score_targets(labels: np.ndarray) -> np.ndarray:
+    """威胁评分器的回归目标 (恶意=1.0，正常=0.0)"""
+    return (np.asarray(labels) > 0).astype(float)
+
+# 训练Feature提取Worker进程状态: 每个Process持HasOwn的libmagic句柄和YARARules
+_worker_extractor: Optional['FileFeatureExtractor'] = None
+
+def _init_feature_worker(yara_rules_path: Optional[str] = None):
+    """Worker进程Initialize"""
+    global _worker_extractor
+    _worker_extractor = FileFeatureExtractor(yara_rules_path=yara_rules_path)
+
+def _extract_feature_rows(file_paths: List[str], extractor: Optional['FileFeatureExtractor'] = None
+                          ) -> List[Tuple[str, Optional[List[float]], Optional[str]]]:
+    """提取一组File的Feature行 (extractor为None时使用Worker进程的提取器)"""
+    extractor = extractor if extractor is not None else _worker_extractor
+    rows = []
+    for file_path in file_paths:
+        try:
+            os.stat(file_path)  # 让不可访问的File报告真实Error
+            features = extractor.extract_all_features(file_path)
+            if not features:
+                raise ValueError("no features extracted")
+            rows.append((file_path, feature_row(features), None))
+        except Exception as e:
+            rows.append((file_path, None, str(e)))
+    return rows
+
+# MLThreatDetector的Model名称
+MODEL_NAMES = ('malware_classifier', 'anomaly_detector', 'threat_scorer')
+
+# ModelVersionDirectory中编译后数组的子Directory (内存映射Load)
+COMPILED_DIR = 'compiled'
+
+# 检查注册表current是否切换的最小间隔 (秒)
+MODEL_RELOAD_INTERVAL = 5.0
+
+# 增量Update: 每次追加的随机森林树数、森林树数上限 (丢弃最旧的树)、追加的Boosting轮数
+UPDATE_NEW_TREES = 20
+MAX_FOREST_TREES = 300
+UPDATE_BOOST_ROUNDS = 20
+
 class MLThreatDetector:
     """Machine Learning威胁Detection器"""
     
-    def __init__(self, model_dir: str = "models"):
+    def __init__(self, model_dir: str = "models",
+                 feature_extractor: Optional[FileFeatureExtractor] = None,
+                 use_compiled: bool = True):
         self.model_dir = Path(model_dir)
         self.model_dir.mkdir(exist_ok=True)
         
-        self.feature_extractor = FileFeatureExtractor()
-        self.scaler = StandardScaler()
+        self.feature_extractor = feature_extractor or FileFeatureExtractor()
         
-        # Model字典
-        self.models = {
-            'malware_classifier': RandomForestClassifier(n_estimators=100, random_state=42),
-            'anomaly_detector': IsolationForest(contamination=0.1, random_state=42),
-            'threat_scorer': xgb.XGBRegressor(random_state=42)
-        }
+        # Model字典和Standard化器在第一次使用时创建 (避免启动时导入sklearn/xgboost)
+        self._models: Optional[Dict[str, Any]] = None
+        self._scaler = None
         
         self.is_trained = False
-        self.feature_names = []
+        self.feature_names = list(FEATURE_NAMES)
+        
+        # 编译后的纯NumPyModel (推理时替代sklearn/xgboost对象)
+        self.use_compiled = use_compiled
+        self.compiled_models: Optional[Dict[str, Any]] = None
+        
+        # ModelVersion注册表 (model_dir/versions/<version>，current指向当前Version)
+        self.registry = ModelRegistry(self.model_dir)
+        
+        # ModelVersion (由ModelFile计算)，Model变化时通知监听者 (如AnalysisCache)
+        self.model_version = "untrained"
+        self.model_listeners: List[Callable[[str], None]] = []
+        self._reload_lock = threading.Lock()
+        self._reload_checked_at = 0.0
+    
+    @property
+    def models(self) -> Dict[str, Any]:
+        """Model字典"""
+        if self._models is None:
+            self._models = {
+                'malware_classifier': ensemble.RandomForestClassifier(n_estimators=100, random_state=42),
+                'anomaly_detector': ensemble.IsolationForest(contamination=0.1, random_state=42),
+                'threat_scorer': xgb.XGBRegressor(random_state=42)
+            }
+        return self._models
+    
+    @models.setter
+    def models(self, models: Dict[str, Any]):
+        self._models = models
+    
+    @property
+    def scaler(self):
+        """Standard化器"""
+        if self._scaler is None:
+            self._scaler = preprocessing.StandardScaler()
+        return self._scaler
+    
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+    
+    def add_model_listener(self, listener: Callable[[str], None]):
+        """注册Model变化回调"""
+        self.model_listeners.append(listener)
+    
+    @property
+    def artifact_dir(self) -> Path:
+        """当前ModelFile所在Directory (注册表当前Version；旧的平铺布局为model_dir本身)"""
+        return self.registry.current_path() or self.model_dir
+    
+    @property
+    def compiled_path(self) -> Path:
+        return self.artifact_dir / COMPILED_DIR
+    
+    def compute_model_version(self) -> str:
+        """ModelVersion标识: 注册表当前Version，旧布局根据ModelFile元Data计算"""
+        version = self.registry.current_version()
+        if version:
+            return version
+        
+        digest = hashlib.sha256()
+        for name in sorted(list(MODEL_NAMES) + ['scaler']):
+            model_path = self.model_dir / f"{name}.joblib"
+            if model_path.exists():
+                stat = model_path.stat()
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:16]
+    
+    def set_model_version(self, version: str):
+        """UpdateModelVersion并通知监听者"""
+        if version == self.model_version:
+            return
+        self.model_version = version
+        for listener in self.model_listeners:
+            try:
+                listener(version)
+            except Exception as e:
+                logger.warning(f"Model listener failed: {e}")
+    
+    def ensure_models_loaded(self):
+        """确保ModelAlreadyLoad，注册表切换到新Version后自动重新Load"""
+        if not self.is_trained:
+            self.load_models()
+        else:
+            self.reload_if_changed()
+    
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """注册表current指向新Version时Load它 (后台Training或其他Process发布的Version)
+
+        每MODEL_RELOAD_INTERVAL秒最多Check一次 (一次readlink)；新Model完整Load后
+        才替换引用，进行中的Prediction继续使用旧Model。
+        """
+        now = time.monotonic()
+        if not force and now - self._reload_checked_at < MODEL_RELOAD_INTERVAL:
+            return False
+        self._reload_checked_at = now
+        
+        version = self.registry.current_version()
+        if version is None or version == self.model_version:
+            return False
+        with self._reload_lock:
+            if version != self.model_version:
+                logger.info(f"Model version changed to {version}, reloading")
+                self.load_models()
+        return self.model_version == version
+    
+    def serving_models(self) -> Tuple[Any, Dict[str, Any]]:
+        """推理使用的 (Standard化器, Model字典)，优先使用编译后的Model"""
+        if self.compiled_models is not None:
+            return self.compiled_models['scaler'], self.compiled_models
+        return self.scaler, self.models
+    
+    def compile_models(self, save: bool = True) -> bool:
+        """把Training好的Model导出为纯NumPy数组"""
+        if not self.use_compiled:
+            return False
+        try:
+            self.compiled_models = compile_models(self.models, self.scaler)
+            if save:
+                save_compiled_models(self.compiled_path, self.compiled_models, self.model_version)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to compile models, using original estimators: {e}")
+            self.compiled_models = None
+            return False
+    
+    def load_compiled_models(self, model_version: str) -> bool:
+        """Load与当前ModelFile匹配的编译Model (无需反序列化sklearn/xgboost对象)
+
+        数组以只读内存映射方式Load，同一主机上的所HasWorkerProcess共享一份物理内存。
+        """
+        if not self.use_compiled or not self.compiled_path.exists():
+            return False
+        try:
+            compiled, compiled_version = load_compiled_models(self.compiled_path)
+        except Exception as e:
+            logger.warning(f"Failed to load compiled models: {e}")
+            return False
+        if compiled_version != model_version:
+            logger.info("Compiled models are stale, recompiling")
+            return False
+        self.compiled_models = compiled
+        return True
     
     def prepare_features(self, features_dict: Dict[str, Any]) -> np.ndarray:
         """准备Machine LearningFeature"""
-        # 选择数值Feature
-        numerical_features = [
-            'file_size', 'entropy', 'string_count', 'avg_string_length',
-            'max_string_length', 'suspicious_string_count', 'yara_match_count'
-        ]
+        return np.array(feature_row(features_dict)).reshape(1, -1)
+    
+    def prepare_feature_matrix(self, features_list: List[Dict[str, Any]]) -> np.ndarray:
+        """将多个Feature记录堆叠为 (n, k) 矩阵"""
+        return np.vstack([self.prepare_features(features) for features in features_list])
+    
+    @staticmethod
+    def serving_feature_count(scaler) -> Optional[int]:
+        """Model训练时的Feature数 (新增Feature之前训练的Model只使用前面的列)"""
+        if hasattr(scaler, 'n_features_in_'):
+            return int(scaler.n_features_in_)
+        if hasattr(scaler, 'mean'):
+            return len(scaler.mean)
+        return None
+    
+    def extract_training_features(self, training_data: List[Tuple[str, int]],
+                                  workers: Optional[int] = None,
+                                  chunk_size: int = 64) -> FeatureSet:
+        """并行提取TrainingFeature
+
+        使用ProcessPoolExecutor，每个Worker持HasOwn的libmagic句柄和YARARules；
+        单个SampleFailed只会被记录，不影响整个批次。workers=1时在当前Process中Execute。
+        """
+        labels = {}
+        for file_path, label in training_data:
+            labels[file_path] = label
+        file_paths = [file_path for file_path, _ in training_data]
         
-        # PEFeature
-        pe_features = [
-            'pe_machine', 'pe_characteristics', 'pe_subsystem',
-            'pe_dll_characteristics', 'pe_number_of_sections',
-            'pe_size_of_code', 'pe_size_of_initialized_data',
-            'pe_import_count', 'pe_export_count'
-        ]
+        rows: Dict[str, List[float]] = {}
+        failures: List[Tuple[str, str]] = []
         
-        # Group合Feature
-        selected_features = numerical_features + pe_features
+        def collect(results):
+            for file_path, row, error in results:
+                if row is None:
+                    failures.append((file_path, error))
+                else:
+                    rows[file_path] = row
         
-        # 提取Feature值
-        feature_vector = []
-        for feature_name in selected_features:
-            value = features_dict.get(feature_name, 0)
-            if isinstance(value, (int, float)):
-                feature_vector.append(value)
-            else:
-                feature_vector.append(0)  # Default值
+        if workers == 1:
+            collect(_extract_feature_rows(file_paths, self.feature_extractor))
+        else:
+            chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+            rules_path = self.feature_extractor.yara_manager.rules_path
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_feature_worker,
+                                     initargs=(str(rules_path) if rules_path else None,)) as pool:
+                futures = {pool.submit(_extract_feature_rows, chunk): chunk for chunk in chunks}
+                for done, future in enumerate(as_completed(futures), 1):
+                    try:
+                        collect(future.result())
+                    except Exception as e:
+                        # Worker崩溃: 整个分块记为Failed
+                        failures.extend((file_path, f"worker failed: {e}") for file_path in futures[future])
+                    logger.info(f"Feature extraction: {done}/{len(chunks)} chunks")
+        
+        for file_path, error in failures:
+            logger.warning(f"Failed to process {file_path}: {error}")
         
-        return np.array(feature_vector).reshape(1, -1)
+        ordered_paths = [file_path for file_path in file_paths if file_path in rows]
+        return FeatureSet(
+            X=np.array([rows[p] for p in ordered_paths], dtype=float).reshape(len(ordered_paths), len(FEATURE_NAMES)),
+            y=np.array([labels[p] for p in ordered_paths]),
+            paths=ordered_paths,
+            feature_names=list(FEATURE_NAMES),
+            failures=failures
+        )
     
-    def train_models(self, training_data: List[Tuple[str, int]]):
-        """TrainingMachine LearningModel"""
+    def train_models(self, training_data: List[Tuple[str, int]], workers: Optional[int] = None,
+                     feature_store_path: Optional[str] = None) -> Dict[str, Any]:
+        """TrainingMachine LearningModel
+
+        提供feature_store_path时，提取的Feature会按列保存，之后可用
+        train_from_feature_store() 直接重新Training而无需再次提取。
+        """
         logger.info("StartTrainingMachine LearningModel...")
         
         # 提取Feature和Tag
-        X = []
-        y = []
+        feature_set = self.extract_training_features(training_data, workers=workers)
         
-        for file_path, label in training_data:
-            try:
-                features = self.feature_extractor.extract_all_features(file_path)
-                feature_vector = self.prepare_features(features)
-                X.append(feature_vector.flatten())
-                y.append(label)
-            except Exception as e:
-                logger.warning(f"Failed to process {file_path}: {e}")
+        if feature_store_path:
+            save_feature_set(feature_store_path, feature_set)
         
-        if not X:
+        return self.fit_models(feature_set)
+    
+    def train_from_feature_store(self, feature_store_path: str) -> Dict[str, Any]:
+        """从Feature存储重新TrainingModel (跳过Feature提取)"""
+        logger.info(f"StartTrainingMachine LearningModel from {feature_store_path}...")
+        return self.fit_models(load_feature_set(feature_store_path, FEATURE_NAMES))
+    
+    def fit_models(self, feature_set: FeatureSet, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """在Feature矩阵上TrainingModel (从头Training)"""
+        report = {
+            'samples': len(feature_set),
+            'failed': feature_set.failures,
+            'accuracy': None
+        }
+        
+        if not len(feature_set):
             logger.error("No valid training data")
-            return
+            return report
         
-        X = np.array(X)
-        y = np.array(y)
+        X = feature_set.X
+        y = feature_set.y
         
         # Standard化Feature
         X_scaled = self.scaler.fit_transform(X)
         
         # 分割Training和TestData
-        X_train, X_test, y_train, y_test = train_test_split(
+        X_train, X_test, y_train, y_test = model_selection.train_test_split(
             X_scaled, y, test_size=0.2, random_state=42
         )
         
@@ -350,97 +969,274 @@ class MLThreatDetector:
         self.models['malware_classifier'].fit(X_train, y_train)
         self.models['anomaly_detector'].fit(X_train[y_train == 0])  # 只用正常SampleTraining
         
-        # 为威胁评分器Create连续Tag
-        threat_scores = np.random.random(len(y_train))  # 这里应该是实际的威胁评分
-        self.models['threat_scorer'].fit(X_train, threat_scores)
+        # 威胁评分器回归恶意Tag，输出连续的威胁评分
+        self.models['threat_scorer'].fit(X_train, threat_score_targets(y_train))
         
         # EvaluationModel
         y_pred = self.models['malware_classifier'].predict(X_test)
-        logger.info(f"ModelAccuracy: {np.mean(y_pred == y_test):.3f}")
+        report['accuracy'] = float(np.mean(y_pred == y_test))
+        logger.info(f"ModelAccuracy: {report['accuracy']:.3f}")
+        
+        self.is_trained = True
+        
+        # 发布为注册表中的新Version并切换
+        report['model_version'] = self.save_models({
+            'samples': report['samples'], 'accuracy': report['accuracy'], 'update': 'full', **(metadata or {})
+        })
+        
+        return report
+    
+    def can_update_incrementally(self) -> bool:
+        """当前Version能否增量Update (Model已Training且Feature列与FEATURE_NAMES一致)"""
+        classifier = self.models['malware_classifier']
+        return (hasattr(classifier, 'estimators_')
+                and self.serving_feature_count(self.scaler) == len(self.feature_names))
+    
+    def update_models(self, feature_set: FeatureSet, metadata: Optional[Dict[str, Any]] = None,
+                      new_trees: int = UPDATE_NEW_TREES, max_trees: int = MAX_FOREST_TREES,
+                      boost_rounds: int = UPDATE_BOOST_ROUNDS) -> Dict[str, Any]:
+        """用新标注的Sample增量UpdateModel (不从头Training)
+
+        - 随机森林: warm_start追加new_trees棵只在新Sample上Training的树，超过max_trees时丢弃最旧的树
+        - 威胁评分器: 在当前Booster上继续Boosting boost_rounds轮
+        - ExceptionDetection: IsolationForest每棵树只采样256个Sample，直接在新的正常Sample上重建
+        Standard化器保持不变 (已Has的树按它的尺度分裂)。Model在副本上Update，发布后才替换。
+        """
+        report = {
+            'samples': len(feature_set),
+            'failed': feature_set.failures,
+            'accuracy': None,
+            'accuracy_before': None
+        }
+        
+        if not len(feature_set):
+            logger.error("No valid training data")
+            return report
+        if not self.can_update_incrementally():
+            raise ValueError("Current models cannot be updated incrementally; run a full retrain")
+        
+        X_scaled = self.scaler.transform(feature_set.X)
+        X_train, X_test, y_train, y_test = model_selection.train_test_split(
+            X_scaled, feature_set.y, test_size=0.2, random_state=42
+        )
+        models = {name: copy.deepcopy(model) for name, model in self.models.items()}
+        report['accuracy_before'] = float(np.mean(models['malware_classifier'].predict(X_test) == y_test))
+        
+        # 随机森林追加新树 (新Sample必须包含所Has类别，否则classes_会变化)
+        classifier = models['malware_classifier']
+        if set(np.unique(y_train)) == set(classifier.classes_):
+            classifier.set_params(warm_start=True, n_estimators=len(classifier.estimators_) + new_trees)
+            classifier.fit(X_train, y_train)
+            if len(classifier.estimators_) > max_trees:
+                classifier.estimators_ = classifier.estimators_[-max_trees:]
+            classifier.set_params(warm_start=False, n_estimators=len(classifier.estimators_))
+        else:
+            logger.warning("Update batch lacks some classes, malware classifier left unchanged")
         
+        # 继续Boosting
+        scorer = models['threat_scorer']
+        rounds = scorer.get_params()['n_estimators']
+        scorer.set_params(n_estimators=boost_rounds)
+        scorer.fit(X_train, threat_score_targets(y_train), xgb_model=scorer.get_booster())
+        scorer.set_params(n_estimators=rounds)
+        
+        benign = X_train[y_train == 0]
+        if len(benign) >= 256:
+            models['anomaly_detector'].fit(benign)
+        else:
+            logger.warning(f"Only {len(benign)} benign samples, anomaly detector left unchanged")
+        
+        report['accuracy'] = float(np.mean(classifier.predict(X_test) == y_test))
+        logger.info(f"Incremental update accuracy: {report['accuracy_before']:.3f} -> {report['accuracy']:.3f}")
+        
+        self.models = models
         self.is_trained = True
+        report['model_version'] = self.save_models({
+            'samples': report['samples'], 'accuracy': report['accuracy'], 'update': 'incremental',
+            'forest_trees': len(classifier.estimators_),
+            'boosting_rounds': scorer.get_booster().num_boosted_rounds(),
+            **(metadata or {})
+        })
         
-        # SaveModel
-        self.save_models()
+        return report
+    
+    def add_training_samples(self, training_data: List[Tuple[str, int]], shard_store: FeatureShardStore,
+                             workers: Optional[int] = None) -> Optional[Path]:
+        """提取新标注Sample的Feature并追加为一个分片 (之后由ModelUpdateJob增量Training)"""
+        feature_set = self.extract_training_features(training_data, workers=workers)
+        if not len(feature_set):
+            return None
+        return shard_store.append(feature_set)
     
     def predict(self, file_path: str) -> Dict[str, float]:
         """使用MLModel进行Prediction"""
-        if not self.is_trained:
-            self.load_models()
+        features = self.feature_extractor.extract_all_features(file_path)
+        return self.predict_features(features, file_path)
+    
+    def predict_features(self, features: Dict[str, Any], file_path: str = "") -> Dict[str, float]:
+        """基于Already提取的Feature进行Prediction (不再重复ReadFile)"""
+        return self.predict_batch([features], [file_path])[0]
+    
+    def predict_batch(self, features_list: List[Dict[str, Any]],
+                      file_paths: Optional[List[str]] = None) -> List[Dict[str, float]]:
+        """批量Prediction: 整个批次只调用一次每个Model"""
+        if not features_list:
+            return []
+        
+        self.ensure_models_loaded()
         
         try:
-            # 提取Feature
-            features = self.feature_extractor.extract_all_features(file_path)
-            feature_vector = self.prepare_features(features)
-            feature_vector_scaled = self.scaler.transform(feature_vector)
-            
-            # ModelPrediction
-            predictions = {}
+            scaler, models = self.serving_models()
+            feature_matrix = self.prepare_feature_matrix(features_list)
+            feature_matrix = feature_matrix[:, :self.serving_feature_count(scaler)]
+            feature_matrix_scaled = scaler.transform(feature_matrix)
             
             # 恶意Software分Class
-            malware_prob = self.models['malware_classifier'].predict_proba(feature_vector_scaled)[0]
-            predictions['malware_probability'] = float(malware_prob[1]) if len(malware_prob) > 1 else 0.0
+            malware_probs = models['malware_classifier'].predict_proba(feature_matrix_scaled)
+            if malware_probs.shape[1] > 1:
+                malware_probs = malware_probs[:, 1]
+            else:
+                malware_probs = np.zeros(len(features_list))
             
             # ExceptionDetection
-            anomaly_score = self.models['anomaly_detector'].decision_function(feature_vector_scaled)[0]
-            predictions['anomaly_score'] = float(anomaly_score)
+            anomaly_scores = models['anomaly_detector'].decision_function(feature_matrix_scaled)
             
             # 威胁评分
-            threat_score = self.models['threat_scorer'].predict(feature_vector_scaled)[0]
-            predictions['threat_score'] = float(threat_score)
+            threat_scores = models['threat_scorer'].predict(feature_matrix_scaled)
             
-            return predictions
+            return [
+                {
+                    'malware_probability': float(malware_prob),
+                    'anomaly_score': float(anomaly_score),
+                    'threat_score': float(threat_score)
+                }
+                for malware_prob, anomaly_score, threat_score
+                in zip(malware_probs, anomaly_scores, threat_scores)
+            ]
             
         except Exception as e:
-            logger.error(f"ML prediction failed for {file_path}: {e}")
-            return {
-                'malware_probability': 0.0,
-                'anomaly_score': 0.0,
-                'threat_score': 0.0
-            }
+            logger.error(f"ML prediction failed for {', '.join(file_paths or []) or 'batch'}: {e}")
+            return [
+                {
+                    'malware_probability': 0.0,
+                    'anomaly_score': 0.0,
+                    'threat_score': 0.0
+                }
+                for _ in features_list
+            ]
     
-    def save_models(self):
-        """SaveTraining好的Model"""
+    def save_models(self, metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """SaveTraining好的Model
+
+        joblibFile (不压缩，可内存映射) 和编译后的数组写入临时Directory，再作为新Version
+        发布到注册表并原子切换current；返回新Version号。
+        """
         try:
+            staged = self.registry.stage()
             for name, model in self.models.items():
-                model_path = self.model_dir / f"{name}.joblib"
-                joblib.dump(model, model_path)
+                joblib.dump(model, staged / f"{name}.joblib")
             
             # SaveStandard化器
-            scaler_path = self.model_dir / "scaler.joblib"
-            joblib.dump(self.scaler, scaler_path)
+            joblib.dump(self.scaler, staged / "scaler.joblib")
             
-            logger.info(f"ModelAlreadySave到 {self.model_dir}")
+            version = new_version_id()
+            if self.compile_models(save=False):
+                save_compiled_models(staged / COMPILED_DIR, self.compiled_models, version)
+            
+            self.registry.publish(staged, version, metadata={
+                'feature_names': self.feature_names,
+                **(metadata or {})
+            })
+            self.set_model_version(version)
+            logger.info(f"ModelAlreadySave到 {self.registry.version_path(version)}")
+            return version
             
         except Exception as e:
             logger.error(f"Failed to save models: {e}")
+            return None
+    
+    def load_estimators(self) -> bool:
+        """Load当前Version的sklearn/xgboost对象 (增量Training和未编译推理使用)"""
+        artifact_dir = self.artifact_dir
+        models = dict(self.models)
+        found = False
+        for name in MODEL_NAMES:
+            model_path = artifact_dir / f"{name}.joblib"
+            if model_path.exists():
+                models[name] = joblib.load(model_path, mmap_mode='r')
+                found = True
+        
+        # LoadStandard化器
+        scaler_path = artifact_dir / "scaler.joblib"
+        if scaler_path.exists():
+            self.scaler = joblib.load(scaler_path, mmap_mode='r')
+        self.models = models
+        return found
     
     def load_models(self):
         """Load预TrainingModel"""
+        model_version = self.compute_model_version()
+        if self.load_compiled_models(model_version):
+            self.is_trained = True
+            self.set_model_version(model_version)
+            logger.info("Compiled models loaded")
+            return
+        
         try:
-            for name in self.models.keys():
-                model_path = self.model_dir / f"{name}.joblib"
-                if model_path.exists():
-                    self.models[name] = joblib.load(model_path)
-            
-            # LoadStandard化器
-            scaler_path = self.model_dir / "scaler.joblib"
-            if scaler_path.exists():
-                self.scaler = joblib.load(scaler_path)
-            
+            found = self.load_estimators()
             self.is_trained = True
+            self.set_model_version(model_version)
+            if found:
+                self.compile_models()
             logger.info("ModelLoadSuccess")
             
         except Exception as e:
             logger.warning(f"Failed to load models: {e}")
             self.is_trained = False
 
+# Directory树Analysis时同时进行的批次数 (一个批次推理时下一个批次已在提取Feature)
+TREE_BATCHES_IN_FLIGHT = 2
+
 class IntelligentThreatDetector:
     """Smart威胁Detection引擎主Class"""
     
-    def __init__(self, model_dir: str = "models"):
-        self.ml_detector = MLThreatDetector(model_dir)
-        self.feature_extractor = FileFeatureExtractor()
+    def __init__(self, model_dir: str = "models",
+                 cache: Optional[AnalysisCache] = None, enable_cache: bool = True,
+                 yara_rules_path: Optional[str] = None,
+                 executor: Optional[AnalysisExecutor] = None,
+                 execution_mode: Optional[str] = None,
+                 cascade: Optional[DetectionCascade] = None):
+        # 检测器与ML模型共用同一个Feature提取器
+        self.feature_extractor = FileFeatureExtractor(yara_rules_path=yara_rules_path)
+        self.ml_detector = MLThreatDetector(model_dir, self.feature_extractor)
+        
+        # 检测级联: 哈希名单和YARA元Data能定论的File不再运行ML
+        # (传入 DetectionCascade([]) 则所HasFile都走ML)
+        self.cascade = cascade if cascade is not None else DetectionCascade.default(
+            self.feature_extractor.yara_manager, self.feature_extractor.similarity_index
+        )
+        
+        # 按Content寻址的AnalysisCache，Model或级联配置变化时自动失效
+        self.cache = cache if cache is not None else (AnalysisCache() if enable_cache else None)
+        if self.cache is not None:
+            self.ml_detector.add_model_listener(lambda version: self.cache.invalidate(self.verdict_version()))
+        
+        # 采样File的sha256可能在后台计算 (hash_mode=background): 哈希完成后再写入Cache
+        self._pending_verdicts: Dict[str, Tuple[StatKey, str, Dict[str, Any]]] = {}
+        self._pending_lock = threading.Lock()
+        if self.cache is not None:
+            self.feature_extractor.add_hash_listener(self.on_background_hash)
+        
+        # Analysis在执行器中运行，事件循环只负责调度
+        if executor is None:
+            cache_db = self.cache.db_path if self.cache is not None and self.cache.persistent else None
+            executor = AnalysisExecutor(
+                mode=execution_mode,
+                initializer=_init_analysis_worker,
+                initargs=(model_dir, yara_rules_path, cache_db)
+            )
+        # Process模式下每个Worker通过reload_if_changed()自行切换到注册表的新Version，不需要重建Process池
+        self.executor = executor
         
         # 威胁Type映射
         self.threat_types = {
@@ -456,51 +1252,389 @@ class IntelligentThreatDetector:
         }
     
     async def analyze_file(self, file_path: str) -> ThreatAnalysis:
-        """综合AnalysisFile威胁"""
+        """综合AnalysisFile威胁
+
+        Analysis在执行器的Thread/Process池中运行，不阻塞事件循环；
+        排队的Analysis超过高水位时抛出 AnalysisRejected。
+        """
+        if self.executor.mode == 'process':
+            return await self.executor.run(_analyze_file_in_worker, file_path)
+        return await self.executor.run(self.analyze_file_sync, file_path)
+    
+    def analyze_file_sync(self, file_path: str) -> ThreatAnalysis:
+        """同步AnalysisFile (在执行器Worker中调用)"""
         start_time = datetime.now()
         
         try:
-            # 提取Feature
-            features = self.feature_extractor.extract_all_features(file_path)
-            
-            # MLPrediction
-            ml_predictions = self.ml_detector.predict(file_path)
-            
-            # Calculate综合威胁评分
-            threat_score = self.calculate_threat_score(ml_predictions, features)
-            
-            # 确定威胁Type
-            threat_type = self.determine_threat_type(features, ml_predictions)
-            
-            # Calculate置信度
-            confidence = self.calculate_confidence(ml_predictions)
+            cached, features = self.lookup_or_extract(file_path, start_time)
+            if cached is not None:
+                return cached
             
-            # 生成建议
-            recommendations = self.generate_recommendations(threat_score, threat_type)
+            return self.finalize_analyses([(file_path, features)], start_time)[0]
             
-            return ThreatAnalysis(
-                file_path=file_path,
-                threat_score=threat_score,
-                confidence=confidence,
-                threat_type=threat_type,
-                threat_category=self.categorize_threat(threat_score),
-                ml_predictions=ml_predictions,
-                features=features,
-                recommendations=recommendations,
-                analysis_time=start_time
+        except Exception as e:
+            logger.error(f"Analysis failed for {file_path}: {e}")
+            return self.error_analysis(file_path, start_time)
+    
+    async def analyze_files(self, file_paths: List[str], batch_size: int = 64) -> List[ThreatAnalysis]:
+        """批量AnalysisFile
+
+        Feature提取在执行器中并发进行 (受同一并发上限约束)，每个批次的Feature
+        堆叠为一个矩阵，每个Model每批只调用一次。Result按Input顺序返回。
+        执行器Already超过高水位时整个批次被拒绝 (AnalysisRejected)。
+        """
+        self.executor.check_capacity()
+        
+        results = []
+        for batch_start in range(0, len(file_paths), batch_size):
+            results.extend(await self.analyze_batch(file_paths[batch_start:batch_start + batch_size]))
+        return results
+    
+    async def analyze_batch(self, batch: List[str]) -> List[ThreatAnalysis]:
+        """Analysis一个批次 (不做高水位Check)"""
+        loop = asyncio.get_running_loop()
+        results: List[Optional[ThreatAnalysis]] = [None] * len(batch)
+        extract = _lookup_or_extract_in_worker if self.executor.mode == 'process' else self.safe_lookup_or_extract
+        start_time = datetime.now()
+        
+        # 批次内的子任务只排队不拒绝
+        prepared = await asyncio.gather(*[
+            self.executor.run(extract, file_path, start_time, reject=False)
+            for file_path in batch
+        ])
+        
+        pending = []
+        for index, (file_path, (cached, features)) in enumerate(zip(batch, prepared)):
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, file_path, features))
+        
+        if pending:
+            # 推理和Cache写入在本Process进行
+            analyses = await loop.run_in_executor(
+                None, self.finalize_analyses,
+                [(file_path, features) for _, file_path, features in pending], start_time
             )
+            for (index, _, _), analysis in zip(pending, analyses):
+                results[index] = analysis
+        
+        return results
+    
+    async def analyze_tree(self, root: str, include: Optional[Iterable[str]] = None,
+                           exclude: Optional[Iterable[str]] = None, max_size: Optional[int] = None,
+                           kinds: Optional[Iterable[str]] = DEFAULT_KINDS, batch_size: int = 64,
+                           progress: Optional[TreeScanProgress] = None) -> AsyncIterator[ThreatAnalysis]:
+        """AnalysisDirectory树，逐个产出Result
+
+        后台Thread用os.scandir遍历Directory并按File头魔数过滤 (kinds=None时不过滤)，
+        候选File凑成批次交给执行器 (Process模式下跨CPU核并行)，同时最多
+        TREE_BATCHES_IN_FLIGHT个批次在分析。progress中的计数器随遍历和Analysis实时Update。
+        """
+        self.executor.check_capacity()
+        
+        progress = progress if progress is not None else TreeScanProgress(root=root)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        # 遍历领先Analysis的File数上限 (背压)
+        slots = threading.Semaphore(batch_size * (TREE_BATCHES_IN_FLIGHT + 1))
+        stop = threading.Event()
+        done = object()
+        
+        def walk():
+            try:
+                for path, size, _ in walk_files(root, include, exclude, max_size, kinds, progress):
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    if stop.is_set():
+                        return
+                    progress.queued += 1
+                    loop.call_soon_threadsafe(queue.put_nowait, (path, size))
+            except Exception as e:
+                logger.error(f"Directory walk failed for {root}: {e}")
+                progress.errors += 1
+            finally:
+                progress.walk_complete = True
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        async def next_batch() -> Optional[List[Tuple[str, int]]]:
+            item = await queue.get()
+            if item is done:
+                return None
+            batch = [item]
+            while len(batch) < batch_size and not queue.empty():
+                item = queue.get_nowait()
+                if item is done:
+                    queue.put_nowait(done)
+                    break
+                batch.append(item)
+            for _ in batch:
+                slots.release()
+            return batch
+        
+        walker = loop.run_in_executor(None, walk)
+        in_flight = deque()
+        walk_finished = False
+        
+        try:
+            while True:
+                while not walk_finished and len(in_flight) < TREE_BATCHES_IN_FLIGHT:
+                    batch = await next_batch()
+                    if batch is None:
+                        walk_finished = True
+                        break
+                    task = asyncio.ensure_future(self.analyze_batch([path for path, _ in batch]))
+                    in_flight.append((batch, task))
+                
+                if not in_flight:
+                    break
+                
+                batch, task = in_flight.popleft()
+                for (_, size), analysis in zip(batch, await task):
+                    progress.analyzed += 1
+                    progress.bytes_analyzed += size
+                    yield analysis
             
+            await walker
+        finally:
+            stop.set()
+            for _, task in in_flight:
+                task.cancel()
+            progress.finished_at = time.time()
+    
+    def lookup_or_extract(self, file_path: str,
+                          start_time: datetime) -> Tuple[Optional[ThreatAnalysis], Dict[str, Any]]:
+        """CheckCache，未命中时提取Feature
+
+        命中Cache时返回 (analysis, {})，否则返回 (None, features)。
+        """
+        cache_key = None
+        if self.cache is not None:
+            self.ml_detector.ensure_models_loaded()
+            
+            # 廉价Check: File元Data -> sha256 -> CacheResult
+            cache_key = stat_key(os.stat(file_path))
+            digest = self.cache.lookup_digest(cache_key)
+            if digest:
+                cached = self.get_cached_analysis(digest, file_path, start_time)
+                if cached:
+                    return cached, {}
+        
+        if self.feature_extractor.is_large_file(os.path.getsize(file_path)):
+            # 大File: 流式提取过程中Already计算sha256 (采样时取决于hash_mode)，之后再查Cache
+            features = self.feature_extractor.extract_all_features(file_path)
+            if self.cache is not None and features.get('sha256'):
+                self.cache.store_digest(cache_key, features['sha256'])
+                cached = self.get_cached_analysis(features['sha256'], file_path, start_time)
+                if cached:
+                    return cached, {}
+            verdict = self.cascade.run_prefilters(CascadeContext(file_path, features))
+            if verdict is not None:
+                return self.verdict_analysis(file_path, features, verdict, start_time), {}
+            return None, features
+        
+        content = self.feature_extractor.read_file(file_path)
+        digest = hashlib.sha256(content).hexdigest()
+        
+        if self.cache is not None:
+            # 相同Content的File (如不同终端上的同一Install包) 共享Result
+            self.cache.store_digest(cache_key, digest)
+            cached = self.get_cached_analysis(digest, file_path, start_time)
+            if cached:
+                return cached, {}
+        
+        # 廉价阶段 (哈希名单 -> YARA) 能定论时跳过完整Feature提取和ML
+        known = {'sha256': digest, 'file_size': len(content)}
+        
+        def load_feature(key: str) -> Dict[str, Any]:
+            if key in ('yara_matches', 'yara_meta'):
+                return self.feature_extractor.extract_yara_features(file_path, content)
+            if key == 'similar_families':
+                return self.feature_extractor.extract_similarity_features(content)
+            return {}
+        
+        verdict = self.cascade.run_prefilters(CascadeContext(file_path, known, load_feature))
+        if verdict is not None:
+            return self.verdict_analysis(file_path, known, verdict, start_time), {}
+        
+        # 提取Feature
+        return None, self.feature_extractor.extract_all_features(file_path, content, known)
+    
+    def safe_lookup_or_extract(self, file_path: str,
+                               start_time: datetime) -> Tuple[Optional[ThreatAnalysis], Dict[str, Any]]:
+        """批量模式下单个FileFailed不影响整个批次"""
+        try:
+            return self.lookup_or_extract(file_path, start_time)
         except Exception as e:
             logger.error(f"Analysis failed for {file_path}: {e}")
-            return ThreatAnalysis(
-                file_path=file_path,
-                threat_score=0.0,
-                confidence=0.0,
-                threat_type="error",
-                threat_category="unknown",
-                ml_predictions={},
-                analysis_time=start_time
-            )
+            return self.error_analysis(file_path, start_time), {}
+    
+    def finalize_analyses(self, items: List[Tuple[str, Dict[str, Any]]],
+                          start_time: datetime) -> List[ThreatAnalysis]:
+        """对一批Feature记录进行矩阵Prediction并生成Result
+
+        ML分数落在不确定区间的File再交给DepthModel阶段 (如果配置了)。
+        """
+        ml_start = time.perf_counter()
+        ml_predictions = self.ml_detector.predict_batch(
+            [features for _, features in items], [file_path for file_path, _ in items]
+        )
+        analyses = [
+            self.build_analysis(file_path, features, start_time, predictions)
+            for (file_path, features), predictions in zip(items, ml_predictions)
+        ]
+        
+        deep_stage = self.cascade.deep_stage
+        uncertain = [analysis for analysis in analyses
+                     if deep_stage is not None and deep_stage.should_run(analysis.threat_score)]
+        self.cascade.record('ml', len(analyses), len(analyses) - len(uncertain),
+                            time.perf_counter() - ml_start)
+        
+        if uncertain:
+            deep_start = time.perf_counter()
+            for analysis in uncertain:
+                self.apply_deep_predictions(analysis, deep_stage.predict(analysis.features))
+            self.cascade.record('deep', len(uncertain), len(uncertain), time.perf_counter() - deep_start)
+        
+        if self.cache is not None:
+            verdict_version = self.verdict_version()
+            for analysis in analyses:
+                self.cache_analysis(analysis, verdict_version)
+        
+        return analyses
+    
+    def cache_analysis(self, analysis: ThreatAnalysis, verdict_version: str):
+        """CacheResult；sha256还在后台计算时暂存，等哈希完成后写入"""
+        features = analysis.features
+        if features.get('sha256'):
+            self.cache.put(features['sha256'], verdict_version, analysis_to_record(analysis))
+            return
+        if features.get('hash_mode') != 'background':
+            return
+        
+        try:
+            key = stat_key(os.stat(analysis.file_path))
+        except OSError:
+            return
+        record = analysis_to_record(analysis)
+        with self._pending_lock:
+            digest = self.cache.digests.get(key)
+            if digest is None:
+                self._pending_verdicts[analysis.file_path] = (key, verdict_version, record)
+                return
+        self.cache.put(digest, verdict_version, record)
+    
+    def on_background_hash(self, file_path: str, stat: os.stat_result, hashes: Dict[str, str]):
+        """后台哈希完成: 记录元Data到sha256的映射，并写入等待该哈希的Result"""
+        key = stat_key(stat)
+        with self._pending_lock:
+            self.cache.store_digest(key, hashes['sha256'])
+            pending = self._pending_verdicts.pop(file_path, None)
+        # File在哈希期间被修改时丢弃暂存的Result
+        if pending is not None and pending[0] == key:
+            _, verdict_version, record = pending
+            record['features'] = {**record.get('features', {}), **hashes}
+            self.cache.put(hashes['sha256'], verdict_version, record)
+    
+    def apply_deep_predictions(self, analysis: ThreatAnalysis, dl_predictions: Dict[str, float]):
+        """用DepthModelPrediction更新ML不确定的Result"""
+        analysis.dl_predictions = dl_predictions
+        if 'threat_score' not in dl_predictions:
+            return
+        analysis.threat_score = float(dl_predictions['threat_score'])
+        if 'confidence' in dl_predictions:
+            analysis.confidence = float(dl_predictions['confidence'])
+        analysis.threat_category = self.categorize_threat(analysis.threat_score)
+        analysis.recommendations = self.generate_recommendations(analysis.threat_score, analysis.threat_type)
+        analysis.verdict_stage = 'deep'
+    
+    def verdict_analysis(self, file_path: str, features: Dict[str, Any], verdict: StageVerdict,
+                         start_time: datetime) -> ThreatAnalysis:
+        """由级联廉价阶段的确定Verdict生成Result (不运行ML)"""
+        features['verdict_reason'] = verdict.reason
+        analysis = ThreatAnalysis(
+            file_path=file_path,
+            threat_score=verdict.threat_score,
+            confidence=verdict.confidence,
+            threat_type=verdict.threat_type,
+            threat_category=self.categorize_threat(verdict.threat_score),
+            ml_predictions={},
+            features=features,
+            recommendations=self.generate_recommendations(verdict.threat_score, verdict.threat_type),
+            analysis_time=start_time,
+            verdict_stage=verdict.stage
+        )
+        if self.cache is not None:
+            self.cache_analysis(analysis, self.verdict_version())
+        return analysis
+    
+    def verdict_version(self) -> str:
+        """CacheResult的Version: ModelVersion + 级联配置 (哈希名单、YARARules)"""
+        return f"{self.ml_detector.model_version}:{self.cascade.version}"
+    
+    def error_analysis(self, file_path: str, start_time: datetime) -> ThreatAnalysis:
+        """AnalysisFailed时的Result"""
+        return ThreatAnalysis(
+            file_path=file_path,
+            threat_score=0.0,
+            confidence=0.0,
+            threat_type="error",
+            threat_category="unknown",
+            ml_predictions={},
+            analysis_time=start_time
+        )
+    
+    def get_cached_analysis(self, digest: str, file_path: str,
+                            analysis_time: datetime) -> Optional[ThreatAnalysis]:
+        """从Cache获取AnalysisResult
+
+        Verdict按sha256共享，与路径相关的Feature (扩展名) 和由它决定的威胁Type按当前File重新计算。
+        """
+        record = self.cache.get(digest, self.verdict_version())
+        if record is None:
+            return None
+        analysis = analysis_from_record(record, file_path, analysis_time)
+        
+        features = dict(analysis.features)
+        features['file_extension'] = Path(file_path).suffix.lower()
+        analysis.features = features
+        if analysis.verdict_stage == 'ml':
+            # 级联阶段的Verdict不依赖路径
+            analysis.threat_type = self.determine_threat_type(features, analysis.ml_predictions)
+            analysis.recommendations = self.generate_recommendations(analysis.threat_score, analysis.threat_type)
+        return analysis
+    
+    def build_analysis(self, file_path: str, features: Dict[str, Any], start_time: datetime,
+                       ml_predictions: Optional[Dict[str, float]] = None) -> ThreatAnalysis:
+        """基于Feature记录生成AnalysisResult"""
+        # MLPrediction (复用同一份Feature记录)
+        if ml_predictions is None:
+            ml_predictions = self.ml_detector.predict_features(features, file_path)
+        
+        # Calculate综合威胁评分
+        threat_score = self.calculate_threat_score(ml_predictions, features)
+        
+        # 确定威胁Type
+        threat_type = self.determine_threat_type(features, ml_predictions)
+        
+        # Calculate置信度
+        confidence = self.calculate_confidence(ml_predictions)
+        
+        # 生成建议
+        recommendations = self.generate_recommendations(threat_score, threat_type)
+        
+        return ThreatAnalysis(
+            file_path=file_path,
+            threat_score=threat_score,
+            confidence=confidence,
+            threat_type=threat_type,
+            threat_category=self.categorize_threat(threat_score),
+            ml_predictions=ml_predictions,
+            features=features,
+            recommendations=recommendations,
+            analysis_time=start_time
+        )
     
     def calculate_threat_score(self, ml_predictions: Dict[str, float], 
                              features: Dict[str, Any]) -> float:
@@ -611,6 +1745,31 @@ class IntelligentThreatDetector:
         
         return recommendations
 
+# Analysis执行器Process模式的Worker进程状态: 每个Worker持HasOwn的检测器，
+# 由_init_analysis_worker初始化，以下函数在Worker中执行单个File的分析
+_worker_detector: Optional[IntelligentThreatDetector] = None
+
+
+def _init_analysis_worker(model_dir: str, yara_rules_path: Optional[str] = None,
+                          cache_db_path: Optional[str] = None):
+    """Process池Worker初始化: 每个WorkerCreateOwn的检测器"""
+    global _worker_detector
+    cache = AnalysisCache(cache_db_path) if cache_db_path else None
+    _worker_detector = IntelligentThreatDetector(
+        model_dir, cache=cache, enable_cache=cache is not None,
+        yara_rules_path=yara_rules_path, execution_mode='thread'
+    )
+
+
+def _analyze_file_in_worker(file_path: str) -> ThreatAnalysis:
+    return _worker_detector.analyze_file_sync(file_path)
+
+
+def _lookup_or_extract_in_worker(file_path: str,
+                                 start_time: datetime) -> Tuple[Optional[ThreatAnalysis], Dict[str, Any]]:
+    return _worker_detector.safe_lookup_or_extract(file_path, start_time)
+
+
 # 使用Example
 async def main():
     """Main FunctionExample"""
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+IOC扫描器
+IP、哈希、域名和进程名只会出现在由 [\\w.-] 组成的词元中: 一个预编译的正则单次扫描Text得到
+可能包含它们的词元 (含 '.' 或足够长)，再按词元内容分类和Validation；URL、邮箱、File路径和
+注册Table键只在Text包含其特征Character时才扫描。Result与每种Type各自re.findall一遍相同。
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+from pattern_matcher import segment_starts
+
+# 各Type的原始模式 (domain只用非捕获组，findall返回完整域名而不是分组元组)
+IOC_PATTERNS = {
+    'ip_address': r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
+    'domain': r'\b[a-zA-Z0-9](?:[a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*\.[a-zA-Z]{2,}\b',
+    'url': r'https?://[^\s<>"{}|\\^`\[\]]+',
+    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'md5': r'\b[a-fA-F0-9]{32}\b',
+    'sha1': r'\b[a-fA-F0-9]{40}\b',
+    'sha256': r'\b[a-fA-F0-9]{64}\b',
+    'file_path': r'[A-Za-z]:\\(?:[^\\/:*?"<>|\r\n]+\\)*[^\\/:*?"<>|\r\n]*',
+    'registry_key': r'HKEY_[A-Z_]+\\[^\\]+(?:\\[^\\]+)*',
+    'process_name': r'\b[a-zA-Z0-9_-]+\.exe\b'
+}
+
+# 词元: 前后都不是 [\w.-] 的最长片段，含 '.' 或足够长 (可能是哈希)
+TOKEN_PATTERN = r'(?<![\w.\-])(?:[\w\-]*\.[\w.\-]*|[\w\-]{32,}(?![\w.\-]))'
+
+# 可以跨越词元的Type -> Text中必须包含的Character (不包含时跳过该Type的扫描)
+SPAN_TRIGGERS = {
+    'url': '://',
+    'email': '@',
+    'file_path': ':\\',
+    'registry_key': '\\',
+}
+
+HASH_PATTERN = r'\b(?:(?P<sha256>[a-fA-F0-9]{64})|(?P<sha1>[a-fA-F0-9]{40})|(?P<md5>[a-fA-F0-9]{32}))\b'
+
+# 被视为误报的域名
+COMMON_DOMAINS = frozenset(['localhost', 'example.com', 'test.com'])
+
+
+def is_valid_ioc(ioc_type: str, ioc_value: str) -> bool:
+    """ValidationIOC的Has效性"""
+    if ioc_type == 'ip_address':
+        try:
+            return all(0 <= int(part) <= 255 for part in ioc_value.split('.'))
+        except ValueError:
+            return False
+    if ioc_type == 'domain':
+        return ioc_value.lower() not in COMMON_DOMAINS
+    if ioc_type in ('md5', 'sha1', 'sha256'):
+        return ioc_value.isalnum()
+    return True
+
+
+class IOCScanner:
+    """单次扫描的IOC提取器
+
+    Result与对每种Type分别 re.findall(pattern, text, re.IGNORECASE) 去重后相同，
+    每种Type内按首次出现的顺序排列。
+    """
+
+    def __init__(self):
+        self.token_regex = re.compile(TOKEN_PATTERN)
+        self.span_regexes = {kind: re.compile(IOC_PATTERNS[kind], re.IGNORECASE) for kind in SPAN_TRIGGERS}
+        self.ip_regex = re.compile(IOC_PATTERNS['ip_address'], re.IGNORECASE)
+        self.domain_regex = re.compile(IOC_PATTERNS['domain'], re.IGNORECASE)
+        self.process_regex = re.compile(IOC_PATTERNS['process_name'], re.IGNORECASE)
+        self.hash_regex = re.compile(HASH_PATTERN, re.IGNORECASE)
+
+    def scan(self, text: str, validate: bool = False) -> Dict[str, List[str]]:
+        """提取IOC (validate=True时同时过滤无效值，等价于再调用validate_iocs)"""
+        found: Dict[str, Dict[str, None]] = {}
+        for token in self.token_regex.findall(text):
+            self.classify_token(token, found)
+        self.scan_spans(text, found)
+        return self.collect(found, validate)
+
+    def scan_batch(self, texts: List[str], validate: bool = False) -> List[Dict[str, List[str]]]:
+        """批量提取，Result与逐条scan相同
+
+        词元不含换行，所以用换行拼接后只做一次词元扫描，再按偏移归属到各条Text；
+        跨越词元的Type仍逐条扫描 (注册Table键可以跨行)。
+        """
+        found: List[Dict[str, Dict[str, None]]] = [{} for _ in texts]
+        starts = segment_starts(texts)
+        for match in self.token_regex.finditer('\n'.join(texts)):
+            self.classify_token(match.group(), found[bisect_right(starts, match.start()) - 1])
+        for text, text_found in zip(texts, found):
+            self.scan_spans(text, text_found)
+        return [self.collect(text_found, validate) for text_found in found]
+
+    def scan_spans(self, text: str, found: Dict[str, Dict[str, None]]):
+        for kind, trigger in SPAN_TRIGGERS.items():
+            if trigger in text:
+                for value in self.span_regexes[kind].findall(text):
+                    found.setdefault(kind, {})[value] = None
+
+    def collect(self, found: Dict[str, Dict[str, None]], validate: bool) -> Dict[str, List[str]]:
+        iocs = {}
+        for ioc_type in IOC_PATTERNS:
+            if ioc_type not in found:
+                continue
+            values = list(found[ioc_type])
+            if validate:
+                values = [value for value in values if is_valid_ioc(ioc_type, value)]
+            if values:
+                iocs[ioc_type] = values
+        return iocs
+
+    def classify_token(self, token: str, found: Dict[str, Dict[str, None]]):
+        """词元中的哈希、IP、域名和进程名 (词元边界处的\\b与在整段Text中相同)"""
+        if len(token) >= 32:
+            for match in self.hash_regex.finditer(token):
+                found.setdefault(match.lastgroup, {})[match.group()] = None
+        if '.' not in token:
+            return
+        if token.count('.') >= 3:
+            for value in self.ip_regex.findall(token):
+                found.setdefault('ip_address', {})[value] = None
+        for value in self.domain_regex.findall(token):
+            found.setdefault('domain', {})[value] = None
+        if '.exe' in token.lower():
+            for value in self.process_regex.findall(token):
+                found.setdefault('process_name', {})[value] = None
+
+
+def extract_iocs_reference(text: str, patterns: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+    """参考实现: 每种Type单独re.findall (用于TestResult一致性和Benchmark)"""
+    iocs = {}
+    for ioc_type, pattern in (patterns or IOC_PATTERNS).items():
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        if matches:
+            iocs[ioc_type] = list(dict.fromkeys(matches))
+    return iocs
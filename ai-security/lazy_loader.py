@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+延迟Load工具
+Module代理在第一次访问属性时才导入，Model在第一次使用时才加载，
+使Service启动时不必付出sklearn/xgboost/torch/spaCy等重量级依赖的代价
+"""
+
+import importlib
+import importlib.util
+import logging
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def module_available(name: str) -> bool:
+    """Module是否可导入 (只查找，不执行导入)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule(ModuleType):
+    """Module代理: 第一次访问属性时才导入真实Module"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+                    logger.debug(f"Imported {self.__name__} in {time.perf_counter() - start:.2f}s")
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__['_lazy_module'] is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """返回Module代理 (导入推迟到第一次访问属性)"""
+    return LazyModule(name)
+
+
+class LazyModel:
+    """首次使用时加载的Model
+
+    加载函数只执行一次 (线程安全)；加载Failed时记录错误并返回None，之后不再重试。
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], available: bool = True):
+        self.name = name
+        self.loader = loader
+        self.available = available
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+        self._value: Any = None
+        self._attempted = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._attempted and self.error is None and self._value is not None
+
+    @property
+    def settled(self) -> bool:
+        """是否Already有最终状态 (加载Complete、Failed或依赖不可用)"""
+        return self._attempted or not self.available
+
+    def get(self) -> Any:
+        """获取Model，必要时加载"""
+        if self._attempted or not self.available:
+            return self._value
+        with self._lock:
+            if not self._attempted:
+                start = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                    logger.info(f"Loaded {self.name} in {time.perf_counter() - start:.2f}s")
+                except Exception as e:
+                    self.error = str(e)
+                    logger.warning(f"Failed to load {self.name}: {e}")
+                self.load_seconds = time.perf_counter() - start
+                self._attempted = True
+        return self._value
+
+    def set(self, value: Any):
+        """直接Settings (如Test或外部Already加载的Model)"""
+        with self._lock:
+            self._value = value
+            self.error = None
+            self._attempted = True
+
+    def status(self) -> Dict[str, Any]:
+        if not self.available:
+            state = 'unavailable'
+        elif not self._attempted:
+            state = 'pending'
+        elif self.error is not None:
+            state = 'failed'
+        else:
+            state = 'loaded'
+        return {
+            'state': state,
+            'load_seconds': self.load_seconds,
+            'error': self.error
+        }
+
+
+def loaded_modules(names: Iterable[str]) -> Dict[str, bool]:
+    """哪些Module已被导入 (不会触发导入)"""
+    return {name: name in sys.modules for name in names}
+
+
+def warm_up(loaders: Iterable[Callable[[], Any]]) -> threading.Thread:
+    """在后台线程中依次Execute加载函数"""
+    loaders = list(loaders)
+
+    def run():
+        for loader in loaders:
+            try:
+                loader()
+            except Exception as e:
+                logger.warning(f"Warm-up step failed: {e}")
+        logger.info("Warm-up complete")
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Log模板挖掘
+Drain风格的在线模板挖掘: 含数字的词元视为变量，按词元数和前几个词元在固定深度的前缀树中
+找到候选模板组，再按相同词元的比例选出最相似的模板 (不够相似时新建)。同一模板的Log
+共享一份Model输出Cache，只有变量相关的部分 (IOC等Rules结果) 逐行重新计算。
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from analysis_cache import LRUCache
+
+WILDCARD = '<*>'
+
+DEFAULT_DEPTH = 4
+DEFAULT_SIMILARITY_THRESHOLD = 0.5
+DEFAULT_MAX_CHILDREN = 100
+DEFAULT_MAX_TEMPLATES = 50000
+
+# 前缀树中挂模板ID列Table的键 (不会与词元冲突)
+_LEAF = None
+
+_has_digit = re.compile(r'\d').search
+
+
+@dataclass
+class LogTemplate:
+    """Log模板: 变量位置为WILDCARD"""
+    template_id: int
+    tokens: List[str]
+    size: int = 0
+
+    @property
+    def template(self) -> str:
+        return ' '.join(self.tokens)
+
+
+def tokenize(line: str) -> List[str]:
+    """按空白切分，含数字的词元 (IP、端口、PID、哈希等) 替换为WILDCARD"""
+    return [WILDCARD if _has_digit(token) else token for token in line.split()]
+
+
+def similarity(template_tokens: List[str], tokens: List[str]) -> Tuple[float, int]:
+    """(相同或处于变量位置的词元比例, 变量位置数)"""
+    if not tokens:
+        return 1.0, 0
+    same = wildcards = 0
+    for template_token, token in zip(template_tokens, tokens):
+        if template_token == WILDCARD:
+            wildcards += 1
+        elif template_token == token:
+            same += 1
+    return (same + wildcards) / len(tokens), wildcards
+
+
+class TemplateMiner:
+    """在线Log模板挖掘器 (线程安全)
+
+    - depth: 前缀树深度，包括按词元数分组的一层 (至少2)
+    - similarity_threshold: 加入已有模板所需的最小相似度
+    - max_children: 每个内部节点的子节点上限，超过后新词元走WILDCARD分支
+    - max_templates: 模板数上限，超过时淘汰最久未命中的模板
+    """
+
+    def __init__(self, depth: int = DEFAULT_DEPTH, similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 max_children: int = DEFAULT_MAX_CHILDREN, max_templates: int = DEFAULT_MAX_TEMPLATES):
+        if depth < 2:
+            raise ValueError(f"depth must be at least 2, got {depth}")
+        self.prefix_depth = depth - 2
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self.max_templates = max_templates
+
+        self.root: Dict[Any, Any] = {}
+        self.templates: 'OrderedDict[int, LogTemplate]' = OrderedDict()
+        self._leaves: Dict[int, List[int]] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._stats = {'lines': 0, 'created': 0, 'updated': 0, 'evicted': 0}
+
+    def add(self, line: str) -> Tuple[int, bool]:
+        """把一行Log归入模板，返回 (模板ID, 模板是否新建或发生变化)"""
+        tokens = tokenize(line)
+        with self._lock:
+            self._stats['lines'] += 1
+            leaf = self._leaf(tokens, create=True)
+            template, score = self._best_match(leaf, tokens)
+
+            if template is None:
+                template = LogTemplate(self._next_id, tokens)
+                self._next_id += 1
+                self.templates[template.template_id] = template
+                self._leaves[template.template_id] = leaf
+                leaf.append(template.template_id)
+                self._stats['created'] += 1
+                changed = True
+                self._evict()
+            else:
+                # 相似度为1时所有词元都相同或处于变量位置，模板不变
+                changed = score < 1.0
+                if changed:
+                    template.tokens = [
+                        template_token if template_token == token else WILDCARD
+                        for template_token, token in zip(template.tokens, tokens)
+                    ]
+                    self._stats['updated'] += 1
+                self.templates.move_to_end(template.template_id)
+
+            template.size += 1
+            return template.template_id, changed
+
+    def match(self, line: str) -> Optional[int]:
+        """只查找不更新: 返回匹配的模板ID或None"""
+        tokens = tokenize(line)
+        with self._lock:
+            leaf = self._leaf(tokens, create=False)
+            template = self._best_match(leaf, tokens)[0] if leaf is not None else None
+            return template.template_id if template is not None else None
+
+    def get_template(self, template_id: int) -> Optional[str]:
+        with self._lock:
+            template = self.templates.get(template_id)
+            return template.template if template is not None else None
+
+    def has_text_variables(self, template_id: int, line: str) -> bool:
+        """该行在模板变量位置上是否有不含数字的词元 (如用户名、主机名)"""
+        with self._lock:
+            template = self.templates.get(template_id)
+            if template is None:
+                return False
+            template_tokens = template.tokens
+        return any(template_token == WILDCARD and not _has_digit(token)
+                   for template_token, token in zip(template_tokens, line.split()))
+    
+    def _leaf(self, tokens: List[str], create: bool) -> Optional[List[int]]:
+        node = self.root.get(len(tokens))
+        if node is None:
+            if not create:
+                return None
+            node = self.root[len(tokens)] = {}
+
+        for token in tokens[:self.prefix_depth]:
+            if token in node:
+                node = node[token]
+            elif WILDCARD in node and (not create or len(node) >= self.max_children):
+                node = node[WILDCARD]
+            elif not create:
+                return None
+            else:
+                key = token if len(node) < self.max_children - 1 else WILDCARD
+                node = node.setdefault(key, {})
+
+        if _LEAF not in node:
+            if not create:
+                return None
+            node[_LEAF] = []
+        return node[_LEAF]
+
+    def _best_match(self, leaf: List[int], tokens: List[str]) -> Tuple[Optional[LogTemplate], float]:
+        """(最相似的模板或None, 相似度)"""
+        best = None
+        best_key = (-1.0, -1)
+        for template_id in leaf:
+            template = self.templates[template_id]
+            key = similarity(template.tokens, tokens)
+            if key > best_key:
+                best, best_key = template, key
+        if best is None or best_key[0] < self.similarity_threshold:
+            return None, best_key[0]
+        return best, best_key[0]
+
+    def _evict(self):
+        while len(self.templates) > self.max_templates:
+            template_id, _ = self.templates.popitem(last=False)
+            self._leaves.pop(template_id).remove(template_id)
+            self._stats['evicted'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['templates'] = len(self.templates)
+        return stats
+
+    def __len__(self):
+        return len(self.templates)
+
+
+class TemplateCache:
+    """模板ID -> Model输出的Cache
+
+    模板发生变化 (新出现变量位置) 时丢弃其Cache，下一行重新计算；命中率按查询的Log行数统计，
+    未命中Cache但复用了同一批次中同模板其他行输出的行计为shared；
+    复用输出但变量位置是文本 (需重新提取实体) 的行计为entity_reruns。
+    """
+
+    def __init__(self, miner: Optional[TemplateMiner] = None, max_entries: int = DEFAULT_MAX_TEMPLATES):
+        self.miner = miner or TemplateMiner(max_templates=max_entries)
+        self.results = LRUCache(max_entries)
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'shared': 0, 'invalidations': 0, 'entity_reruns': 0}
+
+    def lookup(self, line: str) -> Tuple[int, Optional[Any]]:
+        """返回 (模板ID, 已Cache的输出或None)"""
+        template_id, changed = self.miner.add(line)
+        if changed:
+            value = None
+            if self.results.pop(template_id) is not None:
+                self._count('invalidations')
+        else:
+            value = self.results.get(template_id)
+        self._count('misses' if value is None else 'hits')
+        return template_id, value
+
+    def store(self, template_id: int, value: Any):
+        self.results.put(template_id, value)
+
+    def record_shared(self, count: int):
+        """count行未命中的Log复用了同批次代Table行的输出"""
+        if count:
+            self._count('shared', count)
+
+    def record_entity_reruns(self, count: int):
+        """count行复用了模板输出但重新提取了实体"""
+        if count:
+            self._count('entity_reruns', count)
+
+    def _count(self, name: str, count: int = 1):
+        with self._stats_lock:
+            self._stats[name] += count
+
+    def stats(self) -> Dict[str, Any]:
+        """模板命中率和Cache大小"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['shared']) / lookups if lookups else 0.0
+        stats['size'] = len(self.results)
+        stats['miner'] = self.miner.stats()
+        return stats
+
+    def clear(self):
+        self.results.clear()
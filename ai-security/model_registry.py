@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+ModelVersion注册表
+每个Version是 versions/<version>/ 下一个不可变的Directory (joblibModel + 编译后的数组 + 清单)，
+"current" 符号链接指向当前Version，发布新Version时原子切换，Process可以随时安全地读取
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CURRENT_LINK = 'current'
+VERSIONS_DIR = 'versions'
+MANIFEST_NAME = 'manifest.json'
+
+
+def new_version_id() -> str:
+    """按时间排序的Version号"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class ModelRegistry:
+    """ModelVersion注册表
+
+    root/
+      versions/<version>/   Model文件和 manifest.json (发布后不再修改)
+      current -> versions/<version>
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.versions_dir = self.root / VERSIONS_DIR
+        self.current_link = self.root / CURRENT_LINK
+
+    def current_version(self) -> Optional[str]:
+        """当前Version (未发布过时返回None)"""
+        try:
+            return Path(os.readlink(self.current_link)).name
+        except OSError:
+            return None
+
+    def current_path(self) -> Optional[Path]:
+        version = self.current_version()
+        return self.version_path(version) if version else None
+
+    def version_path(self, version: str) -> Path:
+        return self.versions_dir / version
+
+    def stage(self) -> Path:
+        """Create临时Directory，写完Model后交给publish"""
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        path = self.versions_dir / f".staging-{uuid.uuid4().hex[:8]}"
+        path.mkdir()
+        return path
+
+    def publish(self, staged: Path, version: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None,
+                activate: bool = True) -> str:
+        """把临时Directory发布为新Version，默认同时设为当前Version"""
+        version = version or new_version_id()
+        manifest = {
+            'version': version,
+            'created_at': time.time(),
+            'files': sorted(path.name for path in Path(staged).iterdir()),
+            **(metadata or {})
+        }
+        with open(Path(staged) / MANIFEST_NAME, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+
+        os.rename(staged, self.version_path(version))
+        logger.info(f"Published model version {version}")
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str):
+        """原子切换当前Version (新建符号链接后rename覆盖)"""
+        if not self.version_path(version).is_dir():
+            raise ValueError(f"Unknown model version {version}")
+        tmp_link = self.root / f".{CURRENT_LINK}-{uuid.uuid4().hex[:8]}"
+        os.symlink(os.path.join(VERSIONS_DIR, version), tmp_link)
+        os.replace(tmp_link, self.current_link)
+        logger.info(f"Activated model version {version}")
+
+    def manifest(self, version: str) -> Dict[str, Any]:
+        try:
+            with open(self.version_path(version) / MANIFEST_NAME) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'version': version}
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """所Has已发布Version (按时间排序)"""
+        if not self.versions_dir.is_dir():
+            return []
+        current = self.current_version()
+        versions = []
+        for path in sorted(self.versions_dir.iterdir()):
+            if path.is_dir() and not path.name.startswith('.'):
+                manifest = self.manifest(path.name)
+                manifest['current'] = path.name == current
+                versions.append(manifest)
+        return versions
+
+    def prune(self, keep: int = 5) -> List[str]:
+        """删除旧Version (当前Version总是保留)；已映射这些File的Process不受影响"""
+        current = self.current_version()
+        versions = [manifest['version'] for manifest in self.list_versions()]
+        removed = []
+        for version in versions[:-keep] if keep else versions:
+            if version != current:
+                shutil.rmtree(self.version_path(version), ignore_errors=True)
+                removed.append(version)
+        return removed
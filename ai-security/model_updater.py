@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+后台增量ModelUpdate
+定期检查FeatureShardStore中尚未Training过的分片，在当前Version上增量Update
+(Feature列变化或Boosting轮数过多时从全部分片重新Training)，发布为注册表新Version；
+服务Process通过 MLThreatDetector.reload_if_changed() 切换，无需重启
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from feature_store import FeatureShardStore
+from intelligent_threat_detector import MLThreatDetector
+from model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+# 启用后台Update的Feature分片Directory和检查间隔 (秒)
+SHARDS_PATH_ENV = 'HUNTERMATRIX_FEATURE_SHARDS'
+UPDATE_INTERVAL_ENV = 'HUNTERMATRIX_MODEL_UPDATE_INTERVAL'
+DEFAULT_UPDATE_INTERVAL = 3600.0
+
+# 累计到这么多新Sample才Update一次
+MIN_UPDATE_SAMPLES = 1000
+
+# 威胁评分器的Boosting轮数超过此值时改为全量重新Training
+MAX_BOOSTING_ROUNDS = 500
+
+# 注册表中保留的Version数
+KEEP_VERSIONS = 10
+
+
+class ModelUpdateJob:
+    """后台增量Training任务
+
+    每次运行都用一个独立的MLThreatDetector (不与服务实例共享Model对象)，
+    Training在后台Thread进行，发布后调用on_publish (通常是服务实例的reload_if_changed)。
+    Model清单的 'shards' 记录该Version已Training过的分片。
+    """
+
+    def __init__(self, model_dir: str, shard_store: FeatureShardStore,
+                 interval: float = DEFAULT_UPDATE_INTERVAL, min_samples: int = MIN_UPDATE_SAMPLES,
+                 max_boosting_rounds: int = MAX_BOOSTING_ROUNDS, keep_versions: int = KEEP_VERSIONS,
+                 on_publish: Optional[Callable[[str], Any]] = None):
+        self.model_dir = model_dir
+        self.shard_store = shard_store
+        self.interval = interval
+        self.min_samples = min_samples
+        self.max_boosting_rounds = max_boosting_rounds
+        self.keep_versions = keep_versions
+        self.on_publish = on_publish
+        self.registry = ModelRegistry(model_dir)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            'runs': 0,
+            'incremental_updates': 0,
+            'full_retrains': 0,
+            'last_run_at': None,
+            'last_version': None,
+            'last_report': None,
+            'last_error': None
+        }
+
+    @classmethod
+    def from_env(cls, model_dir: str, **kwargs) -> Optional['ModelUpdateJob']:
+        """HUNTERMATRIX_FEATURE_SHARDS设置时Create任务，否则返回None"""
+        shards_path = os.environ.get(SHARDS_PATH_ENV)
+        if not shards_path:
+            return None
+        interval = float(os.environ.get(UPDATE_INTERVAL_ENV, DEFAULT_UPDATE_INTERVAL))
+        return cls(model_dir, FeatureShardStore(shards_path), interval=interval, **kwargs)
+
+    def trained_shards(self) -> List[str]:
+        """当前Version已Training过的分片"""
+        version = self.registry.current_version()
+        return list(self.registry.manifest(version).get('shards', [])) if version else []
+
+    def needs_full_retrain(self, trainer: MLThreatDetector) -> bool:
+        if not trainer.load_estimators() or not trainer.can_update_incrementally():
+            return True
+        rounds = trainer.models['threat_scorer'].get_booster().num_boosted_rounds()
+        return rounds >= self.max_boosting_rounds
+
+    def run_once(self) -> Optional[Dict[str, Any]]:
+        """Training一次 (没有足够的新Sample时返回None)"""
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['last_run_at'] = time.time()
+            try:
+                trainer = MLThreatDetector(self.model_dir)
+                consumed = self.trained_shards()
+                pending = self.shard_store.pending(consumed)
+                if not pending:
+                    return None
+
+                feature_set = self.shard_store.load(pending, trainer.feature_names)
+                if len(feature_set) < self.min_samples:
+                    logger.info(f"{len(feature_set)} new samples, waiting for {self.min_samples}")
+                    return None
+
+                if self.needs_full_retrain(trainer):
+                    # 全量Training从Default超参数的新Model开始
+                    trainer = MLThreatDetector(self.model_dir)
+                    shards = self.shard_store.shard_names()
+                    logger.info(f"Full retrain on {len(shards)} feature shards")
+                    report = trainer.fit_models(self.shard_store.load(shards, trainer.feature_names),
+                                                metadata={'shards': shards})
+                    self._stats['full_retrains'] += 1
+                else:
+                    logger.info(f"Incremental update on {len(pending)} feature shards")
+                    report = trainer.update_models(feature_set, metadata={'shards': consumed + pending})
+                    self._stats['incremental_updates'] += 1
+
+                report = {key: value for key, value in report.items() if key != 'failed'}
+                self._stats['last_report'] = report
+                self._stats['last_error'] = None
+                version = report.get('model_version')
+                if version:
+                    self._stats['last_version'] = version
+                    self.registry.prune(self.keep_versions)
+                    if self.on_publish is not None:
+                        self.on_publish(version)
+                return report
+
+            except Exception as e:
+                logger.error(f"Model update failed: {e}")
+                self._stats['last_error'] = str(e)
+                return None
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        """在后台ThreadStart定期Update"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='model-update', daemon=True)
+            self._thread.start()
+            logger.info(f"Model update job started (interval {self.interval}s, shards {self.shard_store.root})")
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        status = dict(self._stats)
+        status.update({
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval': self.interval,
+            'shards': str(self.shard_store.root),
+            'pending_shards': len(self.shard_store.pending(self.trained_shards()))
+        })
+        return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally update threat detection models from feature shards")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--shards', default=os.environ.get(SHARDS_PATH_ENV), required=SHARDS_PATH_ENV not in os.environ)
+    parser.add_argument('--min-samples', type=int, default=MIN_UPDATE_SAMPLES)
+    parser.add_argument('--interval', type=float, default=None,
+                        help="Keep running and check every N seconds (default: run once)")
+    args = parser.parse_args()
+
+    job = ModelUpdateJob(args.model_dir, FeatureShardStore(args.shards), min_samples=args.min_samples,
+                         interval=args.interval or DEFAULT_UPDATE_INTERVAL)
+    report = job.run_once()
+    logger.info(f"Update result: {report}")
+    if args.interval:
+        job.run()
+
+
+if __name__ == '__main__':
+    main()
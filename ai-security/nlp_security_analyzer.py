@@ -6,29 +6,62 @@ NLPSecurityAnalysis器
 
 import asyncio
 import re
+from bisect import bisect_right
 import json
 import logging
+import os
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 import numpy as np
 
-# NLPLibrary
-try:
-    import spacy
-    import nltk
-    from transformers import pipeline, AutoTokenizer, AutoModel
-    from sentence_transformers import SentenceTransformer
-    import openai
-    NLP_AVAILABLE = True
-except ImportError:
-    NLP_AVAILABLE = False
+from indicator_store import IndicatorStore
+from inference_scheduler import InferenceScheduler
+from ioc_scanner import IOC_PATTERNS, IOCScanner, is_valid_ioc
+from lazy_loader import LazyModel, lazy_import, module_available
+from log_templates import TemplateCache
+from pattern_matcher import MultiPatternMatcher, segment_starts
+
+# NLPLibrary (延迟导入，Model在第一次使用时加载)
+spacy = lazy_import('spacy')
+nltk = lazy_import('nltk')
+transformers = lazy_import('transformers')
+sentence_transformers = lazy_import('sentence_transformers')
+openai = lazy_import('openai')
+NLP_AVAILABLE = all(module_available(name) for name in
+                    ('spacy', 'nltk', 'transformers', 'sentence_transformers', 'openai'))
+if not NLP_AVAILABLE:
     logging.warning("NLP libraries not available, some features disabled")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 流式Log分析的微批次: 批次条数上限和第一条Log最多等待的时间
+LOG_BATCH_SIZE = 256
+LOG_BATCH_LATENCY_MS = 50.0
+
+# HF管道内部每次前向的条数
+MODEL_BATCH_SIZE = 32
+
+# 推理调度器合并并发Request: 每批条数上限和最早一条Request最多等待的时间
+INFERENCE_BATCH_SIZE = MODEL_BATCH_SIZE
+INFERENCE_MAX_WAIT_MS = 5.0
+
+# 按Log模板CacheModel输出 (默认开启，设为0关闭)
+TEMPLATE_CACHE_ENV = 'HUNTERMATRIX_LOG_TEMPLATE_CACHE'
+
+# 基于Rules的ExceptionDetection (每条命中加0.2)
+ANOMALY_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'failed.*login',
+    r'access.*denied',
+    r'suspicious.*activity',
+    r'malware.*detected',
+    r'unauthorized.*access',
+    r'brute.*force',
+    r'privilege.*escalation'
+)]
+
 @dataclass
 class LogAnalysisResult:
     """LogAnalysisResult"""
@@ -41,6 +74,8 @@ class LogAnalysisResult:
     sentiment: str
     keywords: List[str]
     classification: str
+    # 命中威胁情报的IOC (IndicatorStore.match_iocs)
+    intel_hits: List[Dict[str, Any]] = field(default_factory=list)
 
 @dataclass
 class ThreatIntelligence:
@@ -59,32 +94,17 @@ class IOCExtractor:
     """威胁Metric提取器"""
     
     def __init__(self):
-        # 正则Table达式模式
-        self.patterns = {
-            'ip_address': r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
-            'domain': r'\b[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*\.[a-zA-Z]{2,}\b',
-            'url': r'https?://[^\s<>"{}|\\^`\[\]]+',
-            'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'md5': r'\b[a-fA-F0-9]{32}\b',
-            'sha1': r'\b[a-fA-F0-9]{40}\b',
-            'sha256': r'\b[a-fA-F0-9]{64}\b',
-            'file_path': r'[A-Za-z]:\\(?:[^\\/:*?"<>|\r\n]+\\)*[^\\/:*?"<>|\r\n]*',
-            'registry_key': r'HKEY_[A-Z_]+\\[^\\]+(?:\\[^\\]+)*',
-            'process_name': r'\b[a-zA-Z0-9_-]+\.exe\b'
-        }
+        # 正则Table达式模式 (由IOCScanner单次扫描)
+        self.patterns = IOC_PATTERNS
+        self.scanner = IOCScanner()
     
-    def extract_iocs(self, text: str) -> Dict[str, List[str]]:
-        """从Text中提取威胁Metric"""
-        iocs = {}
-        
-        for ioc_type, pattern in self.patterns.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                # 去重和Clean
-                unique_matches = list(set(matches))
-                iocs[ioc_type] = unique_matches
-        
-        return iocs
+    def extract_iocs(self, text: str, validate: bool = False) -> Dict[str, List[str]]:
+        """从Text中提取威胁Metric (validate=True时在扫描中同时Validation)"""
+        return self.scanner.scan(text, validate=validate)
+    
+    def extract_iocs_batch(self, texts: List[str], validate: bool = False) -> List[Dict[str, List[str]]]:
+        """批量提取威胁Metric (Result与逐条提取相同)"""
+        return self.scanner.scan_batch(texts, validate=validate)
     
     def validate_iocs(self, iocs: Dict[str, List[str]]) -> Dict[str, List[str]]:
         """Validation和FilterIOC"""
@@ -104,44 +124,59 @@ class IOCExtractor:
     
     def is_valid_ioc(self, ioc_type: str, ioc_value: str) -> bool:
         """ValidationIOC的Has效性"""
-        # 基本Validation逻辑
-        if ioc_type == 'ip_address':
-            parts = ioc_value.split('.')
-            try:
-                return all(0 <= int(part) <= 255 for part in parts)
-            except ValueError:
-                return False
-        
-        elif ioc_type == 'domain':
-            # 排除常见的误报
-            common_domains = ['localhost', 'example.com', 'test.com']
-            return ioc_value.lower() not in common_domains
-        
-        elif ioc_type in ['md5', 'sha1', 'sha256']:
-            # Check是否为Has效的哈希值
-            return ioc_value.isalnum()
-        
-        return True
+        return is_valid_ioc(ioc_type, ioc_value)
 
 class SecurityLogAnalyzer:
     """SecurityLogAnalysis器"""
     
-    def __init__(self):
+    def __init__(self, template_cache: Optional[bool] = None, indicator_store: Optional[IndicatorStore] = None):
         self.ioc_extractor = IOCExtractor()
         
-        # InitializeNLPModel
-        if NLP_AVAILABLE:
-            try:
-                self.nlp = spacy.load("en_core_web_sm")
-                self.sentiment_analyzer = pipeline("sentiment-analysis")
-                self.classifier = pipeline("text-classification", 
-                                         model="microsoft/DialoGPT-medium")
-                self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-            except Exception as e:
-                logger.warning(f"Failed to load NLP models: {e}")
-                self.nlp = None
-        else:
-            self.nlp = None
+        # 提取出的IOC与已加载的威胁情报匹配
+        self.indicator_store = indicator_store if indicator_store is not None else IndicatorStore()
+        
+        # 同一模板的Log共享NER和情感结果，只有IOC等Rules结果逐行计算
+        if template_cache is None:
+            template_cache = os.environ.get(TEMPLATE_CACHE_ENV, '1').lower() in ('1', 'true', 'yes')
+        self.template_cache = TemplateCache() if template_cache else None
+        
+        # NLPModel在第一次使用时加载，加载Failed的Model返回None
+        self.model_loaders = {
+            'nlp': LazyModel(
+                'spaCy en_core_web_sm', lambda: spacy.load("en_core_web_sm"),
+                available=NLP_AVAILABLE
+            ),
+            'sentiment_analyzer': LazyModel(
+                'sentiment-analysis pipeline', lambda: transformers.pipeline("sentiment-analysis"),
+                available=NLP_AVAILABLE
+            ),
+            'classifier': LazyModel(
+                'text-classification pipeline',
+                lambda: transformers.pipeline("text-classification", model="microsoft/DialoGPT-medium"),
+                available=NLP_AVAILABLE
+            ),
+            'sentence_model': LazyModel(
+                'SentenceTransformer all-MiniLM-L6-v2',
+                lambda: sentence_transformers.SentenceTransformer('all-MiniLM-L6-v2'),
+                available=NLP_AVAILABLE
+            )
+        }
+        
+        # 模型推理经调度器执行: 并发Request合并成批次，在各自的Worker线程上调用一次Model
+        self.schedulers = {
+            'sentiment_analyzer': InferenceScheduler(
+                'sentiment_analyzer', lambda texts: self.sentiment_analyzer(texts, batch_size=MODEL_BATCH_SIZE),
+                INFERENCE_BATCH_SIZE, INFERENCE_MAX_WAIT_MS
+            ),
+            'classifier': InferenceScheduler(
+                'classifier', lambda texts: self.classifier(texts, batch_size=MODEL_BATCH_SIZE),
+                INFERENCE_BATCH_SIZE, INFERENCE_MAX_WAIT_MS
+            ),
+            'sentence_model': InferenceScheduler(
+                'sentence_model', lambda texts: list(self.sentence_model.encode(texts, batch_size=MODEL_BATCH_SIZE)),
+                INFERENCE_BATCH_SIZE, INFERENCE_MAX_WAIT_MS
+            )
+        }
         
         # Security关键词
         self.security_keywords = {
@@ -151,73 +186,336 @@ class SecurityLogAnalyzer:
             'authentication': ['login', 'password', 'credential', 'token', 'session'],
             'encryption': ['encrypt', 'decrypt', 'certificate', 'key', 'hash']
         }
+        
+        # Log分Class关键词 (按优先级排列)
+        self.classification_keywords = {
+            'authentication': ['login', 'authentication', 'credential'],
+            'network': ['network', 'connection', 'traffic'],
+            'system': ['file', 'process', 'system'],
+            'security': ['malware', 'virus', 'threat']
+        }
+        
+        # 多模式Match器 (构建一次，单次扫描)
+        self.keyword_matcher = MultiPatternMatcher(self.security_keywords)
+        self.classification_matcher = MultiPatternMatcher(self.classification_keywords)
+    
+    @property
+    def nlp(self):
+        return self.model_loaders['nlp'].get()
+    
+    @property
+    def sentiment_analyzer(self):
+        return self.model_loaders['sentiment_analyzer'].get()
+    
+    @property
+    def classifier(self):
+        return self.model_loaders['classifier'].get()
+    
+    @property
+    def sentence_model(self):
+        return self.model_loaders['sentence_model'].get()
+    
+    def model_status(self) -> Dict[str, Dict[str, Any]]:
+        """各NLPModel的加载Status (不会触发加载)"""
+        return {name: loader.status() for name, loader in self.model_loaders.items()}
+    
+    def warm_up(self):
+        """预先加载所HasNLPModel"""
+        for loader in self.model_loaders.values():
+            loader.get()
+    
+    async def load_models_async(self, *models: str) -> List[Any]:
+        """在Thread池中加载尚未加载的Model，首次加载 (spaCy/transformers) 不阻塞事件循环"""
+        loaders = [self.model_loaders[model] for model in models]
+        pending = [loader for loader in loaders if not loader.settled]
+        if pending:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[loop.run_in_executor(None, loader.get) for loader in pending])
+        return [loader.get() for loader in loaders]
+    
+    def scheduler_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各推理调度器的队列深度和批次大小Statistics"""
+        return {name: scheduler.stats() for name, scheduler in self.schedulers.items()}
+    
+    def load_threat_intelligence(self, intel_records: List[ThreatIntelligence]) -> int:
+        """把威胁情报加载到指标Library，返回成功加载的条数"""
+        return self.indicator_store.bulk_load(intel_records)
+    
+    def template_stats(self) -> Optional[Dict[str, Any]]:
+        """Log模板命中率和Cache大小 (未开启模板Cache时为None)"""
+        return self.template_cache.stats() if self.template_cache is not None else None
+    
+    def infer(self, model: str, texts: List[str]) -> Optional[List[Any]]:
+        """经调度器批量推理并等待结果 (阻塞，用于执行器线程)；Model不可用时返回None"""
+        if not self.model_loaders[model].get():
+            return None
+        return self.schedulers[model].run(list(texts))
+    
+    async def infer_async(self, model: str, texts: List[str]) -> Optional[List[Any]]:
+        """在协程中经调度器推理，等待期间不阻塞事件循环，可与其他协程的Request合并"""
+        if not (await self.load_models_async(model))[0]:
+            return None
+        return await self.schedulers[model].infer_many(list(texts))
     
     async def analyze_log_entry(self, log_text: str) -> LogAnalysisResult:
-        """Analysis单条Log"""
+        """Analysis单条Log
+
+        命中模板Cache时复用Model输出；否则情感推理与并发的其他Request合并成批次。
+        """
+        # 以下同步代码会用到这两个Model，先在Thread池中完成首次加载
+        await self.load_models_async('nlp', 'sentiment_analyzer')
+        template_ids, outputs = self.cached_model_outputs([log_text])
+        sentiments = None
+        if outputs[0] is None:
+            try:
+                sentiments = await self.infer_async('sentiment_analyzer', [log_text])
+            except Exception as e:
+                logger.warning(f"Sentiment analysis failed: {e}")
+                sentiments = [{'label': 'NEUTRAL', 'score': 0.5}]
+        outputs = self.compute_model_outputs([log_text], template_ids, outputs, sentiments)
+        return self.build_log_results([log_text], outputs)[0]
+    
+    async def analyze_log_stream(self, lines: AsyncIterable[str], batch_size: int = LOG_BATCH_SIZE,
+                                 max_latency_ms: float = LOG_BATCH_LATENCY_MS) -> AsyncIterator[LogAnalysisResult]:
+        """流式AnalysisLog，按输入顺序逐条产出Result
+
+        输入行凑成微批次: 满batch_size条，或批次第一条等待超过max_latency_ms时提交。
+        批次在Thread池中由analyze_log_batch处理，同时收集下一个批次；读取领先分析的行数
+        有上限 (背压)，内存占用与输入长度无关。
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=batch_size)
+        max_latency = max_latency_ms / 1000
+        done = object()
+        errors: List[BaseException] = []
+        
+        async def read():
+            try:
+                async for line in lines:
+                    await queue.put(line)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                await queue.put(done)
+        
+        async def next_batch() -> Optional[List[str]]:
+            item = await queue.get()
+            if item is done:
+                return None
+            batch = [item]
+            deadline = loop.time() + max_latency
+            while len(batch) < batch_size:
+                if queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = queue.get_nowait()
+                if item is done:
+                    # 留给下一次调用结束迭代
+                    queue.put_nowait(done)
+                    break
+                batch.append(item)
+            return batch
+        
+        reader = asyncio.ensure_future(read())
+        collecting = asyncio.ensure_future(next_batch())
         try:
-            # 提取IOC
-            iocs = self.ioc_extractor.extract_iocs(log_text)
-            validated_iocs = self.ioc_extractor.validate_iocs(iocs)
-            
-            # 实体识别
-            entities = self.extract_entities(log_text)
-            
-            # 情感Analysis (威胁程度)
-            sentiment_result = self.analyze_sentiment(log_text)
-            
-            # ExceptionDetection
-            anomaly_score = self.detect_anomaly(log_text)
-            
-            # 关键词提取
-            keywords = self.extract_keywords(log_text)
-            
-            # Log分Class
-            classification = self.classify_log(log_text)
-            
-            # 威胁等级Evaluation
-            threat_level = self.assess_threat_level(
-                validated_iocs, sentiment_result, anomaly_score
-            )
-            
-            return LogAnalysisResult(
-                original_text=log_text,
-                threat_level=threat_level,
-                confidence=sentiment_result.get('score', 0.0),
-                entities=entities,
-                iocs=self.flatten_iocs(validated_iocs),
-                anomaly_score=anomaly_score,
-                sentiment=sentiment_result.get('label', 'NEUTRAL'),
-                keywords=keywords,
-                classification=classification
-            )
-            
-        except Exception as e:
-            logger.error(f"Log analysis failed: {e}")
-            return LogAnalysisResult(
-                original_text=log_text,
-                threat_level="unknown",
-                confidence=0.0,
-                entities=[],
-                iocs=[],
-                anomaly_score=0.0,
-                sentiment="NEUTRAL",
-                keywords=[],
-                classification="unknown"
-            )
+            while True:
+                batch = await collecting
+                if batch is None:
+                    break
+                in_flight = loop.run_in_executor(None, self.analyze_log_batch, batch)
+                collecting = asyncio.ensure_future(next_batch())
+                for result in await in_flight:
+                    yield result
+        finally:
+            collecting.cancel()
+            reader.cancel()
+        
+        if errors:
+            raise errors[0]
+    
+    def analyze_log_batch(self, log_texts: List[str]) -> List[LogAnalysisResult]:
+        """批量AnalysisLog
+
+        未命中模板Cache的Log对spaCy和HF管道各调用一次 (每个模板一条)；IOC、关键词、分Class
+        和ExceptionRules在拼接后的批次Text上扫描，Result与逐条分析相同。
+        """
+        template_ids, outputs = self.cached_model_outputs(log_texts)
+        return self.build_log_results(log_texts, self.compute_model_outputs(log_texts, template_ids, outputs))
+    
+    def cached_model_outputs(self, log_texts: List[str]) -> Tuple[List[Optional[int]], List[Optional[Dict[str, Any]]]]:
+        """各行的模板ID和已Cache的Model输出 (未命中为None)；没有可用的Model时不查模板"""
+        if self.template_cache is None or not (self.nlp or self.sentiment_analyzer):
+            return [None] * len(log_texts), [None] * len(log_texts)
+        
+        template_ids, outputs = [], []
+        for log_text in log_texts:
+            template_id, output = self.template_cache.lookup(log_text)
+            template_ids.append(template_id)
+            outputs.append(output)
+        return template_ids, outputs
+    
+    def compute_model_outputs(self, log_texts: List[str], template_ids: List[Optional[int]],
+                              outputs: List[Optional[Dict[str, Any]]],
+                              sentiments: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """补齐未命中的Model输出并写入模板Cache
+
+        同一批次中同一模板只计算代Table行；sentiments (可选) 与代Table行一一对应。
+        复用其他行输出的行若在变量位置上是文本 (如用户名)，单独重新提取实体。
+        """
+        representatives: Dict[Any, int] = {}
+        missing = 0
+        for index, output in enumerate(outputs):
+            if output is None:
+                missing += 1
+                key = template_ids[index] if template_ids[index] is not None else ('line', index)
+                representatives.setdefault(key, index)
+        if not representatives:
+            return self.rerun_variable_entities(log_texts, template_ids, outputs, set())
+        
+        texts = [log_texts[index] for index in representatives.values()]
+        entities = self.extract_entities_batch(texts)
+        if sentiments is None:
+            sentiments = self.analyze_sentiment_batch(texts)
+        computed = {
+            key: {'entities': entities[position], 'sentiment': sentiments[position]}
+            for position, key in enumerate(representatives)
+        }
+        
+        outputs = list(outputs)
+        for index, output in enumerate(outputs):
+            if output is None:
+                key = template_ids[index] if template_ids[index] is not None else ('line', index)
+                outputs[index] = computed[key]
+        if self.template_cache is not None:
+            for key, output in computed.items():
+                if template_ids[representatives[key]] is not None:
+                    self.template_cache.store(key, output)
+            self.template_cache.record_shared(missing - len(representatives))
+        return self.rerun_variable_entities(log_texts, template_ids, outputs, set(representatives.values()))
+    
+    def rerun_variable_entities(self, log_texts: List[str], template_ids: List[Optional[int]],
+                                outputs: List[Dict[str, Any]], own: Set[int]) -> List[Dict[str, Any]]:
+        """为复用模板输出、且变量位置含文本词元的行重新提取实体 (情感仍共享)
+
+        own是输出由本行计算的行号。只含数字的变量 (IP、端口、PID) 不重新提取，
+        共享的实体按是否出现在本行中过滤。
+        """
+        if self.template_cache is None or not self.nlp:
+            return outputs
+        miner = self.template_cache.miner
+        rerun = [
+            index for index, template_id in enumerate(template_ids)
+            if template_id is not None and index not in own and miner.has_text_variables(template_id, log_texts[index])
+        ]
+        if not rerun:
+            return outputs
+        
+        entities = self.extract_entities_batch([log_texts[index] for index in rerun])
+        outputs = list(outputs)
+        for index, line_entities in zip(rerun, entities):
+            outputs[index] = {'entities': line_entities, 'sentiment': outputs[index]['sentiment']}
+        self.template_cache.record_entity_reruns(len(rerun))
+        return outputs
+    
+    def build_log_results(self, log_texts: List[str], outputs: List[Dict[str, Any]]) -> List[LogAnalysisResult]:
+        """由Model输出和 (批量) Rules结果生成各行的Result"""
+        hour = datetime.now().hour
+        
+        iocs = anomaly_scores = keywords = classifications = None
+        if len(log_texts) > 1:
+            try:
+                iocs = self.ioc_extractor.extract_iocs_batch(log_texts, validate=True)
+                anomaly_scores = self.detect_anomaly_batch(log_texts, hour)
+                keywords = self.keyword_matcher.matched_patterns_segments(log_texts)
+                classifications = [
+                    self.classification_matcher.first_category_of(patterns) or 'general'
+                    for patterns in self.classification_matcher.matched_patterns_segments(log_texts)
+                ]
+            except Exception as e:
+                # 逐条计算，只有出错的Log得到unknown
+                logger.warning(f"Batch log rules failed, falling back to per-line analysis: {e}")
+                iocs = None
+        
+        results = []
+        for index, log_text in enumerate(log_texts):
+            try:
+                if iocs is None:
+                    results.append(self.build_log_result(
+                        log_text, outputs[index]['entities'], outputs[index]['sentiment'],
+                        self.ioc_extractor.extract_iocs(log_text, validate=True),
+                        self.detect_anomaly(log_text, hour),
+                        self.extract_keywords(log_text),
+                        self.classify_log(log_text)
+                    ))
+                else:
+                    results.append(self.build_log_result(
+                        log_text, outputs[index]['entities'], outputs[index]['sentiment'], iocs[index],
+                        anomaly_scores[index], list(keywords[index]), classifications[index]
+                    ))
+            except Exception as e:
+                logger.error(f"Log analysis failed: {e}")
+                results.append(LogAnalysisResult(
+                    original_text=log_text,
+                    threat_level="unknown",
+                    confidence=0.0,
+                    entities=[],
+                    iocs=[],
+                    anomaly_score=0.0,
+                    sentiment="NEUTRAL",
+                    keywords=[],
+                    classification="unknown"
+                ))
+        return results
+    
+    def build_log_result(self, log_text: str, entities: List[Dict[str, str]], sentiment_result: Dict[str, Any],
+                         validated_iocs: Dict[str, List[str]], anomaly_score: float,
+                         keywords: List[str], classification: str) -> LogAnalysisResult:
+        """由模型输出和Rules结果生成单条Log的Result"""
+        # 威胁等级Evaluation
+        threat_level = self.assess_threat_level(
+            validated_iocs, sentiment_result, anomaly_score
+        )
+        
+        return LogAnalysisResult(
+            original_text=log_text,
+            threat_level=threat_level,
+            confidence=sentiment_result.get('score', 0.0),
+            # 共享的实体 (只有数字变量不同的同模板行) 只保留出现在本行中的
+            entities=[entity for entity in entities if entity['text'] in log_text],
+            iocs=self.flatten_iocs(validated_iocs),
+            anomaly_score=anomaly_score,
+            sentiment=sentiment_result.get('label', 'NEUTRAL'),
+            keywords=keywords,
+            classification=classification,
+            intel_hits=self.indicator_store.match_iocs(validated_iocs)
+        )
     
     def extract_entities(self, text: str) -> List[Dict[str, str]]:
         """提取命名实体"""
-        entities = []
+        return self.extract_entities_batch([text])[0]
+    
+    def extract_entities_batch(self, texts: List[str]) -> List[List[Dict[str, str]]]:
+        """批量提取命名实体 (nlp.pipe)"""
+        entities = [[] for _ in texts]
         
         if self.nlp:
             try:
-                doc = self.nlp(text)
-                for ent in doc.ents:
-                    entities.append({
-                        'text': ent.text,
-                        'label': ent.label_,
-                        'description': spacy.explain(ent.label_)
-                    })
+                for index, doc in enumerate(self.nlp.pipe(texts, batch_size=len(texts))):
+                    entities[index] = [
+                        {
+                            'text': ent.text,
+                            'label': ent.label_,
+                            'description': spacy.explain(ent.label_)
+                        }
+                        for ent in doc.ents
+                    ]
             except Exception as e:
                 logger.warning(f"Entity extraction failed: {e}")
         
@@ -225,32 +523,26 @@ class SecurityLogAnalyzer:
     
     def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """AnalysisText情感 (威胁程度)"""
-        if hasattr(self, 'sentiment_analyzer') and self.sentiment_analyzer:
-            try:
-                result = self.sentiment_analyzer(text)[0]
-                return result
-            except Exception as e:
-                logger.warning(f"Sentiment analysis failed: {e}")
+        return self.analyze_sentiment_batch([text])[0]
+    
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """批量Analysis情感: 经调度器与并发Request合并后调用管道"""
+        try:
+            results = self.infer('sentiment_analyzer', texts)
+            if results is not None:
+                return results
+        except Exception as e:
+            logger.warning(f"Sentiment analysis failed: {e}")
         
-        return {'label': 'NEUTRAL', 'score': 0.5}
+        return [{'label': 'NEUTRAL', 'score': 0.5} for _ in texts]
     
-    def detect_anomaly(self, text: str) -> float:
+    def detect_anomaly(self, text: str, hour: Optional[int] = None) -> float:
         """DetectionLogException"""
         anomaly_score = 0.0
         
         # 基于Rules的ExceptionDetection
-        anomaly_patterns = [
-            r'failed.*login',
-            r'access.*denied',
-            r'suspicious.*activity',
-            r'malware.*detected',
-            r'unauthorized.*access',
-            r'brute.*force',
-            r'privilege.*escalation'
-        ]
-        
-        for pattern in anomaly_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        for pattern in ANOMALY_PATTERNS:
+            if pattern.search(text):
                 anomaly_score += 0.2
         
         # 基于频率的ExceptionDetection
@@ -258,37 +550,39 @@ class SecurityLogAnalyzer:
             anomaly_score += 0.1
         
         # 基于Time的ExceptionDetection (简化)
-        current_hour = datetime.now().hour
+        current_hour = datetime.now().hour if hour is None else hour
         if current_hour < 6 or current_hour > 22:  # 非工作Time
             anomaly_score += 0.1
         
         return min(1.0, anomaly_score)
     
+    def detect_anomaly_batch(self, texts: List[str], hour: Optional[int] = None) -> List[float]:
+        """批量DetectionLogException: 每个Rules在换行拼接的批次上扫描一次 (Rules不会跨行Match)"""
+        joined = '\n'.join(texts)
+        starts = segment_starts(texts)
+        scores = [0.0] * len(texts)
+        for pattern in ANOMALY_PATTERNS:
+            for index in {bisect_right(starts, match.start()) - 1 for match in pattern.finditer(joined)}:
+                scores[index] += 0.2
+        
+        current_hour = datetime.now().hour if hour is None else hour
+        off_hours = current_hour < 6 or current_hour > 22
+        for index, text in enumerate(texts):
+            if len(text.split()) > 100:
+                scores[index] += 0.1
+            if off_hours:
+                scores[index] += 0.1
+            scores[index] = min(1.0, scores[index])
+        return scores
+    
     def extract_keywords(self, text: str) -> List[str]:
         """提取Security关键词"""
-        keywords = []
-        text_lower = text.lower()
-        
-        for category, word_list in self.security_keywords.items():
-            for word in word_list:
-                if word in text_lower:
-                    keywords.append(word)
-        
-        return list(set(keywords))
+        return list(self.keyword_matcher.matched_patterns(text))
     
     def classify_log(self, text: str) -> str:
         """分ClassLogType"""
         # 简化的Log分Class
-        if any(word in text.lower() for word in ['login', 'authentication', 'credential']):
-            return 'authentication'
-        elif any(word in text.lower() for word in ['network', 'connection', 'traffic']):
-            return 'network'
-        elif any(word in text.lower() for word in ['file', 'process', 'system']):
-            return 'system'
-        elif any(word in text.lower() for word in ['malware', 'virus', 'threat']):
-            return 'security'
-        else:
-            return 'general'
+        return self.classification_matcher.first_category(text) or 'general'
     
     def assess_threat_level(self, iocs: Dict[str, List[str]], 
                           sentiment: Dict[str, Any], anomaly_score: float) -> str:
@@ -341,6 +635,19 @@ class ThreatIntelligenceProcessor:
             'trojan': '木马',
             'backdoor': '后门'
         }
+        
+        # 威胁Type和严重程度关键词 (按优先级排列)
+        self.threat_type_matcher = MultiPatternMatcher({
+            'malware': ['malware', 'virus', 'trojan'],
+            'phishing': ['phishing', 'fake', 'scam'],
+            'botnet': ['botnet', 'c2', 'command'],
+            'ransomware': ['ransomware', 'encrypt', 'ransom']
+        })
+        self.severity_matcher = MultiPatternMatcher({
+            'high': ['critical', 'severe', 'high'],
+            'medium': ['medium', 'moderate'],
+            'low': ['low', 'minor']
+        })
     
     async def process_threat_feed(self, threat_data: str) -> List[ThreatIntelligence]:
         """Process威胁情报源"""
@@ -399,31 +706,11 @@ class ThreatIntelligenceProcessor:
     
     def infer_threat_type(self, text: str) -> str:
         """推断威胁Type"""
-        text_lower = text.lower()
-        
-        for threat_type, keywords in {
-            'malware': ['malware', 'virus', 'trojan'],
-            'phishing': ['phishing', 'fake', 'scam'],
-            'botnet': ['botnet', 'c2', 'command'],
-            'ransomware': ['ransomware', 'encrypt', 'ransom']
-        }.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return threat_type
-        
-        return 'unknown'
+        return self.threat_type_matcher.first_category(text) or 'unknown'
     
     def infer_severity(self, text: str) -> str:
         """推断威胁严重程度"""
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['critical', 'severe', 'high']):
-            return 'high'
-        elif any(word in text_lower for word in ['medium', 'moderate']):
-            return 'medium'
-        elif any(word in text_lower for word in ['low', 'minor']):
-            return 'low'
-        else:
-            return 'medium'
+        return self.severity_matcher.first_category(text) or 'medium'
 
 class SecurityReportGenerator:
     """SecurityReport生成器"""
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+多模式Match器
+基于Aho-Corasick自动机的大小写不敏感多模式Match，File和Log路径共用
+"""
+
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# 可选的C实现 (pyahocorasick)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 分段Match时使用的分隔符 (模式中不允许出现)
+SEGMENT_SEPARATOR = '\x00'
+
+
+def segment_starts(segments: List[str], separator_length: int = 1) -> List[int]:
+    """用分隔符拼接后每个段的起始偏移 (bisect_right(starts, pos) - 1 即为pos所在的段)"""
+    starts = []
+    offset = 0
+    for segment in segments:
+        starts.append(offset)
+        offset += len(segment) + separator_length
+    return starts
+
+
+class MultiPatternMatcher:
+    """Aho-Corasick多模式Match器
+
+    构建一次，之后每段Text只需单次扫描即可得到所Has模式的Match情况，
+    Complex度为 O(len(text) + matches)，而不是 O(patterns × text)。
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]], use_native: bool = True):
+        # 模式(小写) -> 所属Category
+        self.pattern_categories: Dict[str, Set[str]] = {}
+        self.categories: List[str] = list(categories.keys())
+
+        for category, patterns in categories.items():
+            for pattern in patterns:
+                normalized = pattern.lower()
+                if not normalized:
+                    continue
+                if SEGMENT_SEPARATOR in normalized:
+                    raise ValueError(f"Pattern must not contain separator: {pattern!r}")
+                self.pattern_categories.setdefault(normalized, set()).add(category)
+
+        self._native = None
+        if use_native and AHOCORASICK_AVAILABLE and self.pattern_categories:
+            self._native = ahocorasick.Automaton()
+            for pattern in self.pattern_categories:
+                self._native.add_word(pattern, pattern)
+            self._native.make_automaton()
+        else:
+            self._build_automaton()
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[str], category: str = 'default') -> 'MultiPatternMatcher':
+        """从单个模式列TableCreateMatch器"""
+        return cls({category: patterns})
+
+    def _build_automaton(self):
+        """构建goto/fail/outputTable"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[str, ...]] = [()]
+
+        for pattern in self.pattern_categories:
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] = self._out[state] + (pattern,)
+
+        # 广度优先CalculateFailure链接，并合并Output
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """迭代所HasMatch，返回 (结束位置, 模式)"""
+        if not self.pattern_categories:
+            return
+        text = text.lower()
+
+        if self._native is not None:
+            yield from self._native.iter(text)
+            return
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern in out[state]:
+                yield index, pattern
+
+    def matched_patterns(self, text: str) -> Set[str]:
+        """返回Text中出现过的模式集合"""
+        return {pattern for _, pattern in self.iter_matches(text)}
+
+    def count_by_category(self, text: str) -> Dict[str, int]:
+        """按Category统计出现过的不同模式数量"""
+        counts = {category: 0 for category in self.categories}
+        for pattern in self.matched_patterns(text):
+            for category in self.pattern_categories[pattern]:
+                counts[category] += 1
+        return counts
+
+    def count_segment_matches(self, segments: Iterable[str]) -> Dict[str, int]:
+        """按Category统计 (模式, 段) Match对的数量
+
+        所Has段用分隔符拼接后只扫描一次，Result等价于对每个段分别
+        检查每个模式是否出现。
+        """
+        segments = [segment.lower() for segment in segments]
+        counts = {category: 0 for category in self.categories}
+        if not segments:
+            return counts
+
+        # 每个段的结束偏移，用于把Match位置映射回段
+        boundaries = []
+        offset = -1
+        for segment in segments:
+            offset += len(segment) + 1
+            boundaries.append(offset)
+
+        seen = set()
+        for end, pattern in self.iter_matches(SEGMENT_SEPARATOR.join(segments)):
+            key = (bisect_right(boundaries, end), pattern)
+            if key not in seen:
+                seen.add(key)
+                for category in self.pattern_categories[pattern]:
+                    counts[category] += 1
+        return counts
+
+    def matched_patterns_segments(self, segments: List[str]) -> List[Set[str]]:
+        """每个段中出现过的模式集合 (所Has段拼接后只扫描一次)"""
+        # 小写后长度可能变化，偏移按小写后的段计算
+        segments = [segment.lower() for segment in segments]
+        matched: List[Set[str]] = [set() for _ in segments]
+        if not segments:
+            return matched
+        starts = segment_starts(segments)
+        for end, pattern in self.iter_matches(SEGMENT_SEPARATOR.join(segments)):
+            matched[bisect_right(starts, end) - 1].add(pattern)
+        return matched
+
+    def first_category_of(self, patterns: Set[str], order: Optional[Iterable[str]] = None) -> Optional[str]:
+        """按顺序返回patterns (matched_patterns的Result) 所属的第一个Category"""
+        categories = set()
+        for pattern in patterns:
+            categories.update(self.pattern_categories[pattern])
+        for category in (order or self.categories):
+            if category in categories:
+                return category
+        return None
+
+    def first_category(self, text: str, order: Optional[Iterable[str]] = None) -> Optional[str]:
+        """按顺序返回第一个HasMatch的Category"""
+        counts = self.count_by_category(text)
+        for category in (order or self.categories):
+            if counts.get(category):
+                return category
+        return None
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+模糊哈希相似度索引
+保存Already知恶意Sample的ssdeep摘要，按块大小分桶并建立7-gram倒排表，
+查询时只比较共享子串的候选，返回最相似的Sample家族
+"""
+
+import logging
+import os
+import re
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lazy_loader import lazy_import, module_available
+
+logger = logging.getLogger(__name__)
+
+# 模糊哈希Library (可选依赖)
+ssdeep = lazy_import('ssdeep')
+tlsh = lazy_import('tlsh')
+SSDEEP_AVAILABLE = module_available('ssdeep')
+TLSH_AVAILABLE = module_available('tlsh')
+
+# 索引File路径环境变量 (每行 `<ssdeep摘要>,<家族>`)
+INDEX_PATH_ENV = 'HUNTERMATRIX_SIMILARITY_INDEX'
+
+# 总是在Feature中输出ssdeep/TLSH摘要 (默认只在索引非Null时计算查询需要的ssdeep)
+FUZZY_HASH_FEATURES_ENV = 'HUNTERMATRIX_FUZZY_HASH_FEATURES'
+
+# ssdeep只对共享至少7个连续Character的签名给出非零分数
+NGRAM = 7
+
+# ssdeep比较前把超过3个的重复Character压缩为3个
+_REPEATS = re.compile(r'(.)\1{3,}')
+
+# 签名Character (base64) -> 6位编码，7-gram正好装进42位
+_CODES = {char: code for code, char in enumerate(
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+)}
+
+
+@dataclass
+class SimilarityMatch:
+    """相似Sample"""
+    family: str
+    score: int
+    digest: str
+
+
+def normalize_signature(signature: str) -> str:
+    return _REPEATS.sub(r'\1\1\1', signature)
+
+
+def parse_digest(digest: str) -> Optional[Tuple[int, str, str]]:
+    """解析 `blocksize:chunk:double_chunk`"""
+    parts = digest.strip().split(':', 2)
+    if len(parts) != 3:
+        return None
+    try:
+        block_size = int(parts[0])
+    except ValueError:
+        return None
+    return block_size, normalize_signature(parts[1]), normalize_signature(parts[2].split(',', 1)[0])
+
+
+def gram_keys(block_size: int, signature: str) -> set:
+    """签名的7-gram编码为整数键: 高位是块大小的log2，低42位是gram"""
+    keys = set()
+    if len(signature) < NGRAM:
+        return keys
+    codes = [_CODES.get(char, 63) for char in signature]
+    prefix = block_size.bit_length() << (6 * NGRAM)
+    mask = (1 << (6 * NGRAM)) - 1
+    value = 0
+    for i, code in enumerate(codes):
+        value = ((value << 6) | code) & mask
+        if i >= NGRAM - 1:
+            keys.add(prefix | value)
+    return keys
+
+
+class SimilarityIndex:
+    """ssdeep摘要的近邻索引
+
+    ssdeep只比较块大小相同或相差一倍的摘要: 每个摘要的第一段签名登记在
+    (blocksize, gram) 下，第二段登记在 (2*blocksize, gram) 下，查询摘要按同样的键
+    取倒排表，就得到所有可能非零的候选。候选按共享gram数排序，最多比较
+    max_candidates个，查询Time与索引规模基本无关。
+
+    倒排表以 (键, 条目) 两个紧凑数组保存，第一次查询时排序冻结，
+    查询用二分查找定位每个gram的区间；之后新增的摘要在下一次查询时并入。
+    """
+
+    def __init__(self, index_path: Optional[str] = None, max_candidates: int = 256):
+        self.index_path = index_path or os.environ.get(INDEX_PATH_ENV) or None
+        self.max_candidates = max_candidates
+
+        self.digests: List[str] = []
+        self.families = array('I')
+        self.family_names: List[str] = []
+        self._family_ids: Dict[str, int] = {}
+        self._keys = array('Q')
+        self._entries = array('I')
+        self._sorted_keys: Optional[np.ndarray] = None
+        self._sorted_entries: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.version = 0
+
+        if self.index_path:
+            try:
+                self.load(self.index_path)
+            except OSError as e:
+                logger.warning(f"Failed to load similarity index {self.index_path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    @property
+    def available(self) -> bool:
+        """Has摘要且ssdeep可用时才能查询"""
+        return SSDEEP_AVAILABLE and len(self.digests) > 0
+
+    def add(self, digest: str, family: str = '') -> bool:
+        """添加一个摘要"""
+        parsed = parse_digest(digest)
+        if parsed is None:
+            return False
+        block_size, chunk, double_chunk = parsed
+
+        with self._lock:
+            family_id = self._family_ids.get(family)
+            if family_id is None:
+                family_id = self._family_ids[family] = len(self.family_names)
+                self.family_names.append(family)
+
+            entry = len(self.digests)
+            self.digests.append(digest.strip())
+            self.families.append(family_id)
+            for key_size, signature in ((block_size, chunk), (block_size * 2, double_chunk)):
+                keys = gram_keys(key_size, signature)
+                self._keys.extend(keys)
+                self._entries.extend([entry] * len(keys))
+            self._sorted_keys = None
+            self.version += 1
+        return True
+
+    def _frozen(self) -> Tuple[np.ndarray, np.ndarray]:
+        """按键排序的倒排表"""
+        with self._lock:
+            if self._sorted_keys is None:
+                keys = np.frombuffer(self._keys, dtype=np.uint64) if self._keys else np.empty(0, np.uint64)
+                entries = np.frombuffer(self._entries, dtype=np.uint32) if self._entries else np.empty(0, np.uint32)
+                order = np.argsort(keys, kind='stable')
+                self._sorted_keys, self._sorted_entries = keys[order], entries[order]
+            return self._sorted_keys, self._sorted_entries
+
+    def load(self, path: str) -> int:
+        """LoadIndexFile: `<ssdeep摘要>,<家族>`，#开头为注释 (兼容ssdeep -c输出)"""
+        added = 0
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or line.startswith('ssdeep,'):
+                    continue
+                digest, _, family = line.partition(',')
+                if self.add(digest, family.strip().strip('"')):
+                    added += 1
+        # 加载后立即排序，避免第一次查询付出排序代价
+        self._frozen()
+        logger.info(f"Similarity index loaded {added} digests from {path}")
+        return added
+
+    def candidates(self, digest: str) -> List[int]:
+        """共享gram最多的候选条目"""
+        parsed = parse_digest(digest)
+        if parsed is None:
+            return []
+        block_size, chunk, double_chunk = parsed
+
+        query = gram_keys(block_size, chunk) | gram_keys(block_size * 2, double_chunk)
+        if not query:
+            return []
+        keys, entries = self._frozen()
+        query = np.fromiter(query, dtype=np.uint64, count=len(query))
+        starts = np.searchsorted(keys, query, side='left')
+        ends = np.searchsorted(keys, query, side='right')
+        hits = [entries[start:end] for start, end in zip(starts, ends) if end > start]
+        if not hits:
+            return []
+
+        candidates, shared = np.unique(np.concatenate(hits), return_counts=True)
+        if len(candidates) > self.max_candidates:
+            top = np.argpartition(-shared, self.max_candidates - 1)[:self.max_candidates]
+            candidates, shared = candidates[top], shared[top]
+        return candidates[np.argsort(-shared, kind='stable')].tolist()
+
+    def query(self, digest: str, k: int = 5) -> List[SimilarityMatch]:
+        """返回最相似的k个家族 (每个家族取最高分)"""
+        if not digest or not self.available:
+            return []
+
+        best: Dict[int, Tuple[int, int]] = {}
+        for entry in self.candidates(digest):
+            score = ssdeep.compare(digest, self.digests[entry])
+            if score <= 0:
+                continue
+            family_id = self.families[entry]
+            if family_id not in best or score > best[family_id][0]:
+                best[family_id] = (score, entry)
+
+        ranked = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:k]
+        return [
+            SimilarityMatch(self.family_names[family_id], score, self.digests[entry])
+            for family_id, (score, entry) in ranked
+        ]
+
+    def status(self) -> Dict[str, Any]:
+        """IndexStatus"""
+        return {
+            'index_path': self.index_path,
+            'digests': len(self.digests),
+            'families': len(self.family_names),
+            'postings': len(self._keys),
+            'ssdeep_available': SSDEEP_AVAILABLE,
+            'tlsh_available': TLSH_AVAILABLE
+        }
+
+
+def env_fuzzy_hash_features() -> bool:
+    return os.environ.get(FUZZY_HASH_FEATURES_ENV, '').lower() in ('1', 'true', 'yes')
+
+
+def fuzzy_hashes(content: bytes, use_ssdeep: bool = True, use_tlsh: bool = True) -> Dict[str, str]:
+    """计算可用的模糊哈希 (ssdeep、TLSH)"""
+    digests = {}
+    if use_ssdeep and SSDEEP_AVAILABLE:
+        digests['ssdeep'] = ssdeep.hash(content)
+    if use_tlsh and TLSH_AVAILABLE:
+        digest = tlsh.hash(content)
+        if digest and digest != 'TNULL':
+            digests['tlsh'] = digest
+    return digests
+
+
+class FuzzyHashAccumulator:
+    """按块Update的模糊哈希 (流式Process大File时使用)"""
+
+    def __init__(self, use_ssdeep: bool = True, use_tlsh: bool = True):
+        self.ssdeep = ssdeep.Hash() if use_ssdeep and SSDEEP_AVAILABLE else None
+        self.tlsh = tlsh.Tlsh() if use_tlsh and TLSH_AVAILABLE else None
+
+    @property
+    def active(self) -> bool:
+        return self.ssdeep is not None or self.tlsh is not None
+
+    def update(self, chunk: bytes):
+        if self.ssdeep is not None:
+            self.ssdeep.update(chunk)
+        if self.tlsh is not None:
+            self.tlsh.update(chunk)
+
+    def digests(self) -> Dict[str, str]:
+        digests = {}
+        if self.ssdeep is not None:
+            digests['ssdeep'] = self.ssdeep.digest()
+        if self.tlsh is not None:
+            try:
+                self.tlsh.final()
+                digest = self.tlsh.hexdigest()
+                if digest and digest != 'TNULL':
+                    digests['tlsh'] = digest
+            except ValueError:
+                pass
+        return digests
+
+
+_indexes: Dict[str, SimilarityIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_similarity_index(index_path: Optional[str] = None) -> SimilarityIndex:
+    """获取进程内共享的相似度Index (同一路径只Load一次)"""
+    index_path = index_path or os.environ.get(INDEX_PATH_ENV) or None
+    key = os.path.abspath(index_path) if index_path else ''
+
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = SimilarityIndex(index_path)
+        return index
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+可打印Character串扫描器
+基于NumPy游程(run-length)的向量化扫描，替代逐字节的Python循环
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# 最小Character串Length
+MIN_STRING_LENGTH = 4
+
+# 可打印ASCII范围
+PRINTABLE_LOW = 32
+PRINTABLE_HIGH = 126
+
+
+@dataclass
+class StringScanResult:
+    """Character串扫描Result"""
+    starts: np.ndarray
+    ends: np.ndarray
+    scanned_bytes: int
+    truncated: bool = False
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self.ends - self.starts
+
+    @property
+    def count(self) -> int:
+        return int(len(self.starts))
+
+    @property
+    def mean_length(self) -> float:
+        return float(self.lengths.mean()) if self.count else 0
+
+    @property
+    def max_length(self) -> int:
+        return int(self.lengths.max()) if self.count else 0
+
+    def spans(self) -> List[Tuple[int, int]]:
+        """返回 (start, end) 区间列Table"""
+        return list(zip(self.starts.tolist(), self.ends.tolist()))
+
+    def strings(self, content: bytes) -> List[str]:
+        """按区间解码Character串"""
+        # 只解码扫描过的区域一次，再按区间切片
+        text = bytes(memoryview(content)[:self.scanned_bytes]).decode('latin-1')
+        return [text[start:end] for start, end in zip(self.starts.tolist(), self.ends.tolist())]
+
+
+def find_printable_runs(buf: np.ndarray, min_length: int = MIN_STRING_LENGTH) -> Tuple[np.ndarray, np.ndarray]:
+    """在uint8缓冲区中查找可打印Character游程，返回起止偏移"""
+    if buf.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    printable = (buf >= PRINTABLE_LOW) & (buf <= PRINTABLE_HIGH)
+
+    # 两端补0后差分: +1为游程起点，-1为游程终点
+    padded = np.zeros(buf.size + 2, dtype=np.int8)
+    padded[1:-1] = printable
+    edges = np.diff(padded)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    keep = (ends - starts) >= min_length
+    return starts[keep], ends[keep]
+
+
+def scan_printable_strings(content: bytes, min_length: int = MIN_STRING_LENGTH,
+                           max_bytes: Optional[int] = None) -> StringScanResult:
+    """扫描可打印Character串，max_bytes限制扫描的字节预算"""
+    truncated = max_bytes is not None and len(content) > max_bytes
+    view = memoryview(content)[:max_bytes] if truncated else memoryview(content)
+
+    buf = np.frombuffer(view, dtype=np.uint8)
+    starts, ends = find_printable_runs(buf, min_length)
+
+    return StringScanResult(
+        starts=starts,
+        ends=ends,
+        scanned_bytes=len(buf),
+        truncated=truncated
+    )
+
+
+def scan_printable_strings_reference(content: bytes, min_length: int = MIN_STRING_LENGTH) -> List[str]:
+    """逐字节参考实现 (仅用于一致性Test和Benchmark)"""
+    printable_strings = []
+    current_string = ""
+
+    for byte in content:
+        if PRINTABLE_LOW <= byte <= PRINTABLE_HIGH:
+            current_string += chr(byte)
+        else:
+            if len(current_string) >= min_length:
+                printable_strings.append(current_string)
+            current_string = ""
+
+    if len(current_string) >= min_length:
+        printable_strings.append(current_string)
+
+    return printable_strings
+
+
+class StringScanAccumulator:
+    """分块Character串扫描器
+
+    按块Input，跨块边界的Character串会被正确拼接；只保留统计值和
+    当前未结束的Character串，Memory占用与File大小无关。
+    """
+
+    def __init__(self, min_length: int = MIN_STRING_LENGTH, max_bytes: Optional[int] = None,
+                 max_string_chars: int = 1 << 20):
+        self.min_length = min_length
+        self.max_bytes = max_bytes
+        # 单个超长Character串只保留前max_string_chars个Character用于模式Match
+        self.max_string_chars = max_string_chars
+
+        self.count = 0
+        self.total_length = 0
+        self.max_length = 0
+        self.scanned_bytes = 0
+        self.truncated = False
+
+        self._carry_parts: List[str] = []
+        self._carry_chars = 0
+        self._carry_length = 0
+
+    @property
+    def mean_length(self) -> float:
+        return self.total_length / self.count if self.count else 0
+
+    def feed(self, chunk) -> List[str]:
+        """Input一块Data，返回在本块中结束的Character串"""
+        if self.max_bytes is not None:
+            remaining = self.max_bytes - self.scanned_bytes
+            if remaining <= 0:
+                self.truncated = self.truncated or len(chunk) > 0
+                return []
+            if len(chunk) > remaining:
+                chunk = memoryview(chunk)[:remaining]
+                self.truncated = True
+
+        buf = np.frombuffer(chunk, dtype=np.uint8)
+        self.scanned_bytes += buf.size
+        if buf.size == 0:
+            return []
+
+        starts, ends = find_printable_runs(buf, 1)
+        text = bytes(chunk).decode('latin-1')
+        completed = []
+
+        first = 0
+        if self._carry_length:
+            if starts.size and starts[0] == 0:
+                # 上一块未结束的Character串在本块继续
+                self._extend_carry(text[:ends[0]], int(ends[0]))
+                if ends[0] == buf.size:
+                    return completed
+                first = 1
+            completed.extend(self._flush_carry())
+
+        last_open = starts.size > first and ends[-1] == buf.size
+        stop = starts.size - 1 if last_open else starts.size
+
+        closed_starts, closed_ends = starts[first:stop], ends[first:stop]
+        lengths = closed_ends - closed_starts
+        keep = lengths >= self.min_length
+        if keep.any():
+            kept = lengths[keep]
+            self.count += int(kept.size)
+            self.total_length += int(kept.sum())
+            self.max_length = max(self.max_length, int(kept.max()))
+            completed.extend(text[start:end] for start, end
+                             in zip(closed_starts[keep].tolist(), closed_ends[keep].tolist()))
+
+        if last_open:
+            self._extend_carry(text[starts[-1]:], int(buf.size - starts[-1]))
+
+        return completed
+
+    def finish(self) -> List[str]:
+        """结束扫描，返回最后一个未结束的Character串"""
+        return self._flush_carry()
+
+    def _extend_carry(self, text: str, length: int):
+        self._carry_length += length
+        room = self.max_string_chars - self._carry_chars
+        if room > 0:
+            self._carry_parts.append(text[:room])
+            self._carry_chars += min(room, len(text))
+
+    def _flush_carry(self) -> List[str]:
+        length = self._carry_length
+        text = ''.join(self._carry_parts)
+        self._carry_parts = []
+        self._carry_chars = 0
+        self._carry_length = 0
+
+        if length < self.min_length:
+            return []
+        self.count += 1
+        self.total_length += length
+        self.max_length = max(self.max_length, length)
+        return [text]
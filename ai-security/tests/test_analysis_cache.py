@@ -0,0 +1,104 @@
+"""
+AnalysisResultCacheTest
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from analysis_cache import AnalysisCache
+from detection_cascade import DetectionCascade
+
+
+class TestAnalysisCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'cache.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tiers_and_persistence(self):
+        cache = AnalysisCache(self.db_path)
+        cache.store_digest((1, 2, 3, 4), 'abc')
+        cache.put('abc', 'v1', {'threat_score': 0.5})
+
+        self.assertEqual(cache.lookup_digest((1, 2, 3, 4)), 'abc')
+        self.assertIsNone(cache.lookup_digest((1, 2, 3, 5)))
+        self.assertEqual(cache.get('abc', 'v1'), {'threat_score': 0.5})
+        self.assertIsNone(cache.get('abc', 'v2'))
+        cache.close()
+
+        # 重启后从持久层命中
+        reopened = AnalysisCache(self.db_path)
+        self.assertEqual(reopened.lookup_digest((1, 2, 3, 4)), 'abc')
+        self.assertEqual(reopened.get('abc', 'v1'), {'threat_score': 0.5})
+        stats = reopened.stats()
+        self.assertEqual((stats['digest_hits'], stats['disk_hits'], stats['memory_hits']), (1, 1, 0))
+        self.assertEqual(reopened.get('abc', 'v1'), {'threat_score': 0.5})
+        self.assertEqual(reopened.stats()['memory_hits'], 1)
+        reopened.close()
+
+    def test_invalidate_keeps_current_version(self):
+        cache = AnalysisCache(self.db_path, max_memory_entries=1)
+        cache.put('a', 'old', {'x': 1})
+        cache.put('b', 'new', {'x': 2})
+        cache.invalidate('new')
+
+        self.assertIsNone(cache.get('a', 'old'))
+        self.assertEqual(cache.get('b', 'new'), {'x': 2})
+        self.assertEqual(cache.stats()['invalidations'], 1)
+        cache.close()
+
+    def test_memory_only(self):
+        cache = AnalysisCache(db_path=None, max_memory_entries=2)
+        for key in 'abc':
+            cache.put(key, 'v', {'key': key})
+
+        self.assertIsNone(cache.get('a', 'v'))
+        self.assertEqual(cache.get('c', 'v'), {'key': 'c'})
+        self.assertFalse(cache.stats()['persistent'])
+
+
+class TestCachedVerdictPaths(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_threat_type_follows_current_extension(self):
+        from intelligent_threat_detector import IntelligentThreatDetector
+
+        cache = AnalysisCache(db_path=None)
+        detector = IntelligentThreatDetector(os.path.join(self.tmp.name, 'models'), cache=cache,
+                                             cascade=DetectionCascade([]), execution_mode='thread')
+        predictions = {'malware_probability': 0.9, 'anomaly_score': 0.0, 'threat_score': 0.5}
+        detector.ml_detector.predict_features = lambda features, file_path='': dict(predictions)
+        detector.ml_detector.predict_batch = lambda features_list, file_paths=None: [
+            dict(predictions) for _ in features_list
+        ]
+
+        paths = [os.path.join(self.tmp.name, name) for name in ('x.bin', 'x.exe', 'y.bin')]
+        for path in paths:
+            with open(path, 'wb') as f:
+                f.write(b"same content in every copy")
+        try:
+            results = [asyncio.run(detector.analyze_file(path)) for path in paths]
+        finally:
+            detector.executor.shutdown()
+
+        self.assertEqual(cache.stats()['memory_hits'], 2)
+        self.assertEqual([result.threat_type for result in results], ['unknown', 'trojan', 'unknown'])
+        self.assertEqual([result.features['file_extension'] for result in results], ['.bin', '.exe', '.bin'])
+        self.assertEqual({result.threat_score for result in results}, {results[0].threat_score})
+
+
+if __name__ == '__main__':
+    unittest.main()
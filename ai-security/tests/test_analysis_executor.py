@@ -0,0 +1,81 @@
+"""
+Analysis执行器Test
+"""
+
+import asyncio
+import gc
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from analysis_executor import AnalysisExecutor, AnalysisRejected
+
+
+class TestAnalysisExecutor(unittest.TestCase):
+
+    def test_rejects_past_high_water_mark(self):
+        executor = AnalysisExecutor(mode='thread', max_workers=2, max_in_flight=2, high_water_mark=4)
+        release = threading.Event()
+
+        async def burst():
+            tasks = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(6)]
+            await asyncio.sleep(0.05)
+            status = executor.stats()
+            release.set()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            return status, results
+
+        status, results = asyncio.run(burst())
+        executor.shutdown()
+
+        self.assertEqual((status['pending'], status['in_flight'], status['queued']), (4, 2, 2))
+        self.assertEqual(sum(isinstance(r, AnalysisRejected) for r in results), 2)
+        self.assertEqual(sum(r is True for r in results), 4)
+        stats = executor.stats()
+        self.assertEqual((stats['completed'], stats['rejected'], stats['pending']), (4, 2, 0))
+
+    def test_queued_tasks_bypass_rejection(self):
+        executor = AnalysisExecutor(mode='thread', max_workers=1, high_water_mark=1)
+
+        async def run_all():
+            return await asyncio.gather(*[executor.run(pow, 2, n, reject=False) for n in range(5)])
+
+        self.assertEqual(asyncio.run(run_all()), [1, 2, 4, 8, 16])
+        self.assertEqual(executor.stats()['peak_pending'], 5)
+        executor.shutdown()
+
+    def test_event_loop_stays_responsive(self):
+        executor = AnalysisExecutor(mode='thread', max_workers=2)
+
+        def busy():
+            total = 0
+            for i in range(2_000_000):
+                total += i
+            return total
+
+        async def measure():
+            work = asyncio.gather(*[executor.run(busy) for _ in range(4)])
+            ticks = 0
+            while not work.done():
+                await asyncio.sleep(0.001)
+                ticks += 1
+            await work
+            return ticks
+
+        self.assertGreater(asyncio.run(measure()), 1)
+        executor.shutdown()
+
+    def test_semaphores_released_with_their_loop(self):
+        executor = AnalysisExecutor(mode='thread', max_workers=1)
+        for _ in range(3):
+            self.assertEqual(asyncio.run(executor.run(abs, -1)), 1)
+        gc.collect()
+        self.assertEqual(len(executor._semaphores), 0)
+        executor.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
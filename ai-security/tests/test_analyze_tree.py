@@ -0,0 +1,165 @@
+"""
+Directory树AnalysisTest
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from detection_cascade import DetectionCascade
+from file_walker import TreeScanProgress, walk_files
+from intelligent_threat_detector import IntelligentThreatDetector
+from lazy_loader import module_available
+
+WEB_AVAILABLE = module_available('aiohttp') and module_available('aiohttp_cors')
+
+
+def make_tree(root: str, per_directory: int = 4):
+    """三层Directory的PE和文本File，返回PEFile的总字节数"""
+    total = 0
+    for directory in ('', 'a', os.path.join('a', 'b')):
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+        for index in range(per_directory):
+            content = b"MZ" + bytes([index]) * (200 + index * 30)
+            with open(os.path.join(root, directory, f"sample{index}.exe"), 'wb') as f:
+                f.write(content)
+            total += len(content)
+        with open(os.path.join(root, directory, 'notes.txt'), 'w') as f:
+            f.write("plain text, not analyzed\n")
+    return total
+
+
+def make_detector(tmp: str) -> IntelligentThreatDetector:
+    return IntelligentThreatDetector(os.path.join(tmp, 'models'), enable_cache=False,
+                                     cascade=DetectionCascade([]), execution_mode='thread')
+
+
+class TestAnalyzeTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'tree')
+        self.pe_bytes = make_tree(self.root)
+        self.detector = make_detector(self.tmp.name)
+
+    def tearDown(self):
+        self.detector.executor.shutdown()
+        self.tmp.cleanup()
+
+    def test_yields_every_file_in_walk_order(self):
+        progress = TreeScanProgress(root=self.root)
+
+        async def collect():
+            return [analysis async for analysis in self.detector.analyze_tree(self.root, batch_size=5,
+                                                                              progress=progress)]
+
+        results = asyncio.run(collect())
+        expected = [path for path, _, _ in walk_files(self.root)]
+        self.assertEqual(len(expected), 12)
+        self.assertEqual([analysis.file_path for analysis in results], expected)
+        self.assertTrue(all(analysis.threat_type != 'error' for analysis in results))
+
+        self.assertEqual((progress.queued, progress.analyzed), (12, 12))
+        self.assertEqual(progress.bytes_analyzed, self.pe_bytes)
+        self.assertEqual(progress.skipped_type, 3)
+        self.assertTrue(progress.walk_complete)
+        self.assertIsNotNone(progress.finished_at)
+
+    def test_early_close_stops_walker(self):
+        make_tree(os.path.join(self.root, 'many'), per_directory=100)
+        progress = TreeScanProgress(root=self.root)
+
+        async def first_then_close():
+            results = self.detector.analyze_tree(self.root, batch_size=2, progress=progress)
+            first = await results.__anext__()
+            await results.aclose()
+            # 遍历Thread在背压处等待，stop后最多0.1秒退出
+            deadline = time.time() + 5
+            while not progress.walk_complete and time.time() < deadline:
+                await asyncio.sleep(0.02)
+            return first
+
+        self.assertIsNotNone(asyncio.run(first_then_close()))
+        self.assertTrue(progress.walk_complete)
+        self.assertLess(progress.queued, 50)
+        self.assertLess(progress.analyzed, progress.queued)
+
+
+@unittest.skipUnless(WEB_AVAILABLE, "aiohttp not installed")
+class TestAnalyzeDirectoryEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'tree')
+        make_tree(self.root)
+        self.detector = make_detector(self.tmp.name)
+
+    def tearDown(self):
+        self.detector.executor.shutdown()
+        self.tmp.cleanup()
+
+    def post(self, payload):
+        from aiohttp import web
+        from aiohttp.test_utils import TestClient, TestServer
+        from ai_web_service import AIWebService
+
+        # 只挂载被测的处理函数，不构建完整Service
+        service = AIWebService.__new__(AIWebService)
+        service.threat_detector = self.detector
+
+        async def run():
+            app = web.Application()
+            app.router.add_post('/api/analyze-directory', service.analyze_directory)
+            async with TestClient(TestServer(app)) as client:
+                response = await client.post('/api/analyze-directory', json=payload)
+                return response.status, response.content_type, await response.text()
+
+        return asyncio.run(run())
+
+    def test_streams_results_then_progress(self):
+        status, content_type, body = self.post({'root': self.root, 'batch_size': 4})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(content_type, 'application/x-ndjson')
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([line['result']['file_path'] for line in lines[:-1]],
+                         [path for path, _, _ in walk_files(self.root)])
+        progress = lines[-1]['progress']
+        self.assertEqual((progress['queued'], progress['analyzed']), (12, 12))
+        self.assertTrue(progress['walk_complete'])
+
+    def test_empty_tree_returns_only_progress(self):
+        empty = os.path.join(self.tmp.name, 'empty')
+        os.makedirs(empty)
+        status, _, body = self.post({'root': empty})
+
+        self.assertEqual(status, 200)
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['progress']['analyzed'], 0)
+
+    def test_invalid_parameters_return_400(self):
+        for payload in ({'root': self.root, 'batch_size': 'x'},
+                        {'root': self.root, 'batch_size': -1},
+                        {'root': self.root, 'max_size': 'big'},
+                        {'root': self.root, 'include': '*.exe'},
+                        {'root': self.root, 'kinds': 'pe'},
+                        {'root': ['/']}):
+            status, _, body = self.post(payload)
+            self.assertEqual(status, 400, payload)
+            self.assertIn('error', json.loads(body))
+
+    def test_rejects_missing_root(self):
+        status, _, body = self.post({'root': os.path.join(self.tmp.name, 'missing')})
+        self.assertEqual(status, 400)
+        self.assertIn('error', json.loads(body))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+批量FileAnalysisTest
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from detection_cascade import DetectionCascade
+from intelligent_threat_detector import IntelligentThreatDetector, MLThreatDetector
+from lazy_loader import module_available
+
+WEB_AVAILABLE = module_available('aiohttp') and module_available('aiohttp_cors')
+
+
+def make_detector(tmp: str) -> IntelligentThreatDetector:
+    # 不用Cache和级联: 每个File都经过批量ML推理
+    return IntelligentThreatDetector(os.path.join(tmp, 'models'), enable_cache=False,
+                                     cascade=DetectionCascade([]), execution_mode='thread')
+
+
+class TestAnalyzeFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for index in range(5):
+            path = os.path.join(self.tmp.name, f"sample{index}.bin")
+            with open(path, 'wb') as f:
+                f.write(bytes([index]) * (100 + index * 50) + b"cmd.exe /c powershell " * index)
+            self.paths.append(path)
+        self.detector = make_detector(self.tmp.name)
+
+    def tearDown(self):
+        self.detector.executor.shutdown()
+        self.tmp.cleanup()
+
+    def test_results_in_input_order_with_error_for_missing_path(self):
+        missing = os.path.join(self.tmp.name, 'missing.bin')
+        paths = [self.paths[0], missing, self.paths[1], self.paths[2]]
+
+        results = asyncio.run(self.detector.analyze_files(paths, batch_size=2))
+
+        self.assertEqual([result.file_path for result in results], paths)
+        self.assertEqual(results[1].threat_type, 'error')
+        self.assertTrue(all(result.threat_type != 'error' for index, result in enumerate(results) if index != 1))
+        self.assertEqual(results[2].features['file_size'], os.path.getsize(self.paths[1]))
+
+    def test_one_predict_batch_call_per_batch(self):
+        with mock.patch.object(MLThreatDetector, 'predict_batch', autospec=True,
+                               side_effect=MLThreatDetector.predict_batch) as spy:
+            results = asyncio.run(self.detector.analyze_files(self.paths, batch_size=2))
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual([len(call.args[1]) for call in spy.call_args_list], [2, 2, 1])
+        self.assertEqual([call.args[2] for call in spy.call_args_list],
+                         [self.paths[0:2], self.paths[2:4], self.paths[4:]])
+
+
+@unittest.skipUnless(WEB_AVAILABLE, "aiohttp not installed")
+class TestAnalyzeFileEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'sample.bin')
+        with open(self.path, 'wb') as f:
+            f.write(b"MZ" + b"\x00" * 200)
+        self.detector = make_detector(self.tmp.name)
+
+    def tearDown(self):
+        self.detector.executor.shutdown()
+        self.tmp.cleanup()
+
+    def post(self, payload):
+        from aiohttp import web
+        from aiohttp.test_utils import TestClient, TestServer
+        from ai_web_service import AIWebService
+
+        # 只挂载被测的处理函数，不构建完整Service (报告、邮件等Group件会在当前Directory写File)
+        service = AIWebService.__new__(AIWebService)
+        service.threat_detector = self.detector
+
+        async def run():
+            app = web.Application()
+            app.router.add_post('/api/analyze-file', service.analyze_file)
+            async with TestClient(TestServer(app)) as client:
+                response = await client.post('/api/analyze-file', json=payload)
+                return response.status, await response.json()
+
+        return asyncio.run(run())
+
+    def test_batch_mode_returns_list_in_input_order(self):
+        missing = os.path.join(self.tmp.name, 'missing.bin')
+        status, body = self.post({'file_paths': [missing, self.path], 'batch_size': 1})
+
+        self.assertEqual(status, 200)
+        self.assertIsInstance(body['results'], list)
+        self.assertEqual([result['file_path'] for result in body['results']], [missing, self.path])
+        self.assertEqual(body['results'][0]['threat_type'], 'error')
+
+    def test_batch_mode_rejects_non_list(self):
+        status, body = self.post({'file_paths': self.path})
+        self.assertEqual(status, 400)
+        self.assertIn('error', body)
+
+    def test_invalid_parameters_return_400(self):
+        for payload in ({'file_paths': [self.path], 'batch_size': 'many'},
+                        {'file_paths': [self.path], 'batch_size': 0},
+                        {'file_paths': [self.path], 'batch_size': [4]},
+                        {'file_path': 42},
+                        [self.path]):
+            status, body = self.post(payload)
+            self.assertEqual(status, 400, payload)
+            self.assertIn('error', body)
+
+        status, body = self.post({'file_paths': [self.path], 'batch_size': '2'})
+        self.assertEqual(status, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Detection级联Test
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from analysis_cache import AnalysisCache
+from detection_cascade import CascadeContext, DetectionCascade, HashListStage, YaraVerdictStage
+from lazy_loader import module_available
+
+YARA_AVAILABLE = module_available('yara')
+
+VERDICT_RULE = '''
+rule Marked_Sample {
+    meta:
+        verdict = "%s"
+    strings:
+        $a = "CASCADE_TEST_MARKER"
+    condition:
+        $a
+}
+'''
+
+GOOD = 'a' * 64
+BAD = 'b' * 64
+
+
+class TestDetectionCascade(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.good_path = os.path.join(self.tmp.name, 'good.txt')
+        self.bad_path = os.path.join(self.tmp.name, 'bad.txt')
+        with open(self.good_path, 'w') as f:
+            f.write(f"# known good\n{GOOD}\n")
+        with open(self.bad_path, 'w') as f:
+            f.write(f"{BAD.upper()} Ransomware  # sample\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_lists(self):
+        stage = HashListStage(self.good_path, self.bad_path)
+
+        good = stage.evaluate(CascadeContext('good', {'sha256': GOOD}))
+        self.assertEqual((good.threat_score, good.threat_type), (0.0, 'clean'))
+        bad = stage.evaluate(CascadeContext('bad', {'sha256': BAD}))
+        self.assertEqual((bad.threat_score, bad.threat_type), (1.0, 'ransomware'))
+        self.assertIsNone(stage.evaluate(CascadeContext('other', {'sha256': 'c' * 64})))
+
+    def test_yara_meta_verdict(self):
+        stage = YaraVerdictStage()
+        meta = {
+            'Whitelisted_Installer': {'verdict': 'clean'},
+            'Known_Trojan': {'verdict': 'malicious', 'threat_type': 'Trojan', 'score': 0.9},
+            'Suspicious_Strings': {}
+        }
+        verdict = stage.evaluate(CascadeContext('file', {'yara_meta': meta}))
+        self.assertEqual((verdict.threat_score, verdict.threat_type), (0.9, 'trojan'))
+
+        verdict = stage.evaluate(CascadeContext('file', {'yara_meta': {'Whitelisted_Installer': {'verdict': 'clean'}}}))
+        self.assertEqual(verdict.threat_type, 'clean')
+        self.assertIsNone(stage.evaluate(CascadeContext('file', {'yara_meta': {'Suspicious_Strings': {}}})))
+
+    def test_early_exit_skips_later_features(self):
+        cascade = DetectionCascade([HashListStage(self.good_path, self.bad_path), YaraVerdictStage()])
+        loaded = []
+
+        def loader(key):
+            loaded.append(key)
+            return {'yara_meta': {}}
+
+        verdict = cascade.run_prefilters(CascadeContext('good', {'sha256': GOOD}, loader))
+        self.assertEqual(verdict.stage, 'hash_list')
+        self.assertEqual(loaded, [])
+
+        self.assertIsNone(cascade.run_prefilters(CascadeContext('other', {'sha256': 'c' * 64}, loader)))
+        self.assertEqual(loaded, ['yara_meta'])
+
+        stats = cascade.stats()
+        self.assertEqual(stats['files'], 2)
+        self.assertEqual(stats['stages']['hash_list']['evaluated'], 2)
+        self.assertEqual(stats['stages']['hash_list']['hit_rate'], 0.5)
+        self.assertEqual(stats['stages']['yara']['evaluated'], 1)
+
+
+@unittest.skipUnless(YARA_AVAILABLE, "yara-python not installed")
+class TestYaraVerdictCacheVersion(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rules_path = os.path.join(self.tmp.name, 'rules.yar')
+        self.sample = os.path.join(self.tmp.name, 'sample.bin')
+        with open(self.sample, 'wb') as f:
+            f.write(b"header CASCADE_TEST_MARKER trailer")
+
+    def tearDown(self):
+        import yara_rules
+        yara_rules._managers.pop(os.path.abspath(self.rules_path), None)
+        self.tmp.cleanup()
+
+    def analyze_in_fresh_process(self, verdict: str):
+        """模拟重启: 新的Rules集Manage器和检测器，共用同一个Cache数据库"""
+        import yara_rules
+        from intelligent_threat_detector import IntelligentThreatDetector
+
+        with open(self.rules_path, 'w') as f:
+            f.write(VERDICT_RULE % verdict)
+        manager = yara_rules._managers.pop(os.path.abspath(self.rules_path), None)
+        if manager is not None:
+            manager.stop_watcher()
+
+        cache = AnalysisCache(os.path.join(self.tmp.name, 'cache.db'))
+        detector = IntelligentThreatDetector(os.path.join(self.tmp.name, 'models'), cache=cache,
+                                             yara_rules_path=self.rules_path, execution_mode='thread')
+        try:
+            return asyncio.run(detector.analyze_file(self.sample)), cache.stats()
+        finally:
+            detector.executor.shutdown()
+            detector.feature_extractor.yara_manager.stop_watcher()
+            cache.close()
+
+    def test_rule_edit_invalidates_persistent_verdicts(self):
+        analysis, _ = self.analyze_in_fresh_process('malicious')
+        self.assertEqual((analysis.verdict_stage, analysis.threat_score), ('yara', 0.95))
+
+        # 同样内容的Rules重启后命中持久化Cache
+        _, stats = self.analyze_in_fresh_process('malicious')
+        self.assertEqual(stats['disk_hits'], 1)
+
+        analysis, stats = self.analyze_in_fresh_process('clean')
+        self.assertEqual(stats['disk_hits'], 0)
+        self.assertEqual((analysis.verdict_stage, analysis.threat_score, analysis.threat_type),
+                         ('yara', 0.0, 'clean'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+窗口熵剖面Test
+"""
+
+import math
+import os
+import sys
+import unittest
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from entropy_profile import EntropyProfile, entropy_profile, window_entropies
+
+
+def reference_entropy(data: bytes) -> float:
+    counts = Counter(data)
+    return -sum(count / len(data) * math.log2(count / len(data)) for count in counts.values())
+
+
+class TestEntropyProfile(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        data = rng.integers(0, 16, 64 * 1024, dtype=np.uint8)
+        data[16384:24576] = rng.integers(0, 256, 8192, dtype=np.uint8)
+        self.content = data.tobytes()
+
+    def test_matches_per_window_reference(self):
+        entropies = window_entropies(self.content, 4096)
+        expected = [reference_entropy(self.content[i:i + 4096]) for i in range(0, len(self.content), 4096)]
+        np.testing.assert_allclose(entropies, expected, atol=1e-9)
+        self.assertAlmostEqual(window_entropies(b'ab', 4096)[0], 1.0)
+
+    def test_packed_region(self):
+        features = entropy_profile(self.content, 4096)
+        self.assertEqual(features['entropy_window_count'], 16)
+        self.assertEqual(features['high_entropy_ratio'], 2 / 16)
+        self.assertGreater(features['entropy_window_max'], 7.9)
+        self.assertGreater(features['entropy_window_variance'], 1.0)
+
+    def test_streaming_matches_whole(self):
+        profile = EntropyProfile(4096)
+        for offset in range(0, len(self.content), 5000):
+            profile.feed(self.content[offset:offset + 5000])
+        streamed = profile.finish()
+        whole = entropy_profile(self.content, 4096)
+        for key, value in whole.items():
+            self.assertAlmostEqual(streamed[key], value, places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+大File采样Test
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from entropy_profile import DEFAULT_WINDOW
+from file_sampling import APPROXIMATE_FEATURES, sample_ranges
+from intelligent_threat_detector import FileFeatureExtractor
+
+
+class TestSampleRanges(unittest.TestCase):
+
+    def test_small_file_is_read_whole(self):
+        self.assertEqual(sample_ranges(1000, 4096), [(0, 1000)])
+        self.assertEqual(sample_ranges(10 ** 9, None), [(0, 10 ** 9)])
+
+    def test_ranges_respect_budget(self):
+        budget = 256 * 1024
+        for size in (budget + 1, 3 * budget + 17, 10 ** 9 + 123):
+            ranges = sample_ranges(size, budget, middle_chunk_size=32 * 1024)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], size)
+            self.assertLessEqual(sum(end - start for start, end in ranges), budget)
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertLessEqual(end, start)
+            # 除File尾外样本都按熵值窗口对齐
+            for start, end in ranges[:-1]:
+                self.assertEqual(start % DEFAULT_WINDOW, 0)
+                self.assertEqual((end - start) % DEFAULT_WINDOW, 0)
+
+
+class TestSampledFeatures(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(5)
+        text = b"cmd.exe /c powershell -enc AAAA http://example.com/payload " * 64
+        self.path = os.path.join(self.tmp.name, 'large.bin')
+        with open(self.path, 'wb') as f:
+            for _ in range(64):
+                f.write(rng.integers(0, 256, 16 * 1024, dtype=np.uint8).tobytes())
+                f.write(text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sampled_features_are_marked_and_close(self):
+        size = os.path.getsize(self.path)
+        full = FileFeatureExtractor(sample_budget=None, hash_mode='full').extract_streaming_features(self.path)
+        extractor = FileFeatureExtractor(sample_budget=size // 4, hash_mode='off')
+        sampled = extractor.extract_sampled_features(self.path)
+
+        self.assertLessEqual(sampled['sampled_bytes'], size // 4)
+        self.assertEqual(sampled['file_size'], size)
+        self.assertEqual(sampled['entropy_window_count'], full['entropy_window_count'])
+        self.assertEqual(set(APPROXIMATE_FEATURES) - set(sampled['approximate_features']), set())
+        self.assertIn('similarity_score', sampled['approximate_features'])
+        self.assertNotIn('sha256', sampled)
+        self.assertAlmostEqual(sampled['entropy'], full['entropy'], delta=0.2)
+        self.assertAlmostEqual(sampled['string_count'], full['string_count'], delta=full['string_count'] * 0.2)
+
+    def test_full_hash_mode_matches_streaming(self):
+        size = os.path.getsize(self.path)
+        full = FileFeatureExtractor(sample_budget=None).extract_streaming_features(self.path)
+        sampled = FileFeatureExtractor(sample_budget=size // 4, hash_mode='full').extract_sampled_features(self.path)
+        for name in ('md5', 'sha1', 'sha256'):
+            self.assertEqual(sampled[name], full[name])
+        self.assertNotIn('similarity_score', sampled['approximate_features'])
+
+    def test_background_hash_notifies_listeners(self):
+        size = os.path.getsize(self.path)
+        extractor = FileFeatureExtractor(sample_budget=size // 4, hash_mode='background')
+        done = threading.Event()
+        received = []
+        extractor.add_hash_listener(lambda path, stat, hashes: (received.append((path, hashes)), done.set()))
+
+        features = extractor.extract_sampled_features(self.path)
+        self.assertNotIn('sha256', features)
+        self.assertTrue(done.wait(10))
+        path, hashes = received[0]
+        self.assertEqual(path, self.path)
+        self.assertEqual(hashes['sha256'], extractor.hash_file(self.path)['sha256'])
+
+    def test_unknown_hash_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            FileFeatureExtractor(hash_mode='sometimes')
+
+
+if __name__ == '__main__':
+    unittest.main()
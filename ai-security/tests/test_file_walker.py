@@ -0,0 +1,65 @@
+"""
+Directory遍历和File类型嗅探Test
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from file_walker import TreeScanProgress, sniff_file_kind, walk_files
+
+
+class TestFileWalker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        files = {
+            'app.exe': b'MZ\x90\x00' + b'\x00' * 200,
+            'renamed.txt': b'MZ\x90\x00' + b'\x00' * 200,
+            'notes.txt': b'just some text\n',
+            'run.ps1': b'$x = [Convert]::FromBase64String("aGk=")\n',
+            'empty.bin': b'',
+            os.path.join('sub', 'lib.so'): b'\x7fELF' + b'\x00' * 100,
+            os.path.join('sub', 'huge.exe'): b'MZ' + b'\x00' * 5000,
+            os.path.join('.git', 'objects.exe'): b'MZ' + b'\x00' * 10,
+        }
+        for name, content in files.items():
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def relative(self, results):
+        return sorted(os.path.relpath(path, self.root) for path, _, _ in results)
+
+    def test_sniff_file_kind(self):
+        self.assertEqual(sniff_file_kind(b'MZ\x90\x00'), 'pe')
+        self.assertEqual(sniff_file_kind(b'\x7fELF\x02'), 'elf')
+        self.assertEqual(sniff_file_kind(b'%PDF-1.7'), 'pdf')
+        self.assertEqual(sniff_file_kind(b'IEX (New-Object Net.WebClient) # PowerShell'), 'script')
+        self.assertIsNone(sniff_file_kind(b'hello world'))
+
+    def test_walk_filters(self):
+        progress = TreeScanProgress(root=self.root)
+        results = list(walk_files(self.root, exclude=['.git'], max_size=1024, progress=progress))
+
+        self.assertEqual(self.relative(results),
+                         ['app.exe', 'renamed.txt', 'run.ps1', os.path.join('sub', 'lib.so')])
+        self.assertEqual(progress.discovered, 7)
+        self.assertEqual(progress.skipped_size, 1)
+        self.assertEqual(progress.skipped_type, 2)
+
+    def test_include_patterns_without_type_filter(self):
+        results = list(walk_files(self.root, include=['*.txt'], kinds=None))
+        self.assertEqual(self.relative(results), ['notes.txt', 'renamed.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+威胁情报指标LibraryTest
+"""
+
+import asyncio
+import ipaddress
+import os
+import random
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from indicator_store import IndicatorStore
+from nlp_security_analyzer import SecurityLogAnalyzer, ThreatIntelligence
+
+
+def intel(ioc_type, ioc_value, threat_type='malware', severity='high'):
+    now = datetime.now()
+    return ThreatIntelligence(
+        ioc_type=ioc_type, ioc_value=ioc_value, threat_type=threat_type, severity=severity,
+        description='', source='test', confidence=0.9, first_seen=now, last_seen=now
+    )
+
+
+class TestIndicatorStore(unittest.TestCase):
+
+    def test_ip_prefixes_match_longest_first(self):
+        store = IndicatorStore()
+        store.bulk_load([
+            intel('cidr', '10.0.0.0/8'), intel('cidr', '10.1.0.0/16'),
+            intel('ip_address', '10.1.2.3'), intel('cidr', '192.168.1.0/24'),
+        ])
+        self.assertEqual([hit.ioc_value for hit in store.lookup('ip_address', '10.1.2.3')],
+                         ['10.1.2.3', '10.1.0.0/16', '10.0.0.0/8'])
+        self.assertEqual([hit.ioc_value for hit in store.lookup('ip_address', '10.2.0.1')], ['10.0.0.0/8'])
+        self.assertEqual([hit.ioc_value for hit in store.lookup('ip_address', '192.168.1.200')], ['192.168.1.0/24'])
+        self.assertEqual(store.lookup('ip_address', '192.168.2.1'), [])
+        self.assertEqual(store.lookup('ip_address', '10.0.0.256'), [])
+
+    def test_ip_lookups_match_linear_scan(self):
+        rng = random.Random(25)
+        networks = []
+        for _ in range(2000):
+            length = rng.choice((8, 12, 16, 20, 24, 28, 31, 32))
+            networks.append(ipaddress.ip_network(f"{ipaddress.IPv4Address(rng.getrandbits(32))}/{length}", strict=False))
+        store = IndicatorStore()
+        store.bulk_load(intel('cidr', str(network)) for network in networks)
+
+        for _ in range(3000):
+            if rng.random() < 0.5:
+                network = rng.choice(networks)
+                address = network.network_address + rng.randrange(network.num_addresses)
+            else:
+                address = ipaddress.IPv4Address(rng.getrandbits(32))
+            expected = sorted(str(network) for network in networks if address in network)
+            self.assertEqual(sorted(hit.ioc_value for hit in store.lookup('ip_address', str(address))), expected)
+
+    def test_ipv6(self):
+        store = IndicatorStore()
+        store.add(intel('cidr', '2001:db8::/32'))
+        self.assertEqual(len(store.lookup('ip_address', '2001:db8::1')), 1)
+        self.assertEqual(store.lookup('ip_address', '2001:db9::1'), [])
+
+    def test_domains_cover_subdomains(self):
+        store = IndicatorStore()
+        store.bulk_load([intel('domain', 'evil.com'), intel('domain', 'c2.evil.com.'), intel('unknown', 'bad.org')])
+        self.assertEqual([hit.ioc_value for hit in store.lookup('domain', 'x.C2.Evil.com')],
+                         ['c2.evil.com.', 'evil.com'])
+        self.assertEqual(len(store.lookup('domain', 'evil.com')), 1)
+        self.assertEqual(len(store.lookup('domain', 'cdn.bad.org')), 1)
+        self.assertEqual(store.lookup('domain', 'notevil.com'), [])
+        self.assertEqual(store.lookup('domain', 'evil.com.au'), [])
+
+    def test_hashes_and_exact_values(self):
+        store = IndicatorStore()
+        md5 = 'D41D8CD98F00B204E9800998ECF8427E'
+        store.bulk_load([intel('md5', md5), intel('url', 'http://evil.com/payload'), intel('ip', 'not an ip')])
+        self.assertEqual(len(store.lookup('md5', md5.lower())), 1)
+        self.assertEqual(len(store.lookup('url', 'HTTP://evil.com/payload')), 1)
+        self.assertEqual(store.lookup('sha1', 'da39a3ee5e6b4b0d3255bfef95601890afd80709'), [])
+        self.assertEqual(store.stats()['rejected'], 1)
+        self.assertEqual(len(store), 2)
+
+
+class TestLogIntelHits(unittest.TestCase):
+
+    def test_log_entries_are_annotated(self):
+        analyzer = SecurityLogAnalyzer()
+        analyzer.model_loaders['nlp'].set(None)
+        analyzer.model_loaders['sentiment_analyzer'].set(None)
+        line = "beacon from 203.0.113.7 to cdn.evil.net"
+
+        self.assertEqual(asyncio.run(analyzer.analyze_log_entry(line)).intel_hits, [])
+
+        analyzer.load_threat_intelligence([intel('cidr', '203.0.113.0/24', 'botnet'), intel('domain', 'evil.net')])
+        hits = asyncio.run(analyzer.analyze_log_entry(line)).intel_hits
+        self.assertEqual(sorted((hit['ioc'], hit['indicator'], hit['threat_type']) for hit in hits), [
+            ('203.0.113.7', '203.0.113.0/24', 'botnet'),
+            ('cdn.evil.net', 'evil.net', 'malware'),
+        ])
+        self.assertEqual(analyzer.analyze_log_batch([line, "cron job completed"])[1].intel_hits, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+动态批处理Inference调度器Test
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from inference_scheduler import InferenceScheduler
+from nlp_security_analyzer import SecurityLogAnalyzer
+
+
+class RecordingModel:
+    """记录每次调用的批次，返回输入的大写"""
+
+    def __init__(self, delay=0.0):
+        self.batches = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        if self.delay:
+            time.sleep(self.delay)
+        return [text.upper() for text in texts]
+
+
+class TestInferenceScheduler(unittest.TestCase):
+
+    def test_concurrent_coroutines_share_batches(self):
+        model = RecordingModel()
+        scheduler = InferenceScheduler('test', model, max_batch_size=8, max_wait_ms=50)
+
+        async def run():
+            return await asyncio.gather(*(scheduler.infer(f"line {i}") for i in range(20)))
+
+        results = asyncio.run(run())
+        scheduler.stop()
+
+        self.assertEqual(results, [f"LINE {i}" for i in range(20)])
+        self.assertEqual([len(batch) for batch in model.batches], [8, 8, 4])
+        stats = scheduler.stats()
+        self.assertEqual(stats['batches'], 3)
+        self.assertEqual(stats['completed'], 20)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertGreaterEqual(stats['max_queue_depth'], 8)
+        self.assertEqual(stats['batch_sizes'], {4: 1, 8: 2})
+        self.assertEqual(stats['largest_batch'], 8)
+
+    def test_partial_batch_flushes_after_max_wait(self):
+        scheduler = InferenceScheduler('test', RecordingModel(), max_batch_size=100, max_wait_ms=10)
+        start = time.monotonic()
+        self.assertEqual(scheduler.submit("a").result(timeout=1), "A")
+        self.assertLess(time.monotonic() - start, 0.5)
+        scheduler.stop()
+
+    def test_requests_from_threads_are_batched(self):
+        model = RecordingModel(delay=0.05)
+        scheduler = InferenceScheduler('test', model, max_batch_size=32, max_wait_ms=20)
+        results = {}
+
+        def worker(index):
+            results[index] = scheduler.run([f"t{index}"])[0]
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        scheduler.stop()
+
+        self.assertEqual(results, {i: f"T{i}" for i in range(16)})
+        self.assertLess(len(model.batches), 16)
+
+    def test_model_errors_reach_every_caller(self):
+        def broken(texts):
+            raise RuntimeError("model crashed")
+
+        scheduler = InferenceScheduler('test', broken, max_batch_size=4, max_wait_ms=5)
+        futures = scheduler.submit_many(["a", "b", "c"])
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=1)
+        scheduler.stop()
+        self.assertEqual(scheduler.stats()['failed'], 3)
+
+        mismatched = InferenceScheduler('test', lambda texts: texts[:1], max_batch_size=4, max_wait_ms=5)
+        with self.assertRaises(ValueError):
+            mismatched.run(["a", "b"], timeout=1)
+        mismatched.stop()
+
+    def test_stop_drains_queue_and_rejects_new_requests(self):
+        scheduler = InferenceScheduler('test', RecordingModel(), max_batch_size=2, max_wait_ms=1000)
+        futures = scheduler.submit_many(["a", "b", "c"])
+        scheduler.stop()
+        self.assertEqual([future.result(timeout=1) for future in futures], ["A", "B", "C"])
+        with self.assertRaises(RuntimeError):
+            scheduler.submit("d")
+
+
+class TestAnalyzerScheduling(unittest.TestCase):
+
+    def test_concurrent_log_entries_share_sentiment_batches(self):
+        calls = []
+
+        def sentiment(texts, batch_size=None):
+            calls.append(len(texts))
+            return [{'label': 'NEGATIVE', 'score': 0.8} for _ in texts]
+
+        analyzer = SecurityLogAnalyzer()
+        analyzer.model_loaders['nlp'].set(None)
+        analyzer.model_loaders['sentiment_analyzer'].set(sentiment)
+        lines = [f"Failed password for root from 203.0.113.{i} port 22" for i in range(10)]
+
+        async def run():
+            return await asyncio.gather(*(analyzer.analyze_log_entry(line) for line in lines))
+
+        results = asyncio.run(run())
+        self.assertEqual([result.original_text for result in results], lines)
+        self.assertTrue(all(result.sentiment == 'NEGATIVE' for result in results))
+        self.assertLess(len(calls), len(lines))
+        self.assertEqual(analyzer.scheduler_stats()['sentiment_analyzer']['completed'], len(lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
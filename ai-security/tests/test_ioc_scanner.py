@@ -0,0 +1,57 @@
+"""
+IOC扫描器Test
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ioc_scanner import IOCScanner, extract_iocs_reference
+
+FRAGMENTS = [
+    '192.168.1.10', '10.0.0.256', 'v1.2.3.4.5', '1.2.3', 'evil.com', 'sub.bad-domain.co.uk', 'a_b.c', 'x-y.z',
+    'http://1.2.3.4/a/b.exe?x=1', 'https://example.com/path/index.html', 'user@mail.example.org',
+    'john.doe+x@corp.net', '<a@b.cd>', 'd41d8cd98f00b204e9800998ecf8427e',
+    'da39a3ee5e6b4b0d3255bfef95601890afd80709',
+    'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855',
+    'ABCDEF0123456789ABCDEF0123456789', 'C:\\Windows\\System32\\cmd.exe', 'c:\\Users\\bob\\AppData\\evil.dll',
+    'HKEY_LOCAL_MACHINE\\Software\\Microsoft\\Windows\\CurrentVersion\\Run', 'powershell.exe', 'svchost.EXE',
+    'sshd[1234]:', 'Failed', 'password', 'from', 'port', '22', '"GET', '/index.php', 'HTTP/1.1"', '-',
+    'localhost', 'test.com', '[10.1.1.1]', '(evil.org)', 'fe80::1', '\u0131.com',
+]
+SEPARATORS = [' ', ' ', '  ', '\t', ', ', '=', ':', '/', '"', '', ' | ', '\n']
+
+
+def as_sets(iocs):
+    return {ioc_type: set(values) for ioc_type, values in iocs.items()}
+
+
+class TestIOCScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.scanner = IOCScanner()
+
+    def test_matches_per_pattern_findall(self):
+        rng = random.Random(21)
+        for _ in range(3000):
+            text = ''.join(rng.choice(FRAGMENTS) + rng.choice(SEPARATORS) for _ in range(rng.randint(1, 12)))
+            self.assertEqual(as_sets(self.scanner.scan(text)), as_sets(extract_iocs_reference(text)), text)
+
+    def test_domains_are_whole_strings(self):
+        iocs = self.scanner.scan("beacon to c2.evil-domain.net via http://cdn.bad.org/x")
+        self.assertEqual(iocs['domain'], ['c2.evil-domain.net', 'cdn.bad.org'])
+        self.assertEqual(iocs['url'], ['http://cdn.bad.org/x'])
+
+    def test_validation_is_fused(self):
+        text = "from 10.0.0.256 and 10.0.0.1 to example.com and evil.com"
+        iocs = self.scanner.scan(text, validate=True)
+        self.assertEqual(iocs['ip_address'], ['10.0.0.1'])
+        self.assertEqual(iocs['domain'], ['evil.com'])
+        self.assertEqual(self.scanner.scan("10.0.0.256 example.com", validate=True), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+延迟LoadTest
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lazy_loader import LazyModel, lazy_import, module_available
+
+
+class TestLazyLoader(unittest.TestCase):
+
+    def test_module_imported_on_first_attribute(self):
+        sys.modules.pop('colorsys', None)
+        colorsys = lazy_import('colorsys')
+        self.assertFalse(colorsys.is_loaded)
+        self.assertNotIn('colorsys', sys.modules)
+
+        self.assertEqual(colorsys.rgb_to_hsv(1, 0, 0), (0.0, 1.0, 1))
+        self.assertTrue(colorsys.is_loaded)
+        self.assertIn('colorsys', sys.modules)
+
+    def test_module_available_does_not_import(self):
+        sys.modules.pop('colorsys', None)
+        self.assertTrue(module_available('colorsys'))
+        self.assertNotIn('colorsys', sys.modules)
+        self.assertFalse(module_available('huntermatrix_missing_module'))
+
+    def test_model_loaded_once(self):
+        calls = []
+        model = LazyModel('counter', lambda: calls.append(1) or 'model')
+        self.assertEqual(model.status()['state'], 'pending')
+        self.assertEqual(model.get(), 'model')
+        self.assertEqual(model.get(), 'model')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(model.status()['state'], 'loaded')
+
+    def test_failed_and_unavailable_models(self):
+        def broken():
+            raise OSError("model files missing")
+
+        failed = LazyModel('broken', broken)
+        self.assertIsNone(failed.get())
+        self.assertEqual(failed.status()['state'], 'failed')
+        self.assertIn('model files missing', failed.status()['error'])
+
+        unavailable = LazyModel('unavailable', broken, available=False)
+        self.assertIsNone(unavailable.get())
+        self.assertEqual(unavailable.status()['state'], 'unavailable')
+        self.assertTrue(unavailable.settled)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+流式LogAnalysisTest
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lazy_loader import LazyModel
+from nlp_security_analyzer import SecurityLogAnalyzer
+
+LINES = [
+    "Failed password for root from 203.0.113.7 port 22 ssh2",
+    "GET http://malware-drop.example.net/payload.exe HTTP/1.1 from 198.51.100.20",
+    "Malware detected in C:\\Users\\bob\\AppData\\evil.exe sha1=da39a3ee5e6b4b0d3255bfef95601890afd80709",
+    "network connection established to cdn.bad.org",
+    "unauthorized access attempt, access denied for admin@corp.net",
+    "cron job completed",
+]
+
+
+class FakeSentiment:
+    """记录每次调用的批次大小"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None):
+        self.calls.append(len(texts))
+        return [{'label': 'NEGATIVE' if 'fail' in text.lower() else 'POSITIVE', 'score': 0.9} for text in texts]
+
+
+async def iterate(lines, delay=0.0):
+    for line in lines:
+        if delay:
+            await asyncio.sleep(delay)
+        yield line
+
+
+async def collect(stream):
+    return [result async for result in stream]
+
+
+class TestLogStream(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = SecurityLogAnalyzer()
+        self.sentiment = FakeSentiment()
+        self.analyzer.model_loaders['nlp'].set(None)
+        self.analyzer.model_loaders['sentiment_analyzer'].set(self.sentiment)
+
+    def test_stream_matches_per_line_analysis_in_order(self):
+        lines = LINES * 50
+        results = asyncio.run(collect(self.analyzer.analyze_log_stream(iterate(lines), batch_size=64)))
+        self.assertEqual([result.original_text for result in results], lines)
+        self.assertTrue(all(size <= 64 for size in self.sentiment.calls))
+        self.assertLess(len(self.sentiment.calls), len(lines))
+
+        for line, result in zip(LINES, results):
+            single = asyncio.run(self.analyzer.analyze_log_entry(line))
+            self.assertEqual(result.iocs, single.iocs)
+            self.assertEqual(sorted(result.keywords), sorted(single.keywords))
+            self.assertEqual(result.classification, single.classification)
+            self.assertEqual(result.sentiment, single.sentiment)
+
+    def test_batch_rules_match_per_line_rules(self):
+        lines = LINES + ["failed login\nbrute force", "İstanbul login failed login"]
+        self.assertEqual(self.analyzer.detect_anomaly_batch(lines, hour=3),
+                         [self.analyzer.detect_anomaly(line, hour=3) for line in lines])
+        self.assertEqual(self.analyzer.ioc_extractor.extract_iocs_batch(lines, validate=True),
+                         [self.analyzer.ioc_extractor.extract_iocs(line, validate=True) for line in lines])
+        self.assertEqual(self.analyzer.keyword_matcher.matched_patterns_segments(lines),
+                         [self.analyzer.keyword_matcher.matched_patterns(line) for line in lines])
+
+    def test_partial_batch_flushes_after_max_latency(self):
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            stream = self.analyzer.analyze_log_stream(iterate(LINES[:2], delay=0.2), batch_size=100,
+                                                      max_latency_ms=10)
+            async for _ in stream:
+                return loop.time() - start
+
+        self.assertLess(asyncio.run(run()), 0.35)
+
+    def test_source_errors_propagate(self):
+        async def broken():
+            yield LINES[0]
+            raise RuntimeError("source closed")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(collect(self.analyzer.analyze_log_stream(broken())))
+
+
+class TestFirstUseModelLoad(unittest.TestCase):
+
+    def test_first_load_runs_off_event_loop(self):
+        analyzer = SecurityLogAnalyzer()
+        sentiment = FakeSentiment()
+        load_threads = []
+
+        def slow_load(value):
+            def load():
+                load_threads.append(threading.current_thread())
+                time.sleep(0.3)
+                return value
+            return load
+
+        analyzer.model_loaders['nlp'] = LazyModel('nlp', slow_load(None))
+        analyzer.model_loaders['sentiment_analyzer'] = LazyModel('sentiment', slow_load(sentiment))
+
+        async def measure():
+            analysis = asyncio.ensure_future(analyzer.analyze_log_entry(LINES[0]))
+            ticks = 0
+            while not analysis.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            return await analysis, ticks
+
+        result, ticks = asyncio.run(measure())
+        self.assertEqual(result.sentiment, 'NEGATIVE')
+        self.assertEqual(len(load_threads), 2)
+        self.assertNotIn(threading.main_thread(), load_threads)
+        # 加载期间事件循环仍在调度其他协程
+        self.assertGreater(ticks, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
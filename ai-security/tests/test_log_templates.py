@@ -0,0 +1,193 @@
+"""
+Log模板挖掘和模板CacheTest
+"""
+
+import asyncio
+import os
+import random
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from log_templates import WILDCARD, TemplateCache, TemplateMiner
+import nlp_security_analyzer
+from nlp_security_analyzer import SecurityLogAnalyzer
+
+LOG_TEMPLATES = (
+    'sshd[{pid}]: Failed password for {user} from {ip} port {port} ssh2',
+    'sshd[{pid}]: Accepted publickey for {user} from {ip} port {port}',
+    'proxy: CONNECT {host}:443 from {ip} user={user}@corp.net',
+    'edr: process C:\\Users\\{user}\\AppData\\Local\\Temp\\{user}.exe started, md5={md5}',
+    'dns: query {host} type A from {ip}',
+    'cron[{pid}]: (root) CMD (run-parts /etc/cron.hourly)',
+)
+
+
+def log_lines(seed, count):
+    rng = random.Random(seed)
+    return [
+        rng.choice(LOG_TEMPLATES).format(
+            pid=rng.randrange(1, 65536), port=rng.randrange(1024, 65536),
+            ip='.'.join(str(rng.randrange(1, 255)) for _ in range(4)),
+            user=rng.choice(('root', 'admin', 'deploy', 'bob')), host=rng.choice(('evil.net', 'cdn.example.org')),
+            md5=f"{rng.getrandbits(128):032x}"
+        )
+        for _ in range(count)
+    ]
+
+
+class CountingSentiment:
+    """记录被推理的Text"""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts, batch_size=None):
+        self.texts.extend(texts)
+        return [{'label': 'NEGATIVE' if 'fail' in text.lower() else 'POSITIVE', 'score': 0.9} for text in texts]
+
+
+class TestTemplateMiner(unittest.TestCase):
+
+    def test_variables_collapse_into_one_template(self):
+        miner = TemplateMiner()
+        first, _ = miner.add("Failed password for root from 10.0.0.1 port 2201 ssh2")
+        second, changed = miner.add("Failed password for root from 192.168.7.9 port 51000 ssh2")
+        self.assertEqual(first, second)
+        self.assertFalse(changed)
+
+        third, changed = miner.add("Failed password for admin from 10.0.0.3 port 22 ssh2")
+        self.assertEqual(third, first)
+        self.assertTrue(changed)
+        self.assertEqual(miner.get_template(first), f"Failed password for {WILDCARD} from {WILDCARD} port {WILDCARD} {WILDCARD}")
+        self.assertEqual(miner.match("Failed password for guest from 1.2.3.4 port 1 ssh2"), first)
+
+    def test_different_messages_get_different_templates(self):
+        miner = TemplateMiner()
+        ids = {miner.add(line)[0] for line in (
+            "Accepted publickey for deploy from 10.0.0.1 port 22",
+            "Connection closed by 10.0.0.1",
+            "Failed password for root from 10.0.0.1 port 22 ssh2",
+        )}
+        self.assertEqual(len(ids), 3)
+        self.assertIsNone(miner.match("kernel panic"))
+
+    def test_synthetic_corpus_templates(self):
+        miner = TemplateMiner()
+        for line in log_lines(7, 5000):
+            miner.add(line)
+        self.assertLessEqual(len(miner), 2 * len(LOG_TEMPLATES))
+
+    def test_template_limit_evicts_least_recent(self):
+        miner = TemplateMiner(max_templates=2)
+        old, _ = miner.add("alpha one")
+        miner.add("beta two three")
+        miner.add("gamma four five six")
+        self.assertEqual(len(miner), 2)
+        self.assertIsNone(miner.get_template(old))
+        self.assertEqual(miner.stats()['evicted'], 1)
+
+    def test_cache_hits_and_invalidation(self):
+        cache = TemplateCache()
+        template_id, value = cache.lookup("user bob logged in from 10.0.0.1 via ssh")
+        self.assertIsNone(value)
+        cache.store(template_id, 'output')
+        self.assertEqual(cache.lookup("user bob logged in from 10.0.0.2 via ssh"), (template_id, 'output'))
+        # 新的变量位置使模板变化，旧输出被丢弃
+        self.assertEqual(cache.lookup("user bob logged in from 10.0.0.2 via telnet"), (template_id, None))
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['shared'], stats['invalidations']), (1, 2, 0, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 1 / 3)
+        self.assertEqual(stats['size'], 0)
+
+
+class FakeNER:
+    """把已知用户名标为PERSON，记录处理过的行"""
+
+    NAMES = {'alice', 'bob', 'carol'}
+
+    def __init__(self):
+        self.texts = []
+
+    def pipe(self, texts, batch_size=None):
+        for text in texts:
+            self.texts.append(text)
+            yield SimpleNamespace(ents=[SimpleNamespace(text=word, label_='PERSON')
+                                        for word in text.split() if word in self.NAMES])
+
+class TestAnalyzerTemplateCache(unittest.TestCase):
+
+    def make_analyzer(self, template_cache):
+        analyzer = SecurityLogAnalyzer(template_cache=template_cache)
+        sentiment = CountingSentiment()
+        analyzer.model_loaders['nlp'].set(None)
+        analyzer.model_loaders['sentiment_analyzer'].set(sentiment)
+        return analyzer, sentiment
+
+    def test_rules_are_recomputed_per_line(self):
+        lines = log_lines(3, 2000)
+        cached, sentiment = self.make_analyzer(True)
+        uncached, _ = self.make_analyzer(False)
+
+        results = cached.analyze_log_batch(lines[:1000]) + cached.analyze_log_batch(lines[1000:])
+        expected = uncached.analyze_log_batch(lines)
+        for result, reference in zip(results, expected):
+            self.assertEqual(result.iocs, reference.iocs)
+            self.assertEqual(result.anomaly_score, reference.anomaly_score)
+            self.assertEqual(sorted(result.keywords), sorted(reference.keywords))
+            self.assertEqual(result.classification, reference.classification)
+            self.assertEqual(result.sentiment, reference.sentiment)
+
+        self.assertLess(len(sentiment.texts), 50)
+        stats = cached.template_stats()
+        self.assertGreater(stats['hit_rate'], 0.95)
+        self.assertLessEqual(stats['size'], stats['miner']['templates'])
+        self.assertIsNone(uncached.template_stats())
+
+    def test_log_entry_reuses_template_outputs(self):
+        analyzer, sentiment = self.make_analyzer(True)
+        lines = [f"Failed password for root from 203.0.113.{i} port 22 ssh2" for i in range(20)]
+
+        async def run():
+            return [await analyzer.analyze_log_entry(line) for line in lines]
+
+        results = asyncio.run(run())
+        self.assertEqual(sentiment.texts, lines[:1])
+        self.assertEqual([result.iocs for result in results], [[f"203.0.113.{i}"] for i in range(20)])
+        self.assertTrue(all(result.sentiment == 'NEGATIVE' for result in results))
+
+
+    def test_text_variables_get_their_own_entities(self):
+        analyzer, sentiment = self.make_analyzer(True)
+        ner = FakeNER()
+        analyzer.model_loaders['nlp'].set(ner)
+        lines = ["login failed for alice from 10.0.0.1", "login failed for bob from 10.0.0.2",
+                 "login failed for bob from 10.0.0.3", "login failed for carol from 10.0.0.4"]
+
+        with mock.patch.object(nlp_security_analyzer, 'spacy', SimpleNamespace(explain=lambda label: label)):
+            results = analyzer.analyze_log_batch(lines[:2])
+
+            async def run():
+                return [await analyzer.analyze_log_entry(line) for line in lines[2:]]
+
+            results += asyncio.run(run())
+
+        self.assertEqual([[entity['text'] for entity in result.entities] for result in results],
+                         [['alice'], ['bob'], ['bob'], ['carol']])
+        # 情感仍按模板共享，只有实体逐行重新提取
+        self.assertEqual(len(sentiment.texts), 1)
+        self.assertEqual(analyzer.template_stats()['entity_reruns'], 3)
+
+        # 只有数字变量不同的行直接复用实体
+        ner.texts.clear()
+        with mock.patch.object(nlp_security_analyzer, 'spacy', SimpleNamespace(explain=lambda label: label)):
+            analyzer.analyze_log_batch(["session opened for root pid 41", "session opened for root pid 42"])
+        self.assertEqual(ner.texts, ["session opened for root pid 41"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+ModelVersion注册表Test
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from model_registry import ModelRegistry
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def publish(self, version, activate=True):
+        staged = self.registry.stage()
+        with open(staged / 'model.joblib', 'w') as f:
+            f.write(version)
+        return self.registry.publish(staged, version, metadata={'accuracy': 0.9}, activate=activate)
+
+    def test_publish_and_activate(self):
+        self.assertIsNone(self.registry.current_version())
+        self.assertIsNone(self.registry.current_path())
+
+        self.publish('v1')
+        self.publish('v2', activate=False)
+        self.assertEqual(self.registry.current_version(), 'v1')
+        with open(self.registry.current_path() / 'model.joblib') as f:
+            self.assertEqual(f.read(), 'v1')
+
+        self.registry.activate('v2')
+        self.assertEqual(self.registry.current_version(), 'v2')
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['current', 'versions'])
+
+        versions = self.registry.list_versions()
+        self.assertEqual([v['version'] for v in versions], ['v1', 'v2'])
+        self.assertEqual([v['current'] for v in versions], [False, True])
+        self.assertEqual(versions[0]['files'], ['model.joblib'])
+        self.assertEqual(versions[0]['accuracy'], 0.9)
+
+        with self.assertRaises(ValueError):
+            self.registry.activate('missing')
+
+    def test_prune_keeps_current(self):
+        for version in ('v1', 'v2', 'v3'):
+            self.publish(version)
+        self.registry.activate('v1')
+
+        self.assertEqual(self.registry.prune(keep=1), ['v2'])
+        self.assertEqual([v['version'] for v in self.registry.list_versions()], ['v1', 'v3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Feature分片存储和增量ModelUpdateTest
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from feature_store import FeatureSet, FeatureShardStore
+from intelligent_threat_detector import FEATURE_NAMES, MLThreatDetector
+from lazy_loader import module_available
+from model_updater import ModelUpdateJob
+
+ESTIMATORS_AVAILABLE = module_available('sklearn') and module_available('xgboost')
+
+
+def make_feature_set(rng, n):
+    X = rng.random((n, len(FEATURE_NAMES)))
+    y = (X[:, 0] + rng.random(n) * 0.3 > 0.8).astype(int)
+    return FeatureSet(X=X, y=y, paths=[f"sample-{i}" for i in range(n)], feature_names=list(FEATURE_NAMES))
+
+
+class TestFeatureShardStore(unittest.TestCase):
+
+    def test_append_and_pending(self):
+        rng = np.random.default_rng(3)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FeatureShardStore(os.path.join(tmp, 'shards'))
+            self.assertEqual(store.shard_names(), [])
+            self.assertEqual(len(store.load()), 0)
+
+            first = store.append(make_feature_set(rng, 10)).name
+            second = store.append(make_feature_set(rng, 5)).name
+            self.assertEqual(store.shard_names(), sorted([first, second]))
+            self.assertEqual(store.pending([first]), [second])
+
+            combined = store.load(feature_names=['entropy', 'file_size'])
+            self.assertEqual(combined.X.shape, (15, 2))
+            self.assertEqual(len(combined.paths), 15)
+
+
+@unittest.skipUnless(ESTIMATORS_AVAILABLE, "scikit-learn/xgboost not installed")
+class TestModelUpdateJob(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_dir = os.path.join(self.tmp.name, 'models')
+        self.store = FeatureShardStore(os.path.join(self.tmp.name, 'shards'))
+        self.rng = np.random.default_rng(11)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_full_then_incremental_update(self):
+        serving = MLThreatDetector(self.model_dir)
+        published = []
+        job = ModelUpdateJob(self.model_dir, self.store, min_samples=200,
+                             on_publish=lambda version: published.append(serving.reload_if_changed(force=True)))
+
+        self.store.append(make_feature_set(self.rng, 100))
+        self.assertIsNone(job.run_once())
+
+        self.store.append(make_feature_set(self.rng, 400))
+        report = job.run_once()
+        self.assertEqual(job.status()['full_retrains'], 1)
+        self.assertEqual(serving.model_version, report['model_version'])
+        first = serving.registry.manifest(report['model_version'])
+        self.assertEqual(first['update'], 'full')
+        self.assertEqual(len(first['shards']), 2)
+
+        self.store.append(make_feature_set(self.rng, 300))
+        report = job.run_once()
+        manifest = serving.registry.manifest(report['model_version'])
+        self.assertEqual(manifest['update'], 'incremental')
+        self.assertEqual(manifest['forest_trees'], 120)
+        self.assertEqual(manifest['boosting_rounds'], 120)
+        self.assertEqual(len(manifest['shards']), 3)
+        self.assertEqual(job.status()['pending_shards'], 0)
+
+        # 服务实例已切换到新Version，不需要重启
+        self.assertEqual(published, [True, True])
+        self.assertEqual(serving.model_version, report['model_version'])
+        rows = self.rng.random((4, len(FEATURE_NAMES)))
+        predictions = serving.predict_batch([dict(zip(FEATURE_NAMES, row)) for row in rows])
+        self.assertEqual(len(predictions), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
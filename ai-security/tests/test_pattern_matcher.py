@@ -0,0 +1,58 @@
+"""
+多模式Match器Test
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pattern_matcher import AHOCORASICK_AVAILABLE, MultiPatternMatcher
+
+CATEGORIES = {
+    'api': ['CreateRemoteThread', 'LoadLibrary', 'CreateFile', 'File'],
+    'words': ['he', 'she', 'his', 'hers', 'file'],
+}
+
+
+def naive_segment_counts(categories, segments):
+    counts = {category: 0 for category in categories}
+    for category, patterns in categories.items():
+        for pattern in {p.lower() for p in patterns}:
+            counts[category] += sum(1 for s in segments if pattern in s.lower())
+    return counts
+
+
+class TestMultiPatternMatcher(unittest.TestCase):
+
+    def matchers(self):
+        yield MultiPatternMatcher(CATEGORIES, use_native=False)
+        if AHOCORASICK_AVAILABLE:
+            yield MultiPatternMatcher(CATEGORIES, use_native=True)
+
+    def test_overlapping_matches(self):
+        for matcher in self.matchers():
+            self.assertEqual(matcher.matched_patterns('uSHErs'), {'she', 'he', 'hers'})
+            self.assertEqual(matcher.count_by_category('LOADLIBRARYA profile'),
+                             {'api': 2, 'words': 1})
+
+    def test_segment_counts_match_naive(self):
+        rng = random.Random(3)
+        alphabet = 'heisrfFLCadoTy'
+        for _ in range(50):
+            segments = [''.join(rng.choice(alphabet) for _ in range(rng.randrange(0, 30)))
+                        for _ in range(rng.randrange(0, 10))]
+            for matcher in self.matchers():
+                self.assertEqual(matcher.count_segment_matches(segments),
+                                 naive_segment_counts(CATEGORIES, segments))
+
+    def test_first_category_order(self):
+        matcher = MultiPatternMatcher({'auth': ['login'], 'network': ['connection']})
+        self.assertEqual(matcher.first_category('connection after LOGIN'), 'auth')
+        self.assertEqual(matcher.first_category('nothing here'), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+PEFeature提取Test
+"""
+
+import os
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from lazy_loader import module_available
+
+PE_AVAILABLE = module_available('pefile') and module_available('yara')
+
+if PE_AVAILABLE:
+    import pefile
+    from intelligent_threat_detector import FileFeatureExtractor
+    from synthetic_corpus import SECTION_ALIGNMENT, build_pe, generate_corpus
+
+# 可选头中Data目录的偏移 (DOS头0x80 + PE签名 + COFF头 + 可选头标准字段)
+DATA_DIRECTORY_OFFSET = 0x80 + 4 + 20 + 96
+
+
+def build_dll(exports):
+    """带导出Table的最小DLL: .edata是第一个节 (RVA固定)，导出函数指向.text"""
+    edata_rva, text_rva = SECTION_ALIGNMENT, 2 * SECTION_ALIGNMENT
+    count = len(exports)
+    strings_offset = 40 + count * 10
+    strings = bytearray()
+    name_rvas = []
+    for name in [b'test.dll'] + [name.encode() for name in exports]:
+        name_rvas.append(edata_rva + strings_offset + len(strings))
+        strings += name + b'\x00'
+
+    directory = struct.pack('<IIHHIIIIIII', 0, 0, 0, 0, name_rvas[0], 1, count, count,
+                            edata_rva + 40, edata_rva + 40 + count * 4, edata_rva + 40 + count * 8)
+    functions = b''.join(struct.pack('<I', text_rva + index) for index in range(count))
+    names = b''.join(struct.pack('<I', rva) for rva in name_rvas[1:])
+    ordinals = b''.join(struct.pack('<H', index) for index in range(count))
+    edata = directory + functions + names + ordinals + bytes(strings)
+
+    image = bytearray(build_pe([(b'.edata', edata, 0x40000040), (b'.text', b'\xc3' * 64, 0x60000020)],
+                               {'KERNEL32.dll': ['ExitProcess']}, timestamp=0))
+    image[DATA_DIRECTORY_OFFSET:DATA_DIRECTORY_OFFSET + 8] = struct.pack('<II', edata_rva, len(edata))
+    return bytes(image)
+
+
+@unittest.skipUnless(PE_AVAILABLE, "pefile/yara-python not installed")
+class TestPEFeatures(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        corpus = generate_corpus(cls.tmp.name, seed=15, pe_count=20, blob_count=0, text_count=2,
+                                 size_scale=0.05)
+        cls.pe_paths = [os.path.join(cls.tmp.name, entry['path'])
+                        for entry in corpus['entries'] if entry['kind'] == 'pe']
+        cls.text_paths = [os.path.join(cls.tmp.name, entry['path'])
+                          for entry in corpus['entries'] if entry['kind'] != 'pe']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_imports_match_full_parse(self):
+        extractor = FileFeatureExtractor()
+        self.assertEqual(len(self.pe_paths), 20)
+        for path in self.pe_paths:
+            features = extractor.extract_all_features(path)
+            pe = pefile.PE(path)
+            expected_count = len(pe.DIRECTORY_ENTRY_IMPORT) + sum(
+                1 for entry in pe.DIRECTORY_ENTRY_IMPORT for imp in entry.imports if imp.name)
+            self.assertEqual(features['pe_import_count'], expected_count, path)
+            self.assertEqual(features['pe_imphash'], pe.get_imphash(), path)
+            pe.close()
+
+    def test_name_lists_only_when_enabled(self):
+        path = os.path.join(self.tmp.name, 'exports.dll')
+        with open(path, 'wb') as f:
+            f.write(build_dll(['Install', 'Run']))
+
+        features = FileFeatureExtractor().extract_all_features(path)
+        self.assertEqual(features['pe_export_count'], 2)
+        self.assertEqual(features['pe_import_count'], 2)
+        self.assertNotIn('pe_imports', features)
+        self.assertNotIn('pe_exports', features)
+
+        features = FileFeatureExtractor(pe_name_lists=True).extract_all_features(path)
+        self.assertEqual(features['pe_imports'], ['KERNEL32.dll', 'ExitProcess'])
+        self.assertEqual(features['pe_exports'], ['Install', 'Run'])
+
+    def test_pe_detected_by_content_not_extension(self):
+        extractor = FileFeatureExtractor()
+        renamed = os.path.join(self.tmp.name, 'no_extension')
+        with open(self.pe_paths[0], 'rb') as src, open(renamed, 'wb') as dst:
+            dst.write(src.read())
+        features = extractor.extract_all_features(renamed)
+        self.assertEqual(features['file_kind'], 'pe')
+        self.assertIn('pe_imphash', features)
+
+        disguised = os.path.join(self.tmp.name, 'text.exe')
+        with open(self.text_paths[0], 'rb') as src, open(disguised, 'wb') as dst:
+            dst.write(src.read())
+        features = extractor.extract_all_features(disguised)
+        self.assertNotEqual(features['file_kind'], 'pe')
+        self.assertNotIn('pe_machine', features)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+模糊哈希相似度IndexTest
+"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from similarity_index import SSDEEP_AVAILABLE, TLSH_AVAILABLE, SimilarityIndex, normalize_signature, parse_digest
+
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+
+def random_signature(rng, length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+class TestSimilarityIndex(unittest.TestCase):
+
+    def test_parse_digest(self):
+        self.assertEqual(parse_digest('3:AAAAAbc:xyz'), (3, 'AAAbc', 'xyz'))
+        self.assertEqual(parse_digest('96:abc:def,"sample.exe"'), (96, 'abc', 'def'))
+        self.assertIsNone(parse_digest('not a digest'))
+        self.assertEqual(normalize_signature('abbbbbbc'), 'abbbc')
+
+    def test_candidates_respect_block_size(self):
+        rng = random.Random(0)
+        index = SimilarityIndex(max_candidates=10)
+        chunk, double_chunk = random_signature(rng, 64), random_signature(rng, 32)
+
+        index.add(f"96:{chunk}:{double_chunk}", 'same')
+        # 块大小相差一倍: 查询的第一段签名对应该条目的第二段
+        index.add(f"48:{random_signature(rng, 64)}:{chunk}", 'half')
+        index.add(f"192:{double_chunk}:{random_signature(rng, 32)}", 'double')
+        # 签名相同但块大小不可比
+        index.add(f"384:{chunk}:{double_chunk}", 'incomparable')
+        for _ in range(200):
+            index.add(f"96:{random_signature(rng, 64)}:{random_signature(rng, 32)}", 'noise')
+
+        query = f"96:{chunk[:40]}{random_signature(rng, 24)}:{double_chunk}"
+        families = {index.family_names[index.families[entry]] for entry in index.candidates(query)}
+        self.assertTrue({'same', 'half', 'double'} <= families)
+        self.assertNotIn('incomparable', families)
+
+    @unittest.skipUnless(SSDEEP_AVAILABLE, "ssdeep not installed")
+    def test_query_returns_families(self):
+        import ssdeep
+
+        rng = random.Random(1)
+        base = bytes(rng.getrandbits(8) for _ in range(64 * 1024))
+        variant = base[:40000] + bytes(rng.getrandbits(8) for _ in range(2000)) + base[42000:]
+
+        index = SimilarityIndex()
+        index.add(ssdeep.hash(base), 'Emotet')
+        index.add(ssdeep.hash(bytes(rng.getrandbits(8) for _ in range(64 * 1024))), 'Other')
+
+        matches = index.query(ssdeep.hash(variant))
+        self.assertEqual(matches[0].family, 'Emotet')
+        self.assertGreater(matches[0].score, 50)
+
+
+
+class TestFuzzyHashGating(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'sample.bin')
+        rng = random.Random(13)
+        with open(self.path, 'wb') as f:
+            f.write(bytes(rng.getrandbits(8) for _ in range(64 * 1024)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def extractor(self, **kwargs):
+        from intelligent_threat_detector import FileFeatureExtractor
+        extractor = FileFeatureExtractor(**kwargs)
+        extractor.similarity_index = SimilarityIndex()
+        return extractor
+
+    def test_no_digests_without_index_entries(self):
+        import intelligent_threat_detector
+        extractor = self.extractor(fuzzy_hash_features=False)
+        with mock.patch.object(intelligent_threat_detector, 'fuzzy_hashes') as spy:
+            features = extractor.extract_all_features(self.path)
+        spy.assert_not_called()
+        self.assertNotIn('ssdeep', features)
+        self.assertNotIn('tlsh', features)
+        self.assertEqual(features['similar_families'], [])
+
+        # 流式路径同样跳过
+        streamed = self.extractor(fuzzy_hash_features=False, stream_threshold=1024, chunk_size=4096)
+        features = streamed.extract_all_features(self.path)
+        self.assertNotIn('tlsh', features)
+        self.assertIn('sha256', features)
+
+    @unittest.skipUnless(TLSH_AVAILABLE, "tlsh not installed")
+    def test_digests_when_requested(self):
+        in_memory = self.extractor(fuzzy_hash_features=True).extract_all_features(self.path)
+        streamed = self.extractor(fuzzy_hash_features=True, stream_threshold=1024,
+                                  chunk_size=4096).extract_all_features(self.path)
+        self.assertIn('tlsh', in_memory)
+        self.assertEqual(streamed['tlsh'], in_memory['tlsh'])
+
+
+if __name__ == '__main__':
+    unittest.main()
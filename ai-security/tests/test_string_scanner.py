@@ -0,0 +1,103 @@
+"""
+可打印Character串扫描器一致性Test
+"""
+
+import os
+import random
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from string_scanner import (StringScanAccumulator, scan_printable_strings,
+                            scan_printable_strings_reference)
+
+
+def make_sample(seed: int, size: int) -> bytes:
+    """生成混合了可打印Character串与二进制噪声的Sample"""
+    rng = random.Random(seed)
+    chunks = []
+    while sum(len(c) for c in chunks) < size:
+        if rng.random() < 0.5:
+            chunks.append(bytes(rng.randrange(32, 127) for _ in range(rng.randrange(1, 40))))
+        else:
+            chunks.append(bytes(rng.randrange(0, 256) for _ in range(rng.randrange(1, 20))))
+    return b''.join(chunks)
+
+
+class TestStringScanner(unittest.TestCase):
+
+    def assert_parity(self, content: bytes):
+        expected = scan_printable_strings_reference(content)
+        result = scan_printable_strings(content)
+
+        self.assertEqual(result.strings(content), expected)
+        self.assertEqual(result.count, len(expected))
+        self.assertEqual(result.max_length, max((len(s) for s in expected), default=0))
+        self.assertAlmostEqual(result.mean_length,
+                               float(np.mean([len(s) for s in expected])) if expected else 0)
+
+    def test_parity_random(self):
+        for seed in range(20):
+            self.assert_parity(make_sample(seed, 4096))
+
+    def test_edges(self):
+        for content in [b'', b'abc', b'abcd', b'\x00abcd', b'abcd\x00', b'\x00' * 10,
+                        b'abcd\x7fefgh', b'\x1f    \x1f', b'A' * 1000]:
+            self.assert_parity(content)
+
+    def test_byte_budget(self):
+        content = b'abcdefgh\x00ijklmnop\x00qrstuvwx'
+        result = scan_printable_strings(content, max_bytes=12)
+
+        self.assertTrue(result.truncated)
+        self.assertEqual(result.scanned_bytes, 12)
+        self.assertEqual(result.strings(content), ['abcdefgh'])
+        self.assertEqual(result.spans(), [(0, 8)])
+
+    def test_chunked_parity(self):
+        rng = random.Random(11)
+        for seed in range(10):
+            content = make_sample(seed, 4096) + b'X' * rng.randrange(0, 300)
+            for budget in (None, 1000):
+                expected = scan_printable_strings(content, max_bytes=budget)
+                accumulator = StringScanAccumulator(max_bytes=budget)
+                strings = []
+                offset = 0
+                while offset < len(content):
+                    size = rng.choice([1, 3, 17, 64, 500])
+                    strings.extend(accumulator.feed(content[offset:offset + size]))
+                    offset += size
+                strings.extend(accumulator.finish())
+
+                self.assertEqual(strings, expected.strings(content))
+                self.assertEqual(accumulator.count, expected.count)
+                self.assertEqual(accumulator.max_length, expected.max_length)
+                self.assertAlmostEqual(accumulator.mean_length, expected.mean_length)
+                self.assertEqual(accumulator.truncated, expected.truncated)
+
+    def test_extractor_parity(self):
+        try:
+            from intelligent_threat_detector import FileFeatureExtractor
+        except ImportError as e:
+            self.skipTest(f"detector dependencies not available: {e}")
+
+        extractor = FileFeatureExtractor()
+        content = make_sample(7, 8192) + b'\x00kernel32 CreateRemoteThread\x00loadlibraryA\x00'
+        features = extractor.extract_string_features(content)
+        strings = scan_printable_strings_reference(content)
+
+        self.assertEqual(features['string_count'], len(strings))
+        self.assertEqual(features['max_string_length'], max(len(s) for s in strings))
+        self.assertEqual(features['suspicious_string_count'], sum(
+            1 for pattern in ['CreateRemoteThread', 'VirtualAllocEx', 'WriteProcessMemory',
+                              'SetWindowsHookEx', 'GetProcAddress', 'LoadLibrary',
+                              'RegSetValueEx', 'CreateFile', 'InternetOpen']
+            for s in strings if pattern.lower() in s.lower()
+        ))
+
+
+if __name__ == '__main__':
+    unittest.main()
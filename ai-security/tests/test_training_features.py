@@ -0,0 +1,105 @@
+"""
+TrainingFeature提取和Feature存储Test
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import intelligent_threat_detector
+from feature_store import load_feature_set
+from intelligent_threat_detector import FEATURE_NAMES, MLThreatDetector
+from lazy_loader import module_available
+
+ESTIMATORS_AVAILABLE = module_available('sklearn') and module_available('xgboost')
+
+
+def write_samples(directory: str, count: int):
+    """交替写入正常和可疑内容的File，返回 [(路径, Tag)]"""
+    training_data = []
+    for index in range(count):
+        label = index % 2
+        path = os.path.join(directory, f"sample{index}.bin")
+        with open(path, 'wb') as f:
+            if label:
+                f.write(os.urandom(2048 + index * 16) + b"cmd.exe /c powershell -enc " * (index + 1))
+            else:
+                f.write(b"hello world, plain text line\n" * (20 + index))
+        training_data.append((path, label))
+    return training_data
+
+
+class TestExtractTrainingFeatures(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.training_data = write_samples(self.tmp.name, 10)
+        self.detector = MLThreatDetector(os.path.join(self.tmp.name, 'models'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_process_pool_chunks_match_in_process_extraction(self):
+        pooled = self.detector.extract_training_features(self.training_data, workers=2, chunk_size=3)
+        serial = self.detector.extract_training_features(self.training_data, workers=1)
+
+        self.assertEqual(pooled.paths, [path for path, _ in self.training_data])
+        self.assertEqual(pooled.y.tolist(), [label for _, label in self.training_data])
+        self.assertEqual(pooled.X.shape, (10, len(FEATURE_NAMES)))
+        self.assertEqual(pooled.failures, [])
+        self.assertEqual(serial.paths, pooled.paths)
+        np.testing.assert_allclose(serial.X, pooled.X)
+
+    def test_failed_samples_are_recorded_without_dropping_batch(self):
+        missing = os.path.join(self.tmp.name, 'missing.bin')
+        training_data = self.training_data[:4] + [(missing, 1)] + self.training_data[4:]
+
+        for workers in (1, 2):
+            feature_set = self.detector.extract_training_features(training_data, workers=workers, chunk_size=4)
+            self.assertEqual(feature_set.paths, [path for path, _ in self.training_data])
+            self.assertEqual(len(feature_set), 10)
+            self.assertEqual([path for path, _ in feature_set.failures], [missing])
+
+    def test_in_process_extraction_leaves_worker_state_alone(self):
+        self.detector.extract_training_features(self.training_data[:2], workers=1)
+        self.assertIsNone(intelligent_threat_detector._worker_extractor)
+
+
+@unittest.skipUnless(ESTIMATORS_AVAILABLE, "scikit-learn/xgboost not installed")
+class TestTrainFromFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.training_data = write_samples(self.tmp.name, 30)
+        self.store_path = os.path.join(self.tmp.name, 'features', 'train.npz')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_saved_features_retrain_without_extraction(self):
+        missing = os.path.join(self.tmp.name, 'missing.bin')
+        detector = MLThreatDetector(os.path.join(self.tmp.name, 'models'))
+        report = detector.train_models(self.training_data + [(missing, 0)], workers=1,
+                                       feature_store_path=self.store_path)
+        self.assertEqual(report['samples'], 30)
+        self.assertEqual([path for path, _ in report['failed']], [missing])
+
+        stored = load_feature_set(self.store_path, FEATURE_NAMES)
+        self.assertEqual(stored.paths, [path for path, _ in self.training_data])
+        self.assertEqual(stored.failures, report['failed'])
+
+        retrained = MLThreatDetector(os.path.join(self.tmp.name, 'retrained'))
+        retrained.feature_extractor.extract_all_features = None  # 不应再提取Feature
+        retrain_report = retrained.train_from_feature_store(self.store_path)
+        self.assertEqual(retrain_report['samples'], report['samples'])
+        self.assertEqual(retrain_report['accuracy'], report['accuracy'])
+        self.assertTrue(retrained.is_trained)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+编译树集成推理一致性Test
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_inference import compile_models, load_compiled_models, save_compiled_models
+
+try:
+    from sklearn.ensemble import IsolationForest, RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    import xgboost as xgb
+    ESTIMATORS_AVAILABLE = True
+except ImportError:
+    ESTIMATORS_AVAILABLE = False
+
+
+@unittest.skipUnless(ESTIMATORS_AVAILABLE, "scikit-learn/xgboost not installed")
+class TestTreeInference(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(7)
+        X = rng.lognormal(size=(300, 16))
+        y = (X[:, 0] + X[:, 5] > 2.5).astype(int)
+
+        # 与MLThreatDetector相同的Model配置
+        cls.scaler = StandardScaler().fit(X)
+        X_scaled = cls.scaler.transform(X)
+        cls.models = {
+            'malware_classifier': RandomForestClassifier(n_estimators=50, random_state=42).fit(X_scaled, y),
+            'anomaly_detector': IsolationForest(contamination=0.1, random_state=42).fit(X_scaled[y == 0]),
+            'threat_scorer': xgb.XGBRegressor(random_state=42).fit(X_scaled, rng.random(len(y)))
+        }
+        cls.compiled = compile_models(cls.models, cls.scaler)
+
+        X_test = rng.lognormal(size=(200, 16))
+        X_test[0, 3] = cls.scaler.mean_[3]  # 恰好落在阈值附近的值
+        cls.X_test = X_test
+        cls.X_test_scaled = cls.scaler.transform(X_test)
+
+    def assert_outputs_equal(self, compiled):
+        X = self.X_test_scaled
+        np.testing.assert_array_equal(compiled['scaler'].transform(self.X_test), X)
+        np.testing.assert_array_equal(compiled['malware_classifier'].predict_proba(X),
+                                      self.models['malware_classifier'].predict_proba(X))
+        np.testing.assert_array_equal(compiled['anomaly_detector'].decision_function(X),
+                                      self.models['anomaly_detector'].decision_function(X))
+        np.testing.assert_array_equal(compiled['threat_scorer'].predict(X),
+                                      self.models['threat_scorer'].predict(X))
+
+    def test_matches_original_estimators(self):
+        self.assert_outputs_equal(self.compiled)
+
+    def test_single_row_matches_batch(self):
+        row = self.X_test_scaled[3:4]
+        batch = self.compiled['threat_scorer'].predict(self.X_test_scaled)
+        self.assertEqual(self.compiled['threat_scorer'].predict(row)[0], batch[3])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'compiled')
+            save_compiled_models(path, self.compiled, 'v1')
+            # 再次保存时原子替换整个Directory
+            save_compiled_models(path, self.compiled, 'v2')
+            loaded, version = load_compiled_models(path)
+            self.assertEqual(version, 'v2')
+            # 只读映射 (没有复制到进程私有内存)
+            self.assertFalse(loaded['malware_classifier'].trees.value.flags.writeable)
+            self.assert_outputs_equal(loaded)
+            self.assertEqual(os.listdir(tmp), ['compiled'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+YARARules集Manage器Test
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lazy_loader import module_available
+
+YARA_AVAILABLE = module_available('yara')
+
+if YARA_AVAILABLE:
+    import yara
+    import yara_rules
+    from yara_rules import YaraRulesetManager, get_ruleset_manager
+
+
+def rule_source(name: str, marker: str) -> str:
+    return f'rule {name} {{ strings: $a = "{marker}" condition: $a }}'
+
+
+def write(path: str, text: str):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+@unittest.skipUnless(YARA_AVAILABLE, "yara-python not installed")
+class TestYaraRulesetManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rules_dir = os.path.join(self.tmp.name, 'rules')
+        os.makedirs(os.path.join(self.rules_dir, 'windows'))
+        write(os.path.join(self.rules_dir, 'generic.yar'), rule_source('Generic', 'EVIL_GENERIC'))
+        write(os.path.join(self.rules_dir, 'windows', 'injection.yara'), rule_source('Injection', 'VirtualAllocEx'))
+        write(os.path.join(self.rules_dir, 'README.txt'), 'not a rule')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def matches(self, manager, data: bytes):
+        return sorted((match.namespace, match.rule) for match in manager.rules.match(data=data))
+
+    def test_directory_compiles_with_namespaces(self):
+        manager = YaraRulesetManager(self.rules_dir, watch=False)
+
+        self.assertEqual(sorted(manager.rule_files()), ['generic', 'windows.injection'])
+        self.assertEqual(manager.version, 1)
+        self.assertEqual(self.matches(manager, b"EVIL_GENERIC VirtualAllocEx"),
+                         [('generic', 'Generic'), ('windows.injection', 'Injection')])
+
+    def test_reload_picks_up_added_rule_file(self):
+        manager = YaraRulesetManager(self.rules_dir, watch=False)
+        self.assertFalse(manager.reload())
+
+        write(os.path.join(self.rules_dir, 'added.yar'), rule_source('Added', 'NEW_MARKER'))
+        self.assertTrue(manager.reload())
+        self.assertEqual(manager.version, 2)
+        self.assertEqual(self.matches(manager, b"NEW_MARKER"), [('added', 'Added')])
+
+    def test_syntax_error_keeps_previous_ruleset(self):
+        manager = YaraRulesetManager(self.rules_dir, watch=False)
+        previous = manager.rules
+
+        write(os.path.join(self.rules_dir, 'broken.yar'), 'rule Broken { condition: }')
+        self.assertFalse(manager.reload())
+        self.assertIs(manager.rules, previous)
+        self.assertEqual(manager.version, 1)
+        self.assertIsNotNone(manager.last_error)
+        self.assertEqual(manager.status()['last_error'], manager.last_error)
+        # 同一个损坏的签名不会反复重新编译
+        self.assertFalse(manager.reload())
+
+        write(os.path.join(self.rules_dir, 'broken.yar'), rule_source('Fixed', 'FIXED'))
+        self.assertTrue(manager.reload())
+        self.assertEqual(manager.version, 2)
+        self.assertIsNone(manager.last_error)
+
+    def test_fingerprint_follows_rule_content(self):
+        manager = YaraRulesetManager(self.rules_dir, watch=False)
+        fingerprint = manager.fingerprint
+        self.assertEqual(len(fingerprint), 64)
+        # 另一个Process (新实例) 加载相同内容得到相同指纹
+        self.assertEqual(YaraRulesetManager(self.rules_dir, watch=False).fingerprint, fingerprint)
+        self.assertEqual(manager.status()['fingerprint'], fingerprint)
+
+        # 只改mtime会重新加载，但指纹不变
+        path = os.path.join(self.rules_dir, 'generic.yar')
+        os.utime(path, ns=(0, 0))
+        self.assertTrue(manager.reload())
+        self.assertEqual(manager.fingerprint, fingerprint)
+
+        write(os.path.join(self.rules_dir, 'broken.yar'), 'rule Broken { condition: }')
+        self.assertFalse(manager.reload())
+        self.assertEqual(manager.fingerprint, fingerprint)
+
+        write(os.path.join(self.rules_dir, 'broken.yar'), rule_source('Fixed', 'FIXED'))
+        self.assertTrue(manager.reload())
+        self.assertNotEqual(manager.fingerprint, fingerprint)
+
+    def test_loads_precompiled_rules_file(self):
+        compiled = os.path.join(self.tmp.name, 'rules.compiled')
+        yara.compile(source=rule_source('Saved', 'SAVED_MARKER')).save(compiled)
+
+        manager = YaraRulesetManager(compiled, watch=False)
+        self.assertIsNone(manager.last_error)
+        self.assertEqual(self.matches(manager, b"xx SAVED_MARKER xx"), [('default', 'Saved')])
+
+    def test_get_ruleset_manager_shares_instance_per_path(self):
+        manager = get_ruleset_manager(self.rules_dir)
+        self.addCleanup(yara_rules._managers.pop, os.path.abspath(self.rules_dir), None)
+        self.addCleanup(manager.stop_watcher)
+
+        self.assertIs(get_ruleset_manager(self.rules_dir), manager)
+        self.assertIs(get_ruleset_manager(self.rules_dir + os.sep), manager)
+        self.assertIsNot(get_ruleset_manager(), manager)
+
+
+if __name__ == '__main__':
+    unittest.main()
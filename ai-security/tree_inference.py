@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+编译树集成推理
+把TrainingGood的RandomForest、IsolationForest、XGBoostModel和StandardScaler展平为连续的NumPy数组，
+推理时只依赖NumPy (不导入sklearn/xgboost)，Output与原Model一致。
+编译Result保存为每个数组一个.npy的Directory，Load时内存映射，多个WorkerProcess共享同一份页缓存
+"""
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPILED_FORMAT = 2
+
+# 编译ModelDirectory中的清单File
+MANIFEST_NAME = 'manifest.json'
+
+# 每推进多少层压缩一次活动集合
+COMPACT_INTERVAL = 4
+
+# 数组键名分隔符: <model>__<array>
+KEY_SEPARATOR = '__'
+
+
+class TreeArrays:
+    """展平的树集合
+
+    所Has树的节点拼接在同一组数组中，roots给出每棵树根节点的偏移。
+    叶子节点的左右子节点指向自身，因此Already到达叶子的 (行, 树) 对继续推进也不会移动。
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 default_left: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 max_depth: int, strict: bool = False, is_leaf: Optional[np.ndarray] = None):
+        # 类型已匹配的数组 (如内存映射的数组) 不会被复制
+        self.feature = np.ascontiguousarray(feature, dtype=np.int64)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        # 左右子节点交错存储: children[2 * node + go_right]
+        self.children = np.ascontiguousarray(children, dtype=np.int64)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int64)
+        self.max_depth = int(max_depth)
+        if is_leaf is None:
+            is_leaf = self.left == np.arange(len(self.left))
+        self.is_leaf = np.ascontiguousarray(is_leaf, dtype=bool)
+        # sklearn: x <= threshold 走左; xgboost: x < threshold 走左
+        self.strict = bool(strict)
+
+    @property
+    def left(self) -> np.ndarray:
+        return self.children[0::2]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.children[1::2]
+
+    @classmethod
+    def from_trees(cls, trees: List[Dict[str, np.ndarray]], strict: bool = False) -> 'TreeArrays':
+        """拼接单棵树的数组 (子节点为-1表示叶子)"""
+        features, thresholds, lefts, rights, defaults, values, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for tree in trees:
+            left = np.asarray(tree['left'], dtype=np.int64)
+            right = np.asarray(tree['right'], dtype=np.int64)
+            n_nodes = len(left)
+            nodes = np.arange(n_nodes)
+            is_leaf = left < 0
+
+            features.append(np.where(is_leaf, 0, tree['feature']))
+            thresholds.append(np.where(is_leaf, 0.0, tree['threshold']))
+            lefts.append(np.where(is_leaf, nodes, left) + offset)
+            rights.append(np.where(is_leaf, nodes, right) + offset)
+            defaults.append(tree['default_left'])
+            values.append(np.asarray(tree['value'], dtype=np.float64).reshape(n_nodes, -1))
+            roots.append(offset)
+            max_depth = max(max_depth, tree_depth(left, right))
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.column_stack([np.concatenate(lefts), np.concatenate(rights)]).ravel(),
+            default_left=np.concatenate(defaults),
+            value=np.concatenate(values),
+            roots=np.array(roots),
+            max_depth=max_depth,
+            strict=strict
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """返回每行在每棵树中到达的叶子节点 (n_samples, n_trees)"""
+        # 与sklearn/xgboost一致: Feature先转为float32再与阈值比较
+        X = np.ascontiguousarray(X, dtype=np.float32).astype(np.float64)
+        n_samples, n_features = X.shape
+        flat = X.ravel()
+
+        nodes = np.tile(self.roots, n_samples)
+        row_offsets = np.repeat(np.arange(n_samples) * n_features, self.n_trees)
+
+        # 所Has (行, 树) 对按层同时推进；每隔几层把Already到达叶子的对移出活动集合
+        active = np.arange(nodes.size)
+        current = nodes.copy()
+        offsets = row_offsets
+        for depth in range(1, self.max_depth + 1):
+            x = flat[offsets + self.feature[current]]
+            threshold = self.threshold[current]
+            go_right = x >= threshold if self.strict else x > threshold
+            missing = np.isnan(x)
+            if missing.any():
+                go_right = np.where(missing, ~self.default_left[current], go_right)
+            current = self.children[2 * current + go_right]
+
+            if depth % COMPACT_INTERVAL == 0 and depth < self.max_depth:
+                nodes[active] = current
+                keep = ~self.is_leaf[current]
+                active, current, offsets = active[keep], current[keep], offsets[keep]
+
+        nodes[active] = current
+        return nodes.reshape(n_samples, self.n_trees)
+
+    def leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """每行在每棵树中的叶子值 (n_samples, n_trees, n_outputs)"""
+        return self.value[self.apply(X)]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'children': self.children,
+            'is_leaf': self.is_leaf,
+            'default_left': self.default_left,
+            'value': self.value,
+            'roots': self.roots,
+            'max_depth': np.array(self.max_depth),
+            'strict': np.array(self.strict)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'TreeArrays':
+        return cls(
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            children=arrays['children'],
+            default_left=arrays['default_left'],
+            value=arrays['value'],
+            roots=arrays['roots'],
+            max_depth=int(arrays['max_depth']),
+            strict=bool(arrays['strict']),
+            is_leaf=arrays['is_leaf']
+        )
+
+
+def tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    """树的最大Depth (根为0)"""
+    depth = np.zeros(len(left), dtype=np.int64)
+    # 节点编号保证父节点在子节点之前 (sklearn和xgboost均如此)
+    for node in range(len(left)):
+        if left[node] >= 0:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+    return int(depth.max()) if len(depth) else 0
+
+
+def sequential_sum(values: np.ndarray, axis: int = 1) -> np.ndarray:
+    """按树的顺序依次累加 (与原实现的求和顺序相同，Result逐位一致)"""
+    return np.cumsum(values, axis=axis).take(-1, axis=axis)
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """n个Sample的iTree中不Success查找的平均路径Length c(n)"""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros(n_samples.shape)
+    result[n_samples == 2] = 1.0
+    mask = n_samples > 2
+    result[mask] = (2.0 * (np.log(n_samples[mask] - 1.0) + np.euler_gamma)
+                    - 2.0 * (n_samples[mask] - 1.0) / n_samples[mask])
+    return result
+
+
+class CompiledScaler:
+    """StandardScaler.transform"""
+
+    kind = 'scaler'
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        return (X - self.mean) / self.scale
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {'mean': self.mean, 'scale': self.scale}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'CompiledScaler':
+        return cls(arrays['mean'], arrays['scale'])
+
+
+class CompiledForestClassifier:
+    """RandomForestClassifier.predict_proba"""
+
+    kind = 'forest_classifier'
+
+    def __init__(self, trees: TreeArrays, classes: np.ndarray):
+        self.trees = trees
+        self.classes_ = np.asarray(classes)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return sequential_sum(self.trees.leaf_values(X)) / self.trees.n_trees
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {**self.trees.to_arrays(), 'classes': self.classes_}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'CompiledForestClassifier':
+        return cls(TreeArrays.from_arrays(arrays), arrays['classes'])
+
+
+class CompiledIsolationForest:
+    """IsolationForest.score_samples / decision_function
+
+    叶子值预先存储为 该叶子Depth + c(叶子Sample数)，推理时只需累加路径Length。
+    """
+
+    kind = 'isolation_forest'
+
+    def __init__(self, trees: TreeArrays, denominator: float, offset: float):
+        self.trees = trees
+        self.denominator = float(denominator)
+        self.offset_ = float(offset)
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        depths = sequential_sum(self.trees.leaf_values(X)[:, :, 0])
+        if self.denominator == 0:
+            return -np.ones(len(depths))
+        return -(2 ** (-(depths / self.denominator)))
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return self.score_samples(X) - self.offset_
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {**self.trees.to_arrays(), 'denominator': np.array(self.denominator),
+                'offset': np.array(self.offset_)}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'CompiledIsolationForest':
+        return cls(TreeArrays.from_arrays(arrays), float(arrays['denominator']), float(arrays['offset']))
+
+
+class CompiledBooster:
+    """XGBRegressor.predict (gbtree，单目标)"""
+
+    kind = 'booster'
+
+    # 支持的目标函数及其链接函数
+    LOGISTIC_OBJECTIVES = ('binary:logistic', 'reg:logistic')
+    IDENTITY_OBJECTIVES = ('reg:squarederror', 'reg:squaredlogerror', 'reg:pseudohubererror',
+                           'reg:absoluteerror', 'reg:quantileerror')
+
+    def __init__(self, trees: TreeArrays, base_margin: float, objective: str):
+        self.trees = trees
+        self.base_margin = float(base_margin)
+        self.objective = objective
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.trees.leaf_values(X)[:, :, 0].astype(np.float32)
+        # xgboost以float32从base_margin开始逐棵树累加
+        margins = np.empty((leaves.shape[0], leaves.shape[1] + 1), dtype=np.float32)
+        margins[:, 0] = self.base_margin
+        margins[:, 1:] = leaves
+        margin = sequential_sum(margins)
+        if self.objective in self.LOGISTIC_OBJECTIVES:
+            return (1.0 / (1.0 + np.exp(-margin.astype(np.float64)))).astype(np.float32)
+        return margin
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {**self.trees.to_arrays(), 'base_margin': np.array(self.base_margin),
+                'objective': np.array(self.objective)}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'CompiledBooster':
+        return cls(TreeArrays.from_arrays(arrays), float(arrays['base_margin']), str(arrays['objective']))
+
+
+COMPILED_KINDS = {
+    model_class.kind: model_class
+    for model_class in (CompiledScaler, CompiledForestClassifier, CompiledIsolationForest, CompiledBooster)
+}
+
+
+def sklearn_tree(tree, feature_map: Optional[np.ndarray] = None,
+                 value: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """读取sklearn Tree对象 (estimator.tree_) 的数组"""
+    feature = np.asarray(tree.feature)
+    if feature_map is not None:
+        feature = np.where(feature >= 0, feature_map[np.maximum(feature, 0)], feature)
+    missing_go_to_left = getattr(tree, 'missing_go_to_left', None)
+    return {
+        'feature': feature,
+        'threshold': np.asarray(tree.threshold),
+        'left': np.asarray(tree.children_left),
+        'right': np.asarray(tree.children_right),
+        'default_left': (np.asarray(missing_go_to_left, dtype=bool) if missing_go_to_left is not None
+                         else np.zeros(tree.node_count, dtype=bool)),
+        'value': np.asarray(tree.value) if value is None else value
+    }
+
+
+def compile_scaler(scaler) -> CompiledScaler:
+    """导出StandardScaler的均值和缩放"""
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if getattr(scaler, 'with_mean', True) and scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if getattr(scaler, 'with_std', True) and scaler.scale_ is not None else np.ones(n_features)
+    return CompiledScaler(mean, scale)
+
+
+def compile_random_forest(forest) -> CompiledForestClassifier:
+    """导出RandomForestClassifier (单Output)"""
+    if getattr(forest, 'n_outputs_', 1) != 1:
+        raise ValueError("Only single-output forests can be compiled")
+
+    n_classes = len(forest.classes_)
+    trees = []
+    for estimator in forest.estimators_:
+        # 与DecisionTreeClassifier.predict_proba相同的归一化
+        proba = np.asarray(estimator.tree_.value)[:, 0, :n_classes].astype(np.float64)
+        normalizer = proba.sum(axis=1)[:, None]
+        normalizer[normalizer == 0.0] = 1.0
+        trees.append(sklearn_tree(estimator.tree_, value=proba / normalizer))
+
+    return CompiledForestClassifier(TreeArrays.from_trees(trees), forest.classes_)
+
+
+def compile_isolation_forest(forest) -> CompiledIsolationForest:
+    """导出IsolationForest"""
+    subsample_features = forest._max_features != forest.n_features_in_
+    trees = []
+    for estimator, features in zip(forest.estimators_, forest.estimators_features_):
+        tree = estimator.tree_
+        # compute_node_depths() 以根为1，sklearn累加时再减1
+        depths = np.asarray(tree.compute_node_depths(), dtype=np.float64)
+        leaf_value = depths + average_path_length(tree.n_node_samples) - 1.0
+        trees.append(sklearn_tree(tree, feature_map=np.asarray(features) if subsample_features else None,
+                                  value=leaf_value))
+
+    max_samples = getattr(forest, '_max_samples', forest.max_samples_)
+    denominator = len(forest.estimators_) * float(average_path_length(np.array([max_samples]))[0])
+    return CompiledIsolationForest(TreeArrays.from_trees(trees), denominator, forest.offset_)
+
+
+def parse_base_score(value: Any) -> float:
+    """xgboost的base_score可能是 '5E-1' 或 '[5E-1]'"""
+    return float(str(value).strip('[]').split(',')[0])
+
+
+def compile_xgboost(model) -> CompiledBooster:
+    """从xgboost JSONModel导出回归树"""
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    raw = booster.save_raw('json')
+    learner = json.loads(bytes(raw).decode('utf-8'))['learner']
+
+    params = learner['learner_model_param']
+    if int(params.get('num_class', 0)) > 1 or int(params.get('num_target', 1)) != 1:
+        raise ValueError("Only single-target xgboost models can be compiled")
+
+    gradient_booster = learner['gradient_booster']
+    if gradient_booster.get('name', 'gbtree') != 'gbtree':
+        raise ValueError(f"Unsupported booster: {gradient_booster.get('name')}")
+
+    objective = learner['objective']['name']
+    if objective not in CompiledBooster.LOGISTIC_OBJECTIVES + CompiledBooster.IDENTITY_OBJECTIVES:
+        raise ValueError(f"Unsupported xgboost objective: {objective}")
+
+    base_score = parse_base_score(params['base_score'])
+    if objective in CompiledBooster.LOGISTIC_OBJECTIVES:
+        base_margin = np.log(base_score / (1.0 - base_score))
+    else:
+        base_margin = base_score
+    base_margin = float(np.float32(base_margin))
+
+    trees = []
+    for tree in gradient_booster['model']['trees']:
+        if tree.get('categories_nodes'):
+            raise ValueError("Categorical splits are not supported")
+        left = np.asarray(tree['left_children'], dtype=np.int64)
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32).astype(np.float64)
+        trees.append({
+            'feature': np.asarray(tree['split_indices'], dtype=np.int64),
+            'threshold': conditions,
+            'left': left,
+            'right': np.asarray(tree['right_children'], dtype=np.int64),
+            'default_left': np.asarray(tree['default_left'], dtype=bool),
+            # 叶子的Output存储在split_conditions中
+            'value': np.where(left < 0, conditions, 0.0)
+        })
+
+    return CompiledBooster(TreeArrays.from_trees(trees, strict=True), base_margin, objective)
+
+
+def compile_models(models: Dict[str, Any], scaler) -> Dict[str, Any]:
+    """导出MLThreatDetector的Model集合"""
+    return {
+        'scaler': compile_scaler(scaler),
+        'malware_classifier': compile_random_forest(models['malware_classifier']),
+        'anomaly_detector': compile_isolation_forest(models['anomaly_detector']),
+        'threat_scorer': compile_xgboost(models['threat_scorer'])
+    }
+
+
+def save_compiled_models(path: str, compiled: Dict[str, Any], model_version: str) -> Path:
+    """Save编译后的Model: Directory中每个数组一个.npy，加上清单File
+
+    先写入临时Directory再重命名，替换已有Directory时旧File在被映射期间仍然有效。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp-{uuid.uuid4().hex[:8]}")
+    tmp_path.mkdir()
+
+    manifest = {
+        'format_version': COMPILED_FORMAT,
+        'model_version': model_version,
+        'models': {}
+    }
+    for name, model in compiled.items():
+        files, scalars = {}, {}
+        for key, value in model.to_arrays().items():
+            value = np.asarray(value)
+            if value.ndim == 0:
+                # 标量 (树深度、基准分数、目标函数名) 直接写入清单
+                scalars[key] = value.item()
+                continue
+            file_name = f"{name}{KEY_SEPARATOR}{key}.npy"
+            np.save(tmp_path / file_name, np.ascontiguousarray(value), allow_pickle=False)
+            files[key] = file_name
+        manifest['models'][name] = {'kind': model.kind, 'arrays': files, 'scalars': scalars}
+    with open(tmp_path / MANIFEST_NAME, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if path.exists():
+        old_path = path.with_name(f"{path.name}.old-{uuid.uuid4().hex[:8]}")
+        os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    else:
+        os.rename(tmp_path, path)
+    return path
+
+
+def load_compiled_models(path: str, mmap: bool = True) -> Tuple[Dict[str, Any], str]:
+    """Load编译后的Model，返回 (Model字典, ModelVersion)
+
+    mmap=True时数组以只读方式内存映射: 多个Process加载同一Directory时共享物理内存。
+    """
+    path = Path(path)
+    with open(path / MANIFEST_NAME) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != COMPILED_FORMAT:
+        raise ValueError(f"Unsupported compiled model format: {manifest.get('format_version')}")
+
+    compiled = {}
+    for name, entry in manifest['models'].items():
+        arrays = {
+            key: np.load(path / file_name, mmap_mode='r' if mmap else None, allow_pickle=False)
+            for key, file_name in entry['arrays'].items()
+        }
+        arrays.update({key: np.array(value) for key, value in entry['scalars'].items()})
+        compiled[name] = COMPILED_KINDS[entry['kind']].from_arrays(arrays)
+
+    return compiled, manifest['model_version']
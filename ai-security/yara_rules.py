@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+YARARules集Manage器
+进程内共享的预编译Rules集，支持从编译好的RulesFile或RulesDirectoryLoad，并在Rules变化时原子替换
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import yara
+
+logger = logging.getLogger(__name__)
+
+# Rules路径环境变量 (编译好的RulesFile、单个.yarFile或RulesDirectory)
+RULES_PATH_ENV = 'HUNTERMATRIX_YARA_RULES'
+
+# RulesDirectory中识别的源File扩展名
+RULE_EXTENSIONS = ('.yar', '.yara')
+
+# 未配置Rules时使用的内置DemoRules
+DEFAULT_RULES_SOURCE = '''
+rule SuspiciousStrings {
+    meta:
+        description = "Suspicious API calls"
+    strings:
+        $s1 = "CreateRemoteThread"
+        $s2 = "VirtualAllocEx"
+        $s3 = "WriteProcessMemory"
+        $s4 = "SetWindowsHookEx"
+    condition:
+        any of them
+}
+'''
+
+
+class YaraRulesetManager:
+    """YARARules集Manage器
+
+    所HasFeature提取器和Thread共享同一份编译好的Rules；后台ThreadMonitorRules
+    File的变化，重新编译Success后原子替换，编译Failed时保留旧Rules。
+    """
+
+    def __init__(self, rules_path: Optional[str] = None, reload_interval: float = 30.0,
+                 watch: bool = True):
+        self.rules_path = Path(rules_path) if rules_path else None
+        self.reload_interval = reload_interval
+        # version是本Process内的重新加载次数；fingerprint是Rules内容的sha256，
+        # 跨Process和重启稳定，用于给分析Result标记Version
+        self.version = 0
+        self.fingerprint: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self._rules: Optional[yara.Rules] = None
+        self._signature: Tuple = ()
+        self._failed_signature: Tuple = ()
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._watch_enabled = watch and self.rules_path is not None
+        self.pid = os.getpid()
+
+        self.reload()
+        if self._watch_enabled:
+            self.start_watcher()
+
+    @property
+    def rules(self) -> Optional[yara.Rules]:
+        """当前Rules集 (引用赋值是原子的，读取无需加锁)"""
+        return self._rules
+
+    def rule_files(self) -> Dict[str, str]:
+        """RulesDirectory中的源File: 命名Null间 -> 路径"""
+        files = {}
+        for root, _, names in os.walk(self.rules_path):
+            for name in sorted(names):
+                if name.lower().endswith(RULE_EXTENSIONS):
+                    path = Path(root) / name
+                    namespace = str(path.relative_to(self.rules_path).with_suffix('')).replace(os.sep, '.')
+                    files[namespace] = str(path)
+        return files
+
+    def signature(self) -> Tuple:
+        """RulesFile的 (路径, 大小, mtime) 签名，用于DetectionModify"""
+        if self.rules_path is None:
+            return ('builtin',)
+        if self.rules_path.is_dir():
+            paths = list(self.rule_files().values())
+        else:
+            paths = [str(self.rules_path)]
+
+        entries = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                entries.append((path, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                continue
+        return tuple(entries)
+
+    def source_paths(self):
+        """组成Rules集的File: [(命名Null间, 路径)]"""
+        if self.rules_path.is_dir():
+            return sorted(self.rule_files().items())
+        return [('', str(self.rules_path))]
+
+    def content_fingerprint(self) -> str:
+        """RulesFile内容 (及命名Null间) 的sha256，与mtime无关"""
+        digest = hashlib.sha256()
+        if self.rules_path is None:
+            digest.update(DEFAULT_RULES_SOURCE.encode())
+            return digest.hexdigest()
+        for namespace, path in self.source_paths():
+            with open(path, 'rb') as f:
+                content = f.read()
+            digest.update(f"{namespace}\0{len(content)}\0".encode())
+            digest.update(content)
+        return digest.hexdigest()
+
+    def compile(self) -> yara.Rules:
+        """LoadOr编译Rules集"""
+        if self.rules_path is None:
+            return yara.compile(source=DEFAULT_RULES_SOURCE)
+
+        if self.rules_path.is_dir():
+            files = self.rule_files()
+            if not files:
+                raise ValueError(f"No YARA rule files in {self.rules_path}")
+            return yara.compile(filepaths=files)
+
+        # 优先按预编译RulesFile加载，Failed时按源File编译
+        try:
+            return yara.load(str(self.rules_path))
+        except yara.Error:
+            return yara.compile(filepath=str(self.rules_path))
+
+    def reload(self, force: bool = False) -> bool:
+        """Rules变化时重新Load，返回是否替换了Rules集"""
+        signature = self.signature()
+        if not force and self._rules is not None and signature in (self._signature, self._failed_signature):
+            return False
+
+        start = time.time()
+        try:
+            fingerprint = self.content_fingerprint()
+            rules = self.compile()
+        except Exception as e:
+            self.last_error = str(e)
+            self._failed_signature = signature
+            logger.warning(f"Failed to load YARA rules from {self.rules_path or 'builtin'}: {e}")
+            return False
+
+        with self._lock:
+            self._rules = rules
+            self._signature = signature
+            self.version += 1
+            self.fingerprint = fingerprint
+            self.loaded_at = time.time()
+            self.last_error = None
+
+        logger.info(f"YARA ruleset v{self.version} ({fingerprint[:12]}) loaded from {self.rules_path or 'builtin'} "
+                     f"in {time.time() - start:.2f}s")
+        return True
+
+    def start_watcher(self):
+        """Start后台Monitor线程"""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name='yara-rules-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def after_fork(self):
+        """子Process中重新Start监视线程 (fork不会复制线程)"""
+        self.pid = os.getpid()
+        self._watcher = None
+        self._lock = threading.Lock()
+        if self._watch_enabled:
+            self.start_watcher()
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.warning(f"YARA rules watcher error: {e}")
+
+    def status(self) -> Dict[str, object]:
+        """Rules集Status"""
+        return {
+            'rules_path': str(self.rules_path) if self.rules_path else 'builtin',
+            'fingerprint': self.fingerprint,
+            'reloads': self.version,
+            'loaded': self._rules is not None,
+            'loaded_at': self.loaded_at,
+            'last_error': self.last_error
+        }
+
+
+_managers: Dict[str, YaraRulesetManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_ruleset_manager(rules_path: Optional[str] = None) -> YaraRulesetManager:
+    """获取进程内共享的Rules集Manage器 (同一路径只编译一次)"""
+    rules_path = rules_path or os.environ.get(RULES_PATH_ENV) or None
+    key = os.path.abspath(rules_path) if rules_path else ''
+
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = YaraRulesetManager(rules_path)
+        elif manager.pid != os.getpid():
+            manager.after_fork()
+        return manager
@@ -228,12 +228,56 @@ class HunterMatrixScanner:
                 "error": str(e)
             }
 
+class AIAnalysisClient:
+    """AI Security Service Client"""
+    
+    def __init__(self, service_url: str = "http://localhost:8082", batch_size: int = 64,
+                 max_retries: int = 3):
+        self.service_url = service_url.rstrip('/')
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+    
+    async def analyze_files(self, file_paths: List[str]) -> List[Dict]:
+        """Submit a batch of paths to /api/analyze-file"""
+        if not file_paths:
+            return []
+        
+        results = []
+        try:
+            async with aiohttp.ClientSession() as session:
+                for start in range(0, len(file_paths), self.batch_size):
+                    batch = file_paths[start:start + self.batch_size]
+                    for attempt in range(self.max_retries + 1):
+                        async with session.post(
+                            f"{self.service_url}/api/analyze-file",
+                            json={"file_paths": batch, "batch_size": self.batch_size}
+                        ) as response:
+                            # 503: Service分析队列已满，按Retry-After退避重试
+                            if response.status == 503 and attempt < self.max_retries:
+                                delay = float(response.headers.get("Retry-After", 1)) * (attempt + 1)
+                                logger.warning(f"AI service overloaded, retrying in {delay:.0f}s")
+                                await asyncio.sleep(delay)
+                                continue
+                            if response.status == 200:
+                                data = await response.json()
+                                results.extend(data.get("results", []))
+                            else:
+                                logger.error(f"AI analysis failed: {response.status}")
+                                results.extend({"file_path": path, "error": response.status} for path in batch)
+                            break
+        except Exception as e:
+            logger.error(f"AI analysis request failed: {e}")
+        
+        return results
+
 class ThreatHunter:
     """Threat Hunter"""
     
-    def __init__(self, velo_api: VelociraptorAPI, scanner: HunterMatrixScanner):
+    def __init__(self, velo_api: VelociraptorAPI, scanner: HunterMatrixScanner,
+                 ai_client: Optional[AIAnalysisClient] = None):
         self.velo_api = velo_api
         self.scanner = scanner
+        self.ai_client = ai_client
         self.hunt_rules = []
         self.load_hunt_rules()
     
@@ -308,6 +352,15 @@ class ThreatHunter:
                 if scan_result.get("status") == "infected":
                     logger.warning(f"🦠 Found威胁: {file_path} - {scan_result.get('threats', [])}")
         
+        # 将本次狩猎Found的File整批提交给AIAnalysis
+        if self.ai_client and scan_results:
+            ai_results = await self.ai_client.analyze_files(
+                [r["discovery"]["FullPath"] for r in scan_results]
+            )
+            ai_by_path = {r.get("file_path"): r for r in ai_results}
+            for combined_result in scan_results:
+                combined_result["ai_analysis"] = ai_by_path.get(combined_result["discovery"]["FullPath"])
+        
         return scan_results
     
     async def continuous_hunt(self, interval: int = 300):
@@ -374,6 +427,11 @@ class VelociraptorHunterMatrixService:
             "hunting": {
                 "interval": 300,
                 "enabled": True
+            },
+            "ai_service": {
+                "enabled": False,
+                "url": "http://localhost:8082",
+                "batch_size": 64
             }
         }
         
@@ -406,7 +464,14 @@ class VelociraptorHunterMatrixService:
             db_path=self.config["huntermatrix"]["db_path"]
         )
         
-        self.hunter = ThreatHunter(self.velo_api, self.scanner)
+        ai_client = None
+        if self.config["ai_service"]["enabled"]:
+            ai_client = AIAnalysisClient(
+                service_url=self.config["ai_service"]["url"],
+                batch_size=self.config["ai_service"]["batch_size"]
+            )
+        
+        self.hunter = ThreatHunter(self.velo_api, self.scanner, ai_client)
         
         # Start Service
         tasks = []